@@ -0,0 +1,878 @@
+"""
+Regression benchmark for time-schedule.py.
+
+Reruns the scheduler on the quarters shipped with the repository and compares the new
+results (objective value, IW/CW points, the 10%-rule heat map and block policy violations)
+against the outputs stored next to the inputs. Build and solve time of every run are
+appended to a local results file so that formulation changes can be accepted or rejected
+on numbers. CourseInfo files of old quarters get the must-time columns they lack, and a stored
+run that is known not to be reproducible is compared with EXPECTED_OBJECTIVES instead. The exit
+status is 1 if any case fails or can not be run.
+
+With --catalog-rows N, the CourseInfo file of the first case is padded with N made-up courses,
+some of them cross-listed, and only the input check (time-schedule.py config --check) is timed.
+This measures how reading the inputs scales with a university-wide course catalog.
+
+With --calibrate, every case, and the first case copied as many times as given by --calibrate-copies,
+is solved with every solver backend found on this machine. The instance features, status, objective
+and solve time are appended to a calibration file; time-schedule.py picks its backend from that file
+if 'Solver' is auto and 'Solver-calibration' names it.
+
+With --self-check, the presolve steps that change the problem before every solve (canonicalize(),
+the heuristic schedule and reduced cost fixing) are checked: on small problems whose answer is
+known, and on every case, which must reach the same optimum with each of them turned off.
+
+Usage: python3 bin/benchmark.py [--cases dir1,dir2,...] [--repeat N] [--tolerance 1e-6] [--results FILE]
+       python3 bin/benchmark.py --catalog-rows 50000 [--cases dir] [--repeat N]
+       python3 bin/benchmark.py --calibrate [--cases dir1,dir2,...] [--calibrate-copies 2,4] [--repeat N] [--calibration FILE]
+       python3 bin/benchmark.py --self-check [--cases dir1,dir2,...] [--tolerance 1e-6]
+"""
+
+import sys
+import os
+import csv
+import shutil
+import subprocess
+import tempfile
+import argparse
+import statistics
+import time
+import importlib.util
+from datetime import datetime
+from collections import defaultdict
+
+BIN_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BIN_DIR)
+SCHEDULER = os.path.join(BIN_DIR, 'time-schedule.py')
+
+# Every case is a directory that holds a config file and the outputs of an earlier run.
+# Input files that are not in the case directory are looked up in its parent directory.
+DEFAULT_CASES = ['workspace/old-output', 'workspace/output', 'workspace/output2', 'workspace/1-fall-2024',
+                 'workspace/2-win-2025', 'workspace/3-spr-2025', 'testing/output', 'testing/1-fall-2024',
+                 'testing/2-winter-2025', 'testing/3-spring-2025']
+
+# Stored runs that the scheduler no longer reproduces, for reasons that have nothing to do with a formulation change.
+# The objective given here is used instead of the stored one.
+EXPECTED_OBJECTIVES = {'workspace/2-win-2025': (19.0, 'stored run is from an older version that read names in lower case')}
+
+# Config keys added after some of the stored quarters were produced are taken from this file.
+BASE_CONFIG = 'workspace/config'
+
+INPUT_KEYS = [('CourseInfo', 'DefaultCourseInfoFile'), ('ConflictCourse', 'DefaultConflictCourseFile'),
+              ('InstructorPref', 'DefaultInstructorPrefFile'), ('CourseInstructor', 'DefaultCoursesThisQuarterFile')]
+
+RESULT_FIELDS = ['timestamp', 'commit', 'case', 'status', 'objective', 'ref-objective', 'IW-points', 'ref-IW-points',
+                 'CW-points', 'ref-CW-points', 'BP-violations', 'ref-BP-violations', 'heatmap-over-target',
+                 'heatmap-cells-changed', 'MPS-write-seconds', 'LP-solve-seconds', 'ILP-build-seconds',
+                 'ILP-solve-seconds', 'total-seconds', 'notes']
+
+# Columns renamed since results files were first written; write_results() migrates the header of an old file.
+RENAMED_FIELDS = {'LP-build-seconds': 'MPS-write-seconds'}
+
+# Instance features are the ones time-schedule.py writes to metrics.txt as Instance-<feature>
+FEATURES = ['Courses', 'Conflict-density', 'Rule-tightness']
+CALIBRATION_FIELDS = ['timestamp', 'commit', 'case', 'backend'] + FEATURES + ['status', 'objective', 'solve-seconds', 'total-seconds']
+
+#################################################################################
+def read_config_lines(file_name):
+    '''
+    Usage: Read a config file into a dictionary without converting any value.
+
+    Argument:
+    file_name(string): e.g., 'workspace/config'
+
+    Return variable:
+    config(dict): e.g., {'UseDefaultPath': '1', 'DefaultCourseInfoFile': './CourseInfo'}
+    '''
+
+    config = {}
+    with open(file_name, "r") as file:
+        for line in file:
+            if line.startswith("#") or not line.strip() or '=' not in line:
+                continue
+            key, value = line.strip().split("=", 1)
+            config[key.strip()] = value.strip().strip('"')
+
+    return config
+
+#################################################################################
+def resolve_input(case_dir, path):
+    '''
+    Usage: Find an input file of a case. Look in the case directory first, then in its parent.
+
+    Argument:
+    case_dir(string): e.g., '/.../testing/1-fall-2024'
+    path(string): path read from the config file, e.g., './CourseInfo'
+
+    Return variable:
+    full_path(string): path of the file, or None if it can not be found
+    '''
+
+    for directory in [case_dir, os.path.dirname(case_dir)]:
+        full_path = os.path.normpath(os.path.join(directory, path))
+        if os.path.isfile(full_path):
+            return full_path
+
+    return None
+
+#################################################################################
+def adapt_course_info(file_name):
+    '''
+    Usage: Bring a CourseInfo file written before the must-time columns existed up to date: rows with the
+           6 old columns get '-' for mustOnDays, mustStartTime and mustEndTime.
+
+    Argument:
+    file_name(string) {modified}: a copied CourseInfo text file, e.g., '/tmp/.../CourseInfo'
+
+    Return variable:
+    adapted(int): number of rows that were padded
+    '''
+
+    if file_name.endswith('.csv'):
+        return 0
+    with open(file_name, 'r') as file:
+        lines = file.read().splitlines()
+    adapted = 0
+    for i, line in enumerate(lines):
+        values = line.split('#')[0].split()
+        if len(values) == 6 and not line.startswith('#'):
+            lines[i] = '\t'.join(values + ['-', '-', '-'])
+            adapted += 1
+    if adapted:
+        with open(file_name, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+    return adapted
+
+#################################################################################
+def prepare_case(case_dir, work_dir):
+    '''
+    Usage: Copy config and input files of a case into work_dir, so the scheduler runs in an
+           empty directory and never touches the stored outputs.
+
+    Argument:
+    case_dir(string)
+    work_dir(string) {modified}
+
+    Return variable:
+    notes(list): what had to be adapted to run this case, e.g., ['filled Class-default-end-time']
+    '''
+
+    config = read_config_lines(os.path.join(case_dir, 'config'))
+    base_config = read_config_lines(os.path.join(REPO_DIR, BASE_CONFIG))
+    notes = []
+    for key, value in base_config.items():
+        if key not in config:
+            config[key] = value
+            notes.append(f'filled {key}')
+
+    use_default = config.get('UseDefaultPath', '1').strip() == '1'
+    for key, default_key in INPUT_KEYS:
+        path = config[default_key] if use_default else config[key]
+        full_path = resolve_input(case_dir, path)
+        if full_path is None:
+            raise FileNotFoundError(f'{path} not found for {case_dir}')
+        shutil.copy2(full_path, os.path.join(work_dir, os.path.basename(full_path)))
+        config[default_key] = './' + os.path.basename(full_path)
+        if key == 'CourseInfo' and adapt_course_info(os.path.join(work_dir, os.path.basename(full_path))):
+            notes.append('padded old CourseInfo rows')
+    config['UseDefaultPath'] = '1'
+    config['DefaultOutputDir'] = './output/'
+    os.makedirs(os.path.join(work_dir, 'output'))
+
+    with open(os.path.join(work_dir, 'config'), 'w') as file:
+        for key, value in config.items():
+            file.write(f'{key} = {value}\n')
+
+    return notes
+
+#################################################################################
+def parse_stderr(text):
+    '''
+    Usage: Extract solution quality from the log.stderr written by time-schedule.py.
+
+    Argument:
+    text(string): content of a log.stderr file
+
+    Return variable:
+    result(dict): e.g., {'objective': 17.0, 'IW': 17.0, 'CW': 25.0, 'BP': 0}
+    '''
+
+    prefixes = {'Objective value:': 'objective', 'IW points earned:': 'IW', 'CW points earned:': 'CW',
+                'The number of courses that violate Block Policy:': 'BP', 'Result:': 'status'}
+    result = {}
+    for line in text.splitlines():
+        for prefix, key in prefixes.items():
+            if line.strip().startswith(prefix):
+                value = line.strip()[len(prefix):].strip()
+                try:
+                    result[key] = float(value)
+                except ValueError:
+                    result[key] = value
+
+    return result
+
+#################################################################################
+def parse_heatmap(file_name):
+    '''
+    Usage: Read a heatMap.txt file.
+
+    Argument:
+    file_name(string)
+
+    Return variable:
+    heatmap(dict): maps an hour to its per-day values, hourly total and hourly target,
+                   e.g., {'08:30': ([2.0, 2.0, 2.0, 3.0, 1.0], 10.0, 10.0)}
+    '''
+
+    heatmap = {}
+    with open(file_name, 'r') as file:
+        for line in file:
+            values = line.split()
+            if len(values) != 8 or ':' not in values[0]:
+                continue
+            heatmap[values[0]] = ([float(v) for v in values[1:6]], float(values[6]), float(values[7]))
+
+    return heatmap
+
+#################################################################################
+def find_reference(case_dir, suffix):
+    '''
+    Usage: Find a stored output in a case directory. Quarters store them under slightly different
+           names, e.g., 'heatMap.txt' or 'spring2025-heatMap.txt'.
+
+    Argument:
+    case_dir(string)
+    suffix(string): e.g., 'heatMap.txt'
+
+    Return variable:
+    file_name(string) or None
+    '''
+
+    for name in sorted(os.listdir(case_dir)):
+        if name == suffix or name.endswith('-' + suffix):
+            return os.path.join(case_dir, name)
+
+    return None
+
+#################################################################################
+def read_metrics(file_name):
+    '''
+    Usage: Read metrics.txt written by time-schedule.py.
+
+    Argument:
+    file_name(string)
+
+    Return variable:
+    metrics(dict): e.g., {'ILP-solve-seconds': 0.28}
+    '''
+
+    metrics = {}
+    if not os.path.isfile(file_name):
+        return metrics
+    with open(file_name, 'r') as file:
+        for line in file:
+            if '=' in line:
+                key, value = line.split('=', 1)
+                try:
+                    metrics[key.strip()] = float(value)
+                except ValueError:
+                    metrics[key.strip()] = value.strip()
+
+    return metrics
+
+#################################################################################
+def compare_heatmap(new_heatmap, ref_heatmap):
+    '''
+    Usage: Check the 10% rule on a new heat map and count cells that changed against the stored one.
+
+    Argument:
+    new_heatmap(dict)
+    ref_heatmap(dict) or None
+
+    Return variable:
+    over_target(int): number of hours whose total exceeds the hourly target
+    changed(int): number of (hour, day) cells that differ from the stored heat map, -1 if there is none
+    '''
+
+    over_target = sum(1 for days, total, target in new_heatmap.values() if total > target + 1e-6)
+    if ref_heatmap is None:
+        return over_target, -1
+    changed = 0
+    for hour, (days, total, target) in new_heatmap.items():
+        ref_days = ref_heatmap.get(hour, ([None] * 5, None, None))[0]
+        changed += sum(1 for d in range(5) if ref_days[d] is None or abs(days[d] - ref_days[d]) > 1e-6)
+
+    return over_target, changed
+
+#################################################################################
+def run_case(case, repeat, tolerance):
+    '''
+    Usage: Rerun one case and compare it with its stored outputs.
+
+    Argument:
+    case(string): case directory relative to the repository, e.g., 'workspace/old-output'
+    repeat(int): number of runs; timings are the median over the runs
+    tolerance(float): allowed objective decrease
+
+    Return variable:
+    row(dict): one row of the results file
+    '''
+
+    case_dir = os.path.join(REPO_DIR, case)
+    row = dict.fromkeys(RESULT_FIELDS, '')
+    row['case'] = case
+    notes = []
+    timings = defaultdict(list)
+    new = {}
+    new_heatmap = {}
+
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as work_dir:
+            try:
+                notes = prepare_case(case_dir, work_dir)
+            except (OSError, KeyError) as error:
+                row['status'] = 'ERROR'
+                row['notes'] = str(error)
+                return row
+            proc = subprocess.run([sys.executable, SCHEDULER, 'config'], cwd=work_dir, capture_output=True, text=True)
+            new = parse_stderr(proc.stderr)
+            if proc.returncode != 0 or 'objective' not in new:
+                row['status'] = 'ERROR'
+                row['notes'] = '; '.join(notes + [proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'no output'])
+                return row
+            metrics = read_metrics(os.path.join(work_dir, 'output', 'metrics.txt'))
+            for key in ['MPS-write-seconds', 'LP-solve-seconds', 'ILP-build-seconds', 'ILP-solve-seconds', 'Total-seconds']:
+                if key in metrics:
+                    timings[key].append(metrics[key])
+            new_heatmap = parse_heatmap(os.path.join(work_dir, 'output', 'heatMap.txt'))
+
+    ref_log = os.path.join(case_dir, 'log.stderr')
+    ref = parse_stderr(open(ref_log).read()) if os.path.isfile(ref_log) else {}
+    if case in EXPECTED_OBJECTIVES:
+        ref['objective'], reason = EXPECTED_OBJECTIVES[case]
+        notes.append(f'expected objective {ref["objective"]:g}: {reason}')
+    ref_heatmap_file = find_reference(case_dir, 'heatMap.txt')
+    ref_heatmap = parse_heatmap(ref_heatmap_file) if ref_heatmap_file else None
+    over_target, changed = compare_heatmap(new_heatmap, ref_heatmap)
+
+    row['objective'] = new['objective']
+    row['ref-objective'] = ref.get('objective', '')
+    row['IW-points'] = new.get('IW', '')
+    row['ref-IW-points'] = ref.get('IW', '')
+    row['CW-points'] = new.get('CW', '')
+    row['ref-CW-points'] = ref.get('CW', '')
+    row['BP-violations'] = new.get('BP', '')
+    row['ref-BP-violations'] = ref.get('BP', '')
+    row['heatmap-over-target'] = over_target
+    row['heatmap-cells-changed'] = changed
+    for key, values in timings.items():
+        row[key.replace('Total', 'total')] = round(statistics.median(values), 4)
+
+    # A run is accepted if it is not worse than the stored run: same or better objective,
+    # no hour over the 10%-rule target, and no more block policy violations than before.
+    failures = []
+    if 'objective' in ref and new['objective'] < ref['objective'] - tolerance:
+        failures.append('objective decreased')
+    if over_target > 0:
+        failures.append('10% rule violated')
+    if 'BP' in ref and new.get('BP', 0) > ref['BP']:
+        failures.append('more block policy violations')
+    if 'objective' in ref and new['objective'] > ref['objective'] + tolerance:
+        notes.append('objective improved')
+    row['status'] = 'FAIL' if failures else 'PASS'
+    row['notes'] = '; '.join(failures + notes)
+
+    return row
+
+#################################################################################
+def pad_catalog(work_dir, rows):
+    '''
+    Usage: Append made-up courses to the CourseInfo file of a prepared case. Every fourth course is
+           cross-listed, e.g., 'X1004/X51004'. None of them is taught this quarter.
+
+    Argument:
+    work_dir(string) {modified}: a directory prepared by prepare_case()
+    rows(int): number of rows to append
+    '''
+
+    config = read_config_lines(os.path.join(work_dir, 'config'))
+    file_name = os.path.join(work_dir, config['DefaultCourseInfoFile'])
+    is_csv = file_name.endswith('.csv')
+    with open(file_name, 'a', newline='') as file:
+        writer = csv.writer(file) if is_csv else None
+        for i in range(rows):
+            name = f'X{i}/X{i + rows}' if i % 4 == 0 else f'X{i}'
+            values = [name, '80', '2', str(i % 2), '0', '0', '-', '-', '-']
+            if is_csv:
+                writer.writerow(values + [''])
+            else:
+                file.write('\t'.join(values) + '\n')
+
+    return
+
+#################################################################################
+def run_catalog_case(case, rows, repeat):
+    '''
+    Usage: Time the input check of one case with and without rows made-up courses in CourseInfo. The check writes no 
+           file, so it is timed once without an index file and once more after a normal run has indexed a large 
+           CourseInfo file in the same directory.
+
+    Argument:
+    case(string): case directory relative to the repository, e.g., 'workspace/2-win-2025'
+    rows(int): number of made-up CourseInfo rows
+    repeat(int): number of runs; timings are the median over the runs
+
+    Return variable:
+    seconds(dict): median wall time of the check without and with the index, e.g., {0: (0.21, 0.21), 50000: (0.35, 0.22)}
+    '''
+
+    case_dir = os.path.join(REPO_DIR, case)
+    seconds = {}
+    for padding in [0, rows]:
+        timings = [[], []]
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as work_dir:
+                prepare_case(case_dir, work_dir)
+                pad_catalog(work_dir, padding)
+                for timing in timings:
+                    if timing is timings[1]:
+                        # Index the CourseInfo file, if it is large enough, with a normal (untimed) run
+                        proc = subprocess.run([sys.executable, SCHEDULER, 'config'], cwd=work_dir, capture_output=True, text=True)
+                        if proc.returncode != 0:
+                            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'no output')
+                    start = time.perf_counter()
+                    proc = subprocess.run([sys.executable, SCHEDULER, 'config', '--check'], cwd=work_dir, capture_output=True, text=True)
+                    timing.append(time.perf_counter() - start)
+                    if proc.returncode != 0:
+                        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'no output')
+        seconds[padding] = (statistics.median(timings[0]), statistics.median(timings[1]))
+
+    return seconds
+
+#################################################################################
+def git_commit():
+    '''
+    Usage: Return the short hash of the current commit, with a '+' if bin/ has uncommitted changes.
+    '''
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD', '--', 'bin'], cwd=REPO_DIR).returncode != 0
+    except OSError:
+        return 'unknown'
+
+    return commit + ('+' if dirty else '')
+
+#################################################################################
+def write_results(rows, file_name, fields=RESULT_FIELDS):
+    '''
+    Usage: Append rows to the results file; create it with a header line if it does not exist. A file written with 
+           other columns is rewritten with the current header first (renamed columns keep their values, new columns 
+           are left empty). If it has a column that is no longer written, nothing is appended.
+
+    Argument:
+    rows(list): a list of dict
+    file_name(string)
+    fields(list): columns of the file
+    '''
+
+    is_new = not os.path.isfile(file_name)
+    if not is_new:
+        with open(file_name, 'r', newline='') as csvfile:
+            old_rows = list(csv.reader(csvfile))
+        header = [RENAMED_FIELDS.get(name, name) for name in old_rows[0]] if old_rows else fields
+        unknown = [name for name in header if name not in fields]
+        if unknown:
+            sys.exit(f'{file_name} has columns that are no longer written ({", ".join(unknown)}); use another --results file')
+        if old_rows and old_rows[0] != fields:
+            print(f'{file_name}: header updated to the current columns', file=sys.stderr)
+            with open(file_name, 'w', newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(dict(zip(header, values)) for values in old_rows[1:])
+
+    with open(file_name, 'a', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fields)
+        if is_new:
+            writer.writeheader()
+        writer.writerows(rows)
+
+    return
+
+#################################################################################
+def print_summary(rows):
+    '''
+    Usage: Print one line per case.
+    '''
+
+    print(f"{'case':<24}{'status':<8}{'objective':>10}{'ref':>8}{'IW':>7}{'CW':>7}{'BP':>4}{'heat':>6}{'build(s)':>10}{'solve(s)':>10}  notes")
+    for row in rows:
+        build = sum(row[k] for k in ['MPS-write-seconds', 'ILP-build-seconds'] if row[k] != '')
+        solve = sum(row[k] for k in ['LP-solve-seconds', 'ILP-solve-seconds'] if row[k] != '')
+        print(f"{row['case']:<24}{row['status']:<8}{str(row['objective']):>10}{str(row['ref-objective']):>8}"
+              f"{str(row['IW-points']):>7}{str(row['CW-points']):>7}{str(row['BP-violations']):>4}"
+              f"{str(row['heatmap-cells-changed']):>6}{build:>10.3f}{solve:>10.3f}  {row['notes']}")
+
+    return
+
+#################################################################################
+def copy_rows(file_name, copies, renames):
+    '''
+    Usage: Replace an input file with copies copies of its rows. The header (comment lines of a text file, the first
+           row of a csv file) is kept once, in front.
+
+    Argument:
+    file_name(string) {modified}: e.g., '/tmp/.../CoursesThisQuarter'
+    copies(int)
+    renames(list): one function per column that turns (value, k) into the value of the k-th copy; None keeps the
+                   value and the last function is used for the columns after it, e.g., [course, instructor, None]
+    '''
+
+    is_csv = file_name.endswith('.csv')
+    with open(file_name, newline='') as file:
+        if is_csv:
+            rows = list(csv.reader(file))
+            header, rows = rows[:1], rows[1:]
+        else:
+            lines = file.read().splitlines()
+            header = [line for line in lines if line.startswith('#')]
+            rows = [line.split() for line in lines if line.strip() and not line.startswith('#')]
+
+    with open(file_name, 'w', newline='') as file:
+        writer = csv.writer(file) if is_csv else None
+        if is_csv:
+            writer.writerows(header)
+        else:
+            file.write('\n'.join(header) + '\n\n')
+        for k in range(copies):
+            for values in rows:
+                if not values or values[0].startswith('#'):
+                    continue
+                functions = renames + renames[-1:] * len(values)
+                values = [value if rename is None or value in ['', '-'] else rename(value, k) for value, rename in zip(values, functions)]
+                if is_csv:
+                    writer.writerow(values)
+                else:
+                    file.write('\t'.join(values) + '\n')
+
+    return
+
+#################################################################################
+def synthesize_case(work_dir, copies):
+    '''
+    Usage: Turn a prepared case into a quarter copies times as large. The k-th copy of a course or an instructor 
+           gets the suffix '-s<k>' (every part of a cross-listed name, e.g., '442-s1/542-s1'), so conflicts and 
+           same-day pairs stay inside their copy and the 10%-rule target grows with the number of hours.
+
+    Argument:
+    work_dir(string) {modified}: a directory prepared by prepare_case()
+    copies(int)
+    '''
+
+    def course(name, k):
+        return '/'.join(f'{part}-s{k}' for part in name.split('/'))
+
+    def instructor(name, k):
+        return f'{name}-s{k}'
+
+    config = read_config_lines(os.path.join(work_dir, 'config'))
+    copy_rows(os.path.join(work_dir, config['DefaultCoursesThisQuarterFile']), copies, [course, instructor, None])
+    copy_rows(os.path.join(work_dir, config['DefaultCourseInfoFile']), copies, [course, None])
+    copy_rows(os.path.join(work_dir, config['DefaultConflictCourseFile']), copies, [course])
+    copy_rows(os.path.join(work_dir, config['DefaultInstructorPrefFile']), copies, [instructor, None])
+
+    return
+
+#################################################################################
+def load_scheduler():
+    '''
+    Usage: Import time-schedule.py as a module, with pulp imported the way its main() does.
+    '''
+
+    spec = importlib.util.spec_from_file_location('time_schedule', SCHEDULER)
+    scheduler = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(scheduler)
+    import pulp
+    scheduler.pulp = pulp
+
+    return scheduler
+
+#################################################################################
+def calibrate_case(case, copies, backend, repeat):
+    '''
+    Usage: Solve one case, copied copies times if copies > 1, with one solver backend.
+
+    Argument:
+    case(string): case directory relative to the repository, e.g., 'testing/1-fall-2024'
+    copies(int)
+    backend(string): e.g., 'GLPK'
+    repeat(int): number of runs; times are the median over the runs
+
+    Return variable:
+    row(dict): one row of the calibration file
+    '''
+
+    row = dict.fromkeys(CALIBRATION_FIELDS, '')
+    row['case'] = case if copies <= 1 else f'{case} x{copies}'
+    row['backend'] = backend
+    timings = defaultdict(list)
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as work_dir:
+            prepare_case(os.path.join(REPO_DIR, case), work_dir)
+            if copies > 1:
+                synthesize_case(work_dir, copies)
+            with open(os.path.join(work_dir, 'config'), 'a') as file:
+                file.write(f'Solver = {backend}\n')
+            proc = subprocess.run([sys.executable, SCHEDULER, 'config'], cwd=work_dir, capture_output=True, text=True)
+            metrics = read_metrics(os.path.join(work_dir, 'output', 'metrics.txt'))
+        for feature in FEATURES:
+            row[feature] = metrics.get(f'Instance-{feature}', '')
+        if proc.returncode != 0 or 'Objective value' not in metrics:
+            row['status'] = 'ERROR'
+            return row
+        row['status'] = metrics['Result']
+        row['objective'] = round(metrics['Objective value'], 6)
+        timings['solve-seconds'].append(metrics.get('LP-solve-seconds', 0) + metrics.get('ILP-solve-seconds', 0))
+        timings['total-seconds'].append(metrics['Total-seconds'])
+    for key, values in timings.items():
+        row[key] = round(statistics.median(values), 4)
+
+    return row
+
+#################################################################################
+def run_calibration(cases, copies, repeat, file_name):
+    '''
+    Usage: Solve every case and the copies of the first case with every solver backend found, append the results to 
+           the calibration file and print which backend did best on every instance.
+
+    Argument:
+    cases(list): case directories relative to the repository
+    copies(list): numbers of copies of the first case, e.g., [2, 4]
+    repeat(int)
+    file_name(string): calibration file
+    '''
+
+    Available = load_scheduler().detectSolvers()
+    print(f"Solver backends found: {', '.join(Available) if Available else 'none'}")
+    commit = git_commit()
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for case, k in [(case, 1) for case in cases] + [(cases[0], k) for k in copies]:
+        rows = [calibrate_case(case, k, backend, repeat) for backend in Available]
+        for row in rows:
+            row['timestamp'] = timestamp
+            row['commit'] = commit
+        write_results(rows, file_name, CALIBRATION_FIELDS)
+        solved = [row for row in rows if row['status'] == 'Optimal']
+        best = min(solved, key=lambda row: (-row['objective'], row['solve-seconds']))['backend'] if solved else '-'
+        features = ', '.join(f'{feature} {rows[0][feature]}' for feature in FEATURES) if rows else ''
+        print(f"{rows[0]['case'] if rows else case:<28} {features:<60} best {best:<12} "
+              + '  '.join(f"{row['backend']} {row['status']} {row['objective']} {row['solve-seconds']}s" for row in rows))
+
+    return
+
+#################################################################################
+def toy_problem(scheduler, *rows):
+    '''
+    Usage: Build a small problem: maximize x0 + x1 + x2 + x3 over binary variables, subject to rows.
+
+    Argument:
+    scheduler(module): see load_scheduler()
+    rows(list): functions that turn the variables into a constraint, e.g., lambda x: x[0] + x[1] <= 1
+
+    Return variable:
+    problem(pulp)
+    x(list): the variables
+    '''
+
+    pulp = scheduler.pulp
+    problem = pulp.LpProblem('toy', pulp.LpMaximize)
+    x = [pulp.LpVariable(f'x{i}', 0, 1, cat=pulp.LpBinary) for i in range(4)]
+    problem += pulp.lpSum(x)
+    for row in rows:
+        problem += row(x)
+
+    return problem, x
+
+#################################################################################
+def check_presolve(scheduler):
+    '''
+    Usage: Run canonicalize() and reducedCostFixing() of the scheduler on small problems whose answer is known.
+
+    Argument:
+    scheduler(module): see load_scheduler()
+
+    Return variable:
+    checks(list): (name, passed, detail) of every check
+    '''
+
+    pulp = scheduler.pulp
+    Available = scheduler.detectSolvers()
+    solver = pulp.getSolver(scheduler.SolverBackends[next(iter(Available))], msg=False) if Available else None
+    checks = []
+    bounds = lambda x: [(var.lowBound, var.upBound) for var in x]
+
+    # A row that can only hold at one end of its range fixes all of its variables
+    problem, x = toy_problem(scheduler, lambda x: x[0] + x[1] <= 0, lambda x: x[2] + x[3] >= 2)
+    removed, fixedBy = scheduler.canonicalize(problem, {})
+    checks.append(('forcing rows fix their variables', problem.numConstraints() == 0 and bounds(x) == [(0, 0), (0, 0), (1, 1), (1, 1)],
+                   f'bounds {bounds(x)}, {problem.numConstraints()} row(s) left'))
+    # Fixing x1 to 1 turns the second row into x2 + x3 <= 0, which fixes them in the next round
+    problem, x = toy_problem(scheduler, lambda x: x[0] + x[1] >= 2, lambda x: x[1] + x[2] + x[3] <= 1)
+    removed, fixedBy = scheduler.canonicalize(problem, {})
+    checks.append(('fixings propagate', problem.numConstraints() == 0 and bounds(x) == [(1, 1), (1, 1), (0, 0), (0, 0)] and len(fixedBy) == 4,
+                   f'bounds {bounds(x)}, fixed by {fixedBy}'))
+
+    # Dominated set packing rows and looser rows with the same left hand side go, the tightest row stays
+    problem, x = toy_problem(scheduler, lambda x: x[0] + x[1] <= 1, lambda x: x[0] + x[1] + x[2] <= 1, lambda x: x[0] + x[1] + x[2] <= 2)
+    removed, fixedBy = scheduler.canonicalize(problem, {})
+    left = [str(row) for row in problem.constraints.values()]
+    checks.append(('dominated rows are removed', left == ['x0 + x1 + x2 <= 1'] and removed['Other']['dominated'] == 2, f'left {left}'))
+    # A strict subset of an equality row is dominated as well, but the equality itself is kept
+    problem, x = toy_problem(scheduler, lambda x: x[0] + x[1] <= 1, lambda x: x[0] + x[1] + x[2] + x[3] == 1)
+    scheduler.canonicalize(problem, {})
+    left = [str(row) for row in problem.constraints.values()]
+    checks.append(('equality rows are kept', left == ['x0 + x1 + x2 + x3 = 1'], f'left {left}'))
+
+    # Rows that contradict each other stay, so the problem is still infeasible
+    for name, rows in [('contradicting bounds are kept', [lambda x: x[0] >= 1, lambda x: x[0] <= 0]),
+                       ('contradicting equalities are kept', [lambda x: x[0] + x[1] + x[2] == 1, lambda x: x[0] + x[1] + x[2] == 2])]:
+        problem, x = toy_problem(scheduler, *rows)
+        scheduler.canonicalize(problem, {})
+        status = pulp.LpStatus[problem.solve(solver)] if solver else 'no solver'
+        checks.append((name, problem.numConstraints() >= 1 and status == 'Infeasible', f'{problem.numConstraints()} row(s) left, {status}'))
+
+    # Same optimum with and without canonicalize() on a problem where it fixes, merges and removes rows
+    rows = [lambda x: x[0] + x[1] <= 1, lambda x: x[1] + x[2] <= 1, lambda x: x[0] + x[1] + x[2] <= 1, lambda x: x[3] <= 0, lambda x: 2 * x[2] + x[3] <= 2]
+    objectives = []
+    for canonical in [False, True]:
+        problem, x = toy_problem(scheduler, *rows)
+        if canonical:
+            scheduler.canonicalize(problem, {})
+        objectives.append(problem.solve(solver) and pulp.value(problem.objective) if solver else None)
+    checks.append(('same optimum with and without canonicalize()', solver is not None and objectives[0] == objectives[1] == 1, f'objectives {objectives}'))
+
+    # Upper bound 10, incumbent 9, objective in whole points: a variable whose reduced cost is -2 can not be 1 in a schedule
+    # as good as the incumbent, one whose reduced cost is -0.5 can (10 - 0.5 rounds down to 9)
+    X = [[{t: pulp.LpVariable(f'X_0_{d}_{t}', 0, 1, cat=pulp.LpBinary) for t in range(4)} for d in range(5)]]
+    for d in range(5):
+        for var in X[0][d].values():
+            var.varValue = 0
+    X[0][0][3].varValue = 1
+    reducedCosts = {'X_0_0_0': -2, 'X_0_0_1': -0.5, 'X_0_0_2': 0, 'X_0_0_3': -2}
+    CourseInfo = [scheduler.Course(0, -1, -1, [], -1, -1, 50, 1, 0, 0, 0, 2)]
+    CourseInfo[0].courseName = 'toy'
+    fixed, FixedNum = scheduler.reducedCostFixing(X, CourseInfo, reducedCosts, 10, 9, 1)
+    checks.append(('reduced cost fixing keeps the incumbent', [var.name for var in fixed] == ['X_0_0_0'], f'fixed {[var.name for var in fixed]}'))
+
+    return checks
+
+#################################################################################
+def solve_with(case, lines):
+    '''
+    Usage: Solve one case with some config lines changed.
+
+    Argument:
+    case(string): case directory relative to the repository
+    lines(list): config lines appended to the prepared config, e.g., ['Canonicalize = 0']
+
+    Return variable:
+    metrics(dict): metrics.txt of the run, empty if it failed
+    '''
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        prepare_case(os.path.join(REPO_DIR, case), work_dir)
+        with open(os.path.join(work_dir, 'config'), 'a') as file:
+            file.write(''.join(line + '\n' for line in lines))
+        proc = subprocess.run([sys.executable, SCHEDULER, 'config'], cwd=work_dir, capture_output=True, text=True)
+        metrics = read_metrics(os.path.join(work_dir, 'output', 'metrics.txt'))
+
+    return metrics if proc.returncode == 0 else {}
+
+#################################################################################
+def run_self_check(cases, tolerance):
+    '''
+    Usage: Check the presolve steps of the scheduler: known answers on small problems (see check_presolve()), and the
+           same optimum on every case with canonicalize() on and off and with reduced cost fixing and the heuristic
+           start on and off. The heuristic schedule may not beat the optimum.
+
+    Argument:
+    cases(list): case directories relative to the repository
+    tolerance(float): allowed objective difference
+
+    Return variable:
+    passed(bool)
+    '''
+
+    checks = check_presolve(load_scheduler())
+    variants = {'Canonicalize = 0': ['Canonicalize = 0'],
+                'no reduced cost fixing, no heuristic start': ['Reduced-cost-fixing = 0', 'Heuristic-start = 0']}
+    for case in cases:
+        base = solve_with(case, [])
+        if 'Objective value' not in base:
+            checks.append((f'{case}: solved', False, 'the run failed'))
+            continue
+        for name, lines in variants.items():
+            objective = solve_with(case, lines).get('Objective value')
+            checks.append((f'{case}: same optimum with {name}', objective is not None and abs(objective - base['Objective value']) <= tolerance,
+                           f"{objective} vs {base['Objective value']}"))
+        heuristic = base.get('Heuristic-objective', 'none')
+        checks.append((f'{case}: heuristic schedule is not better than the optimum',
+                       heuristic == 'none' or heuristic <= base['Objective value'] + tolerance, f"{heuristic} vs {base['Objective value']}"))
+
+    for name, passed, detail in checks:
+        print(f"{'PASS' if passed else 'FAIL':<6}{name}  ({detail})")
+
+    return all(passed for name, passed, detail in checks)
+
+#################################################################################
+def main():
+    parser = argparse.ArgumentParser(description='Rerun the shipped quarters and compare with the stored outputs.')
+    parser.add_argument('--cases', default=','.join(DEFAULT_CASES), help='comma separated case directories')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per case, timings are medians')
+    parser.add_argument('--tolerance', type=float, default=1e-6, help='allowed objective decrease')
+    parser.add_argument('--results', default=os.path.join(REPO_DIR, 'benchmark-results.csv'), help='results file')
+    parser.add_argument('--catalog-rows', type=int, default=0, help='only time the input check with this many extra CourseInfo rows')
+    parser.add_argument('--calibrate', action='store_true', help='solve every case with every solver backend found')
+    parser.add_argument('--calibrate-copies', default='2', help='comma separated numbers of copies of the first case to calibrate on')
+    parser.add_argument('--calibration', default=os.path.join(REPO_DIR, 'solver-calibration.csv'), help='calibration file')
+    parser.add_argument('--self-check', action='store_true', help='check the presolve steps on small problems and on every case')
+    args = parser.parse_args()
+
+    if args.self_check:
+        if not run_self_check([case.strip() for case in args.cases.split(',')], args.tolerance):
+            sys.exit(1)
+        return
+
+    if args.calibrate:
+        copies = [int(k) for k in args.calibrate_copies.split(',') if k.strip()]
+        run_calibration([case.strip() for case in args.cases.split(',')], copies, args.repeat, args.calibration)
+        return
+
+    if args.catalog_rows > 0:
+        case = args.cases.split(',')[0].strip() if args.cases != ','.join(DEFAULT_CASES) else 'workspace/2-win-2025'
+        seconds = run_catalog_case(case, args.catalog_rows, args.repeat)
+        for run, name in enumerate(['no index', 'indexed']):
+            extra = seconds[args.catalog_rows][run] - seconds[0][run]
+            print(f"{case} ({name}): check {seconds[0][run]:.3f}s, with {args.catalog_rows} extra CourseInfo rows "
+                  f"{seconds[args.catalog_rows][run]:.3f}s ({extra / args.catalog_rows * 1e6:.2f} us per row)")
+        return
+
+    commit = git_commit()
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = []
+    for case in args.cases.split(','):
+        row = run_case(case.strip(), args.repeat, args.tolerance)
+        row['timestamp'] = timestamp
+        row['commit'] = commit
+        rows.append(row)
+
+    write_results(rows, args.results)
+    print_summary(rows)
+
+    if any(row['status'] in ['FAIL', 'ERROR'] for row in rows):
+        sys.exit(1)
+
+#################################################################################
+if __name__ == "__main__":
+    main()
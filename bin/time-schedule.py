@@ -7,15 +7,23 @@ Last Update: Jan 17, 2024
 If you have any questions or need further clarification, please feel free to contact the author at 118010310@link.cuhk.edu.cn
 """
 
-import pdb
 import sys
 import math
 from datetime import datetime, timedelta
 from collections import defaultdict
-import pulp
 import os
 import csv
 import shutil
+import time
+import subprocess
+import tempfile
+import concurrent.futures
+import re
+import mmap
+import heapq
+import fnmatch
+import itertools
+from fractions import Fraction
 
 #################################################################################
 class Course:
@@ -32,7 +40,72 @@ class Course:
         self.largeClass = largeClass #int, either 0 or 1
         self.exempted = exempted #int, either 0 or 1
         self.isTASession = isTASession #int, either 0 or 1
-        self.slotNum = slotNum #int, = ceiling(lengPerSession / 30)
+        self.slotNum = slotNum #int, = ceiling(lengPerSession / slot length), slot length is 30 min by default
+
+#################################################################################
+class CourseSchedule:
+    def __init__(self, courseId, courseName, instructorName, days, startSlot, courseStart, courseEnd, meetBP, meetIP):
+        self.courseId = courseId #int, e.g., 0
+        self.courseName = courseName #string, e.g., '450/550'
+        self.instructorName = instructorName #string, e.g., 'McGarrity' or '-'
+        self.days = days #list of int, e.g., [0,2,4]
+        self.startSlot = startSlot #int, e.g., 12
+        self.courseStart = courseStart #string, e.g., '14:30'
+        self.courseEnd = courseEnd #string, e.g., '15:20'
+        self.meetBP = meetBP #string, 'y', 'n' or '-'
+        self.meetIP = meetIP #string, 'y', 'n' or '-'
+        self.notes = '' #string, written to the Notes column of schedule.csv, e.g., 'violates ConflictCourses: ...'
+
+#################################################################################
+class Room:
+    def __init__(self, name, capacity, large):
+        self.name = name #string, e.g., 'SAV-130'
+        self.capacity = capacity #int, e.g., 120. Only read: course sizes are not in CourseInfo
+        self.large = large #int, either 0 or 1. 1 means large classes can be taught in this room
+
+#################################################################################
+class PoolTA:
+    def __init__(self, name, maxSections, windows):
+        self.name = name #string, e.g., 'Alice'
+        self.maxSections = maxSections #int, e.g., 2
+        self.windows = windows #list of (days, first slot, last slot) when the TA can teach, e.g., [([1, 3], 0, 7)]
+
+#################################################################################
+class PrefWindow:
+    def __init__(self, days, startSlot, endSlot, weight):
+        self.days = days #list of int, e.g., [0, 2]
+        self.startSlot = startSlot #int, first slot of the window, e.g., 0
+        self.endSlot = endSlot #int, last slot of the window, e.g., 7
+        self.weight = weight #float, e.g., 1 for a preferred window and 0.3 for a weakly preferred one. None if the instructor can never teach then.
+
+#################################################################################
+class CourseCatalog:
+    def __init__(self):
+        self.Name2Id = {} #dict, maps a normalized full course name or the name before the slash to a course id, e.g., {'450/550': 3, '450': 3}
+        self.Alias2Id = {} #dict, maps every part of a cross-listed course name to a course id, e.g., {'450': 3, '550': 3}
+
+#################################################################################
+class InputError(Exception):
+    pass #raised for an error in the config file or an input file, e.g., a malformed time or an unknown day
+
+# In --check mode, errors in the input files are collected here instead of ending the program, see inputError()
+InputErrors = None
+
+#################################################################################
+def inputError(message):
+    '''
+    Usage: report an error in the config file or an input file. In a normal run, the program exits with the message.
+           In --check mode, the message is collected and reading goes on, so that all errors are reported at once.
+
+    Argument:
+    message(string): e.g., "Days should be 'MTWRF'. Please modify line 3 of InsPref file."
+    '''
+
+    if (InputErrors is None):
+        sys.exit(message)
+    InputErrors.append(message)
+
+    return
 
 #################################################################################
 def time_transfer(time_string, filename, line_number):
@@ -51,18 +124,19 @@ def time_transfer(time_string, filename, line_number):
     try:
         time = datetime.strptime(time_string, '%H:%M')
     except:
-        sys.exit(f"Wrong time format. Time can not be '{time_string}' in {filename} file line {line_number}.")
+        raise InputError(f"Wrong time format. Time can not be '{time_string}' in {filename} file line {line_number}.")
 
     return time 
 
 #################################################################################
-def timeSlotName2Id(start, timeSlotName):
+def timeSlotName2Id(start, timeSlotName, slotLength):
     '''
     Usage: This function transfer time from datetime object to slotid
 
     Argument:
     start(datetime): A datetime object corresponding to instructional day starting time, e.g., datetime.datetime(1900, 1, 1, 8, 30)
     timeSlotName(datetime): A datetime object corresponding to a time you want to convert to slot id
+    slotLength(int): length of a slot in minutes, e.g., 30
 
     Return variable: 
     id(float): The corresponding slot id, e.g., 0,0. 
@@ -70,24 +144,25 @@ def timeSlotName2Id(start, timeSlotName):
     Note: output is a float number. Depending on usage, you need to choose whether to ceiling or floor it. 
     '''
 
-    id = (timeSlotName - start).total_seconds() / 60 / 30
+    id = (timeSlotName - start).total_seconds() / 60 / slotLength
 
     return id
 
 #################################################################################
-def timeSlotId2ISlot(start, timeSlotId):
+def timeSlotId2ISlot(start, timeSlotId, slotLength):
     '''
     Usage: This function transfer time from slotId to string in "%H:%M" format
 
     Argument:
     start(datetime): A datetime object corresponding to instructional day starting time, e.g., datetime.datetime(1900, 1, 1, 8, 30)
     timeSlotId(int): A time slot, e.g., 12
+    slotLength(int): length of a slot in minutes, e.g., 30
 
     Return variable: 
     name(string): The corresponding time in "%H:%M" format, e.g., '14:30'
     '''
 
-    name = start + timedelta(minutes=timeSlotId * 30)
+    name = start + timedelta(minutes=timeSlotId * slotLength)
 
     return name.strftime('%H:%M')
 
@@ -109,7 +184,7 @@ def days2listint(days, filename, line_number):
     day_mapping = {'m': 0, 't': 1, 'w': 2, 'r': 3, 'f': 4}
     for day in days:
         if (day not in day_mapping):
-            sys.exit(f"Days should be 'MTWRF'. Please modify line {line_number} of {filename} file.")
+            raise InputError(f"Days should be 'MTWRF'. Please modify line {line_number} of {filename} file.")
         else:
             day_list.append(day_mapping[day])
 
@@ -151,35 +226,61 @@ def check_config(config):
     
     for i in parameter:
         if i not in config:
-            sys.exit(f'{i} not in config file. Please modify.')
+            inputError(f'{i} not in config file. Please modify.')
+
+    # Parameters that older config files do not have. If they are missing, use the default value.
+    optional_parameter = {'Slot-length-in-minutes': '30', 'Start-time-step-in-minutes': '30', 'Rooms': '-', 'Room-cut-iterations': '10',\
+        'Enrollment': '-', 'Enrollment-hard-conflict-threshold': '0', 'Enrollment-soft-conflict-cutoff': '1', 'Enrollment-conflict-penalty': '0.01',\
+        'Price-time-budget-in-seconds': '300', 'Price-workers': '0', 'ReferenceSchedule': '-', 'Stability-weight': '1',\
+        'Max-moved-courses': '-1', 'CourseInfo-index-min-bytes': '1048576', 'Alternatives': '3', 'Alternative-gap-percentage': '-1',\
+        'Alternative-min-moved-courses': '1', 'Alternative-time-budget-in-seconds': '300', 'Alternative-workers': '0', 'TAPool': '-',\
+        'Placeholder-instructors': 'TA[0-9]* TBA guest[0-9]*', 'TA-cut-iterations': '10', 'Lazy-constraints': '0',
+        'Reduced-cost-fixing': '1', 'Heuristic-start': '1', 'Elastic': '0', 'Elastic-penalty': '1000', 'Canonicalize': '1',
+        'Same-day-weight': '0.25', 'Solver': 'auto', 'Solver-calibration': '-'}
+    for key, value in optional_parameter.items():
+        if key not in config:
+            config[key] = value
             
     return
 
 #################################################################################
-def convert_key_type(start_time, config):
+def convert_key_type(start_time, slotLength, config):
     '''
     Usage: Convert some keys from string to appropriate data types(int, float, list...).
     
     Argument:
     start_time(datetime): A datetime object corresponding to instructional day starting time. e.g., datetime.datetime(1900, 1, 1, 8, 30)
+    slotLength(int): length of a slot in minutes, e.g., 30
     config(dict) {modified}: A dictionary that stores all the parameter we get from config file.
     '''
 
     # Define keys that should be treated as floats, integers, or list
-    float_keys = ["RulePercentage", "Penalty-for-violating-block-policy", "UWPolicyWeight", "InstructorPrefWeight"]
-    int_keys = ["UseDefaultPath", "Must-follow-block-policy" ,"Treat-same-day-preference-as-hard-constraint", "Assume-same-day-if-not-specified"]
+    float_keys = ["RulePercentage", "Penalty-for-violating-block-policy", "UWPolicyWeight", "InstructorPrefWeight", "Enrollment-conflict-penalty",\
+        "Price-time-budget-in-seconds", "Stability-weight", "Alternative-gap-percentage", "Alternative-time-budget-in-seconds",\
+        "Elastic-penalty", "Same-day-weight"]
+    int_keys = ["UseDefaultPath", "Must-follow-block-policy" ,"Treat-same-day-preference-as-hard-constraint", "Assume-same-day-if-not-specified",\
+        "Slot-length-in-minutes", "Start-time-step-in-minutes", "Room-cut-iterations", "Enrollment-hard-conflict-threshold", "Enrollment-soft-conflict-cutoff",\
+        "Price-workers", "Max-moved-courses", "CourseInfo-index-min-bytes", "Alternatives", "Alternative-min-moved-courses", "Alternative-workers",\
+        "TA-cut-iterations", "Lazy-constraints", "Reduced-cost-fixing", "Heuristic-start", "Elastic", "Canonicalize"]
     list_keys = ["50-min-class-start-time", "80-min-class-start-time", "110-min-class-start-time", "170-min-class-start-time"]
 
     # Convert values to the appropriate data types
     for key, value in config.items():
-        if key in float_keys:
-            config[key] = float(value)
-        elif key in int_keys:
-            config[key] = int(value)
-        elif key in list_keys:
+        try:
+            if key in float_keys:
+                config[key] = float(value)
+            elif key in int_keys:
+                config[key] = int(value)
+        except ValueError:
+            inputError(f"{key} can not be '{value}' in config file. It should be a number.")
+        if key in list_keys:
             new_list = []
             for timeName in value.split():
-                slot = timeSlotName2Id(start_time, time_transfer(timeName, "config", -1)) 
+                try:
+                    slot = timeSlotName2Id(start_time, time_transfer(timeName, "config", -1), slotLength)
+                except InputError as e:
+                    inputError(f"{e} ({key})")
+                    continue
                 slotId = math.floor(slot) # slot can be an float num, we take the floor value
                 new_list.append(slotId)
             config[key] = new_list
@@ -226,6 +327,8 @@ def copyfiles(config):
     shutil.copy2(CourseInfo_dir, output_dir)
     shutil.copy2(InstructorPref_dir, output_dir)
     shutil.copy2(CourseInstructor_dir, output_dir)
+    if (config['Rooms'] != '-'):
+        shutil.copy2(config['Rooms'], output_dir)
 
     return
 
@@ -258,30 +361,52 @@ def read_config(file_name):
             try:
                 key, value = line.strip().split("=")
             except:
-                sys.exit("Incorrect config file format. Please have a '=' between variable name and value.")
+                inputError(f"Incorrect config file format. Please have a '=' between variable name and value. ({line.strip()})")
+                continue
             key = key.strip()
             value = value.strip().strip('"')
             # Store the values in the dictionary
             config[key] = value
 
     check_config(config) #Check if config file has all the parameters. If not, exits with an error message. 
+    if (InputErrors):
+        raise InputError("Config file has errors, so the other input files are not checked.")
+    try:
+        slotLength = int(config['Slot-length-in-minutes']) #A slot is 30 min by default
+        stepLength = int(config['Start-time-step-in-minutes'])
+    except ValueError:
+        raise InputError("Slot-length-in-minutes and Start-time-step-in-minutes should be integers. Please modify config file.")
+    # The 10% rule counts courses in 30 min cells, so a slot must divide 30 min. Candidate start times are whole slots.
+    if (slotLength <= 0 or 30 % slotLength != 0):
+        raise InputError("Slot-length-in-minutes should divide 30, e.g., 5, 10, 15 or 30. Please modify config file.")
+    if (stepLength <= 0 or stepLength % slotLength != 0):
+        raise InputError("Start-time-step-in-minutes should be a multiple of Slot-length-in-minutes. Please modify config file.")
     start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
     total_day_time = time_transfer(config['InstructDayEndsAt'], "config", -1) - start_time
-    SlotNumPerday = math.ceil(total_day_time.total_seconds()/60/30) #A slot is 30 min
+    SlotNumPerday = math.ceil(total_day_time.total_seconds()/60/slotLength)
 
-    convert_key_type(start_time, config) #Convert keys to appropriate data type.
+    convert_key_type(start_time, slotLength, config) #Convert keys to appropriate data type.
+    time_transfer(config['Class-default-end-time'], "config", -1) #Only check the format, it is used by CourseInfoFromCI()
     bstart = time_transfer(config['BlockSchedulingStartsAt'], "config", -1)
-    config['BlockSchedulingStartsAtid'] = math.floor(timeSlotName2Id(start_time, bstart))
+    config['BlockSchedulingStartsAtid'] = math.floor(timeSlotName2Id(start_time, bstart, slotLength))
     bend = time_transfer(config['BlockSchedulingEndsAt'], "config", -1)
-    config['BlockSchedulingEndsAtid'] = math.floor(timeSlotName2Id(start_time, bend - timedelta(hours=0, minutes=1)))
+    config['BlockSchedulingEndsAtid'] = math.floor(timeSlotName2Id(start_time, bend - timedelta(hours=0, minutes=1), slotLength))
     tstart =  time_transfer(config['10PercRuleStartsAt'], "config", -1)
-    config['10PercRuleStartsAtid'] = math.floor(timeSlotName2Id(start_time, tstart))
+    config['10PercRuleStartsAtid'] = math.floor(timeSlotName2Id(start_time, tstart, slotLength))
     tend = time_transfer(config['10PercRuleEndsAt'], "config", -1)
-    config['10PercRuleEndsAtid'] = math.floor(timeSlotName2Id(start_time, tend))
+    config['10PercRuleEndsAtid'] = math.floor(timeSlotName2Id(start_time, tend, slotLength))
     config['SlotNumPerday'] = SlotNumPerday
+    config['SlotsPerRuleCell'] = 30 // slotLength # the 10% rule counts courses in 30 min cells
+    if (config['Solver'] != 'auto' and config['Solver'] not in SolverBackends):
+        inputError(f"Solver can not be '{config['Solver']}' in config file. It should be auto or one of {', '.join(SolverBackends)}.")
+    # Every elastic constraint must be in the problem from the start to get its slack variables
+    if (config['Elastic'] == 1 and config['Lazy-constraints'] == 1):
+        print("Warning: Lazy-constraints is ignored since Elastic is 1", file=sys.stderr)
+        config['Lazy-constraints'] = 0
+    if (InputErrors):
+        raise InputError("Config file has errors, so the other input files are not checked.")
 
     useDefaultPath(config)
-    copyfiles(config)
 
     return config
 
@@ -344,6 +469,62 @@ def defineID(instructor_name, course_name_before_slash, InstructorName2Id, Instr
 
     return instructor_id, course_id
 
+#################################################################################
+def normalizeCourseName(course_name):
+    '''
+    Usage: Course names are matched case-insensitively and without the spaces around the slash, e.g., '432 / 532A' -> '432/532a'
+    '''
+
+    name = course_name.strip().lower()
+    if ('/' not in name):
+        return name
+    return '/'.join(part.strip() for part in name.split('/'))
+
+#################################################################################
+def addToCatalog(catalog, course_name, course_id):
+    '''
+    Usage: Index a course under its full name, the name before the slash and every cross-listed part of its name.
+           If two courses share a name, the first one keeps it.
+
+    Argument:
+    catalog(CourseCatalog) {modified}
+    course_name(string): e.g., '432/532'
+    course_id(int): e.g., 3
+    '''
+
+    name = normalizeCourseName(course_name)
+    parts = name.split('/')
+    catalog.Name2Id.setdefault(name, course_id)
+    catalog.Name2Id.setdefault(parts[0], course_id)
+    for part in parts:
+        catalog.Alias2Id.setdefault(part, course_id)
+
+    return
+
+#################################################################################
+def findInCatalog(catalog, course_name):
+    '''
+    Usage: Look up a course name read from an input file. The full name is tried first, then every part of a 
+           cross-listed name, so '432/532', '432' and '532' all find the course listed as 432/532 this quarter.
+
+    Argument:
+    catalog(CourseCatalog)
+    course_name(string): e.g., '532'
+
+    Return variable:
+    course_id(int): -1 if the course is not taught this quarter
+    '''
+
+    name = normalizeCourseName(course_name)
+    course_id = catalog.Name2Id.get(name, -1)
+    if (course_id == -1):
+        for part in name.split('/'):
+            course_id = catalog.Alias2Id.get(part, -1)
+            if (course_id != -1):
+                break
+
+    return course_id
+
 #################################################################################
 def CourseInfoFromCTQ(information, config, Instructor2Courses, CourseInfo):
     '''
@@ -365,16 +546,26 @@ def CourseInfoFromCTQ(information, config, Instructor2Courses, CourseInfo):
         cur_course.instructorId = instructor_id
         start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
 
+        # Each field is checked on its own, so that --check reports all the errors in a line
         if (must_on_days != '-'):
-            cur_course.mustOnDays = days2listint(must_on_days, "CourseThisQuarter", line_number) 
+            try:
+                cur_course.mustOnDays = days2listint(must_on_days, "CourseThisQuarter", line_number) 
+            except InputError as e:
+                inputError(str(e))
 
         if (must_start_time != '-'):
-            mstart = time_transfer(must_start_time, "CTQ", line_number)
-            cur_course.mustStartSlot = math.floor(timeSlotName2Id(start_time, mstart))
+            try:
+                mstart = time_transfer(must_start_time, "CTQ", line_number)
+                cur_course.mustStartSlot = math.floor(timeSlotName2Id(start_time, mstart, config['Slot-length-in-minutes']))
+            except InputError as e:
+                inputError(str(e))
 
         if (must_end_time != '-'):
-            mend = time_transfer(must_end_time, "CourseThisQuarter", line_number)
-            cur_course.mustEndSlot = math.floor(timeSlotName2Id(start_time, mend - timedelta(hours=0, minutes=1)))
+            try:
+                mend = time_transfer(must_end_time, "CourseThisQuarter", line_number)
+                cur_course.mustEndSlot = math.floor(timeSlotName2Id(start_time, mend - timedelta(hours=0, minutes=1), config['Slot-length-in-minutes']))
+            except InputError as e:
+                inputError(str(e))
 
     return
 
@@ -400,7 +591,7 @@ def readCTQline(values, TotalCourseNum, line_number):
     
     # Check the length of values, if not 5 or 8, exit
     if (len(values) != 5 and len(values) != 8):
-        sys.exit(f"Warning: Incorrect CoursesThisQuarter format for line {line_number}. Each row should have 5 or 8 columns.")
+        raise InputError(f"Warning: Incorrect CoursesThisQuarter format for line {line_number}. Each row should have 5 or 8 columns.")
 
     # Extract course name and instructor name
     course_name = values[0]
@@ -432,6 +623,7 @@ def read_courseInstructor(file_name, config):
         Instructor2Courses(dict): stores the course(s) that an instructor teaches.
         CourseInfo(list): CourseInfo[courseId] is a Course class that stores course information we read from CourseInfo and CourseThisQuarter.
         TotalCourseNum(int): Total number of courses, including regular sessions and TA sessions.
+        Catalog(CourseCatalog): indexes this quarter's courses by normalized name and cross-listed aliases, see findInCatalog().
     ]
 
     Format for courseInstructor file:
@@ -452,8 +644,6 @@ def read_courseInstructor(file_name, config):
     InstructorName2Id = {}
     InstructorId2Name = []
 
-    # Course: courseId, courseName, instructorId, mustOnDays, mustStartSlot, mustEndSlot, lengPerSession, sessionsPerWeek, largeClass, exempted, isTASession, slotNum
-    CourseInfo = [Course(-1, -1, -1, [], -1, -1, -1, -1, -1, -1, -1, -1) for _ in range(100)]
     Instructor2Courses = defaultdict(list)
     TotalCourseNum = 0
     line_number = 0
@@ -477,7 +667,11 @@ def read_courseInstructor(file_name, config):
                         continue
 
                     # In csv file, the last field is ignored since it is for commenting use only
-                    course_name, course_name_before_slash, instructor_name, must_on_days, must_start_time, must_end_time, TotalCourseNum = readCTQline(values[:-1], TotalCourseNum, line_number)
+                    try:
+                        course_name, course_name_before_slash, instructor_name, must_on_days, must_start_time, must_end_time, TotalCourseNum = readCTQline(values[:-1], TotalCourseNum, line_number)
+                    except InputError as e:
+                        inputError(str(e))
+                        continue
                     instructor_id, course_id = defineID(instructor_name, course_name_before_slash, InstructorName2Id, InstructorId2Name, CourseName2Id, CourseId2Name)
     
                     information.append([instructor_id, course_id, course_name, must_on_days, must_start_time, must_end_time, line_number])
@@ -495,25 +689,35 @@ def read_courseInstructor(file_name, config):
                 # Split each line into its components
                 values = line.strip().split()
 
-                course_name, course_name_before_slash, instructor_name, must_on_days, must_start_time, must_end_time, TotalCourseNum = readCTQline(values, TotalCourseNum, line_number)
+                try:
+                    course_name, course_name_before_slash, instructor_name, must_on_days, must_start_time, must_end_time, TotalCourseNum = readCTQline(values, TotalCourseNum, line_number)
+                except InputError as e:
+                    inputError(str(e))
+                    continue
                 instructor_id, course_id = defineID(instructor_name, course_name_before_slash, InstructorName2Id, InstructorId2Name, CourseName2Id, CourseId2Name)
                 information.append([instructor_id, course_id, course_name, must_on_days, must_start_time, must_end_time, line_number])
                 
+    # Course: courseId, courseName, instructorId, mustOnDays, mustStartSlot, mustEndSlot, lengPerSession, sessionsPerWeek, largeClass, exempted, isTASession, slotNum
+    CourseInfo = [Course(-1, -1, -1, [], -1, -1, -1, -1, -1, -1, -1, -1) for _ in range(TotalCourseNum)]
     CourseInfoFromCTQ(information, config, Instructor2Courses, CourseInfo)
-    course_instructor = [CourseName2Id, CourseId2Name, InstructorName2Id, InstructorId2Name, Instructor2Courses, CourseInfo, TotalCourseNum]
+
+    Catalog = CourseCatalog()
+    for course_id in range(TotalCourseNum):
+        addToCatalog(Catalog, CourseInfo[course_id].courseName, course_id)
+    course_instructor = [CourseName2Id, CourseId2Name, InstructorName2Id, InstructorId2Name, Instructor2Courses, CourseInfo, TotalCourseNum, Catalog]
 
     return course_instructor
 
 #################################################################################
-def CourseInfoFromCI(information, config, CourseName2Id, CourseInfo):
+def CourseInfoFromCI(information, config, CourseInfo):
     '''
-    Usage: Update course information read from CourseInfo file.
+    Usage: Update course information read from CourseInfo file. The first row of a course is used. A later row with 
+           the same name is reported; a later row under another cross-listed name (e.g., 532 after 432/532) is skipped.
 
     Argument:
     information(list): information is a list that stores information for courses read from courseInfo file,
-                        we will use it to update "courseInfo", e.g., information[0] = ['200', '200', 50, 3, 1, 0, 0, '-', '-', '-', 4]
+                        we will use it to update "courseInfo", e.g., information[0] = ['200', 0, 50, 3, 1, 0, 0, '-', '-', '-', 4]
     config(dict)
-    CourseName2Id(dict)
     CourseInfo(list) {modified}
 
     Return variable: 
@@ -521,68 +725,71 @@ def CourseInfoFromCI(information, config, CourseName2Id, CourseInfo):
     TotalNonExemptedHours(float): total number of non-ExemptedHours
     '''
 
-    TotalC = []
+    TotalC = {} # maps a course id to the normalized name of the row it was read from
     TotalNonExemptedHours = 0
-    NonExemptedC = []
+    NonExemptedC = set()
+    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
 
-    for course_name, course_name_before_slash, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
+    for course_name, course_id, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
         is_a_TA_session, mustOnDays, mustStartTime, mustEndTime, line_number in information:
 
-        if (CourseName2Id[course_name_before_slash.lower()] in TotalC):
-            print(f'Warning: {course_name} appears multiple times in courseInfo', file=sys.stderr)
+        if (course_id in TotalC):
+            if (TotalC[course_id] == normalizeCourseName(course_name)):
+                print(f'Warning: {course_name} appears multiple times in courseInfo', file=sys.stderr)
             continue
         
-        TotalC.append(CourseName2Id[course_name_before_slash.lower()])
-        cur_course = CourseInfo[CourseName2Id[course_name_before_slash.lower()]]
-        start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
+        TotalC[course_id] = normalizeCourseName(course_name)
+        cur_course = CourseInfo[course_id]
 
         cur_course.lengPerSession = length_per_session
         cur_course.sessionsPerWeek = num_sessions_per_week
         cur_course.largeClass = large_class
         cur_course.exempted = ten_percent_rule_exempted
         cur_course.isTASession = is_a_TA_session
-        cur_course.slotNum = math.ceil(length_per_session / 30)
+        cur_course.slotNum = math.ceil(length_per_session / config['Slot-length-in-minutes'])
     
-        if (ten_percent_rule_exempted == 0 and CourseName2Id[course_name_before_slash.lower()] not in NonExemptedC): # if a course is not exempted
-            NonExemptedC.append(CourseName2Id[course_name_before_slash.lower()])
-            TotalNonExemptedHours += cur_course.slotNum * num_sessions_per_week / 2
-
-        # For mustOnDays,  mustStartTime, mustEndTime, do the intersection
-        if (mustOnDays != '-'):
-            mustOnDays_intersection = set(cur_course.mustOnDays) & set(days2listint(mustOnDays, "courseInfo", line_number))
-            cur_course.mustOnDays = list(mustOnDays_intersection)
-            if len(cur_course.mustOnDays) < num_sessions_per_week:
-                sys.exit(f"MustDays for {cur_course.courseName} should not be less than session per week.\
-                        Please check courseInfo and courseThisQuarter files")
-
-        if (mustStartTime != '-'):
-            mstart = time_transfer(mustStartTime, "courseInfo", line_number)
-            mstartslot = math.floor(timeSlotName2Id(start_time, mstart))
-            cur_course.mustStartSlot = max(cur_course.mustStartSlot, mstartslot) 
+        if (ten_percent_rule_exempted == 0): # if a course is not exempted
+            NonExemptedC.add(course_id)
+            # The 10% rule counts hours in 30 min cells, whatever the slot length is
+            TotalNonExemptedHours += math.ceil(length_per_session / 30) * num_sessions_per_week / 2
+
+        try:
+            # For mustOnDays,  mustStartTime, mustEndTime, do the intersection
+            if (mustOnDays != '-'):
+                mustOnDays_intersection = set(cur_course.mustOnDays) & set(days2listint(mustOnDays, "courseInfo", line_number))
+                cur_course.mustOnDays = list(mustOnDays_intersection)
+                if len(cur_course.mustOnDays) < num_sessions_per_week:
+                    raise InputError(f"MustDays for {cur_course.courseName} should not be less than session per week.\
+                            Please check courseInfo and courseThisQuarter files")
+
+            if (mustStartTime != '-'):
+                mstart = time_transfer(mustStartTime, "courseInfo", line_number)
+                mstartslot = math.floor(timeSlotName2Id(start_time, mstart, config['Slot-length-in-minutes']))
+                cur_course.mustStartSlot = max(cur_course.mustStartSlot, mstartslot) 
         
-        if (mustEndTime != '-'):
-            mend = time_transfer(mustEndTime, "courseInfo", line_number)
-            mendslot = math.floor(timeSlotName2Id(start_time, mend - timedelta(hours=0, minutes=1)))
-            # If both files have an end time, take the earlier one
-            if (cur_course.mustEndSlot != -1):
-                cur_course.mustEndSlot = min(cur_course.mustEndSlot, mendslot) 
-            # If only courseInfo file have an end time, take it
-            else:
-                cur_course.mustEndSlot = mendslot
+            if (mustEndTime != '-'):
+                mend = time_transfer(mustEndTime, "courseInfo", line_number)
+                mendslot = math.floor(timeSlotName2Id(start_time, mend - timedelta(hours=0, minutes=1), config['Slot-length-in-minutes']))
+                # If both files have an end time, take the earlier one
+                if (cur_course.mustEndSlot != -1):
+                    cur_course.mustEndSlot = min(cur_course.mustEndSlot, mendslot) 
+                # If only courseInfo file have an end time, take it
+                else:
+                    cur_course.mustEndSlot = mendslot
 
-        # If end time is not specified in any file. By default, class will end by config['Class-default-end-time'])
-        elif (cur_course.mustEndSlot == -1 and mustEndTime == '-'):
-            mend = time_transfer(config['Class-default-end-time'], "config", -1)
-            cur_course.mustEndSlot = math.floor(timeSlotName2Id(start_time, mend - timedelta(hours=0, minutes=1)))
+            # If end time is not specified in any file. By default, class will end by config['Class-default-end-time'])
+            elif (cur_course.mustEndSlot == -1 and mustEndTime == '-'):
+                mend = time_transfer(config['Class-default-end-time'], "config", -1)
+                cur_course.mustEndSlot = math.floor(timeSlotName2Id(start_time, mend - timedelta(hours=0, minutes=1), config['Slot-length-in-minutes']))
         
-        duration = cur_course.mustEndSlot - cur_course.mustStartSlot + 1
-        if (duration < cur_course.slotNum):
-            sys.exit(f"End time minus start time for LING {cur_course.courseName} should be larger than course length.\
-                    Please check courseInfo and courseThisQuarter files.")
+            duration = cur_course.mustEndSlot - cur_course.mustStartSlot + 1
+            if (duration < cur_course.slotNum):
+                raise InputError(f"End time minus start time for LING {cur_course.courseName} should be larger than course length.\
+                        Please check courseInfo and courseThisQuarter files.")
+        except InputError as e:
+            inputError(str(e))
     
-    NonExemptedC.sort()
-
-    return NonExemptedC, TotalNonExemptedHours
+    return sorted(NonExemptedC), TotalNonExemptedHours
 
 #################################################################################
 def readCIline(values, course_instructor, line_number):
@@ -596,7 +803,7 @@ def readCIline(values, course_instructor, line_number):
 
     Return variable: 
     course_name(string)
-    course_name_before_slash(string)
+    course_id(int)
     length_per_session(int)
     num_sessions_per_week(int)
     large_class(int)
@@ -608,27 +815,201 @@ def readCIline(values, course_instructor, line_number):
     '''
 
     if (len(values) != 9):
-        sys.exit(f"Warning: Incorrect CoursesInfo format for line {line_number}. Each row should have 9 columns.")
+        raise InputError(f"Warning: Incorrect CoursesInfo format for line {line_number}. Each row should have 9 columns.")
 
     course_name = values[0]
-    course_name_before_slash = course_name.split('/')[0]
+    course_id = findInCatalog(course_instructor[7], course_name)
     
     #If the course is not taught this quarter, skip the line.
-    if (course_name_before_slash.lower() not in course_instructor[0]):
+    if (course_id == -1):
         return -1, -1, -1, -1, -1, -1, -1, -1, -1, -1
 
-    length_per_session = int(values[1])
-    num_sessions_per_week = int(values[2])
-    large_class = int(values[3])
-    ten_percent_rule_exempted = int(values[4])
-    is_a_TA_session = int(values[5])
+    try:
+        length_per_session = int(values[1])
+        num_sessions_per_week = int(values[2])
+        large_class = int(values[3])
+        ten_percent_rule_exempted = int(values[4])
+        is_a_TA_session = int(values[5])
+    except ValueError:
+        raise InputError(f"Columns 2 to 6 should be integers. Please modify line {line_number} of CourseInfo file.")
     mustOnDays = values[6].lower()
     mustStartTime = values[7]
     mustEndTime = values[8]
 
-    return course_name, course_name_before_slash, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
+    return course_name, course_id, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
         is_a_TA_session, mustOnDays, mustStartTime, mustEndTime
 
+#################################################################################
+def courseInfoRowName(line, is_csv, line_number):
+    '''
+    Usage: Return the course name of a CourseInfo line the way read_courseInfo() reads it, or None if the line is skipped
+           (header, empty line or comment).
+
+    Argument:
+    line(string): a line of the CourseInfo file
+    is_csv(bool)
+    line_number(int)
+    '''
+
+    if is_csv:
+        values = next(csv.reader([line]), [])
+        if (line_number == 1 or not values or not values[0]):
+            return None
+        return values[0]
+
+    if not line.strip() or line.startswith("#"):
+        return None
+    values = line.strip().split('#')[0].split()
+    return values[0] if values else None
+
+#################################################################################
+def buildCourseInfoIndex(file_name, index_name):
+    '''
+    Usage: Read the whole CourseInfo file once and write an index file that maps every normalized course name and every part 
+           of a cross-listed name to the byte offset and line number of its rows. The first line records the size and the 
+           modification time of the CourseInfo file, so a changed file gets a new index.
+
+    Argument:
+    file_name(string): e.g., './CourseInfo'
+    index_name(string): e.g., './CourseInfo.idx'
+
+    Format for index file (sorted by name, so that a name can be found by binary search):
+    ###
+    # CourseInfo index 2097152 1718000000000000000
+    432	5120	88
+    432/532	5120	88
+    532	5120	88
+    ###
+    '''
+
+    stat = os.stat(file_name)
+    is_csv = file_name.endswith('.csv')
+    entries = []
+    offset = 0
+    line_number = 0
+    with open(file_name, 'rb') as file:
+        for raw in file:
+            line_number += 1
+            name = courseInfoRowName(raw.decode(errors='replace').rstrip('\r\n'), is_csv, line_number)
+            if (name is not None):
+                name = normalizeCourseName(name)
+                for key in {name, *name.split('/')}:
+                    entries.append((key.encode(), offset, line_number))
+            offset += len(raw)
+    entries.sort()
+
+    # Write to a temporary file first, so that an interrupted run never leaves half an index
+    temp_name = index_name + '.tmp'
+    with open(temp_name, 'wb') as file:
+        file.write(f'# CourseInfo index {stat.st_size} {stat.st_mtime_ns}\n'.encode())
+        file.writelines(b'%s\t%d\t%d\n' % entry for entry in entries)
+    os.replace(temp_name, index_name)
+
+    return
+
+#################################################################################
+def openCourseInfoIndex(file_name, build):
+    '''
+    Usage: Memory-map the index file of a CourseInfo file. If build is true, the index file is (re)built first if it 
+           is missing or if the CourseInfo file changed since it was built.
+
+    Argument:
+    file_name(string): e.g., './CourseInfo'
+    build(bool): False in --check mode, which writes no file and only uses an index file that is already up to date
+
+    Return variable:
+    index(mmap): None if there is no valid index file and build is false, or if the index file can not be written, 
+                 e.g., in a read-only directory
+    '''
+
+    index_name = file_name + '.idx'
+    stat = os.stat(file_name)
+    header = f'# CourseInfo index {stat.st_size} {stat.st_mtime_ns}\n'.encode()
+    try:
+        with open(index_name, 'rb') as file:
+            valid = file.readline() == header
+    except OSError:
+        valid = False
+
+    if not (valid or build):
+        return None
+
+    try:
+        if not valid:
+            buildCourseInfoIndex(file_name, index_name)
+        with open(index_name, 'rb') as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError as e:
+        print(f'Warning: can not use {index_name} ({e}), reading the whole CourseInfo file', file=sys.stderr)
+        return None
+
+#################################################################################
+def indexLookup(index, key):
+    '''
+    Usage: Binary search the index file for a normalized course name.
+
+    Argument:
+    index(mmap): generated by openCourseInfoIndex()
+    key(string): e.g., '532'
+
+    Return variable:
+    rows(list): (byte offset, line number) of every CourseInfo row listed under the name, e.g., [(5120, 88)]
+    '''
+
+    key = key.encode()
+    lo = index.find(b'\n') + 1
+    hi = len(index)
+    # lo and hi are always at the start of a line. Find the first line whose name is not smaller than key.
+    while (lo < hi):
+        start = index.rfind(b'\n', 0, (lo + hi) // 2) + 1
+        if (index[start:index.find(b'\t', start)] < key):
+            lo = index.find(b'\n', start) + 1
+        else:
+            hi = start
+
+    rows = []
+    while (lo < len(index)):
+        end = index.find(b'\n', lo)
+        name, offset, line_number = index[lo:end].split(b'\t')
+        if (name != key):
+            break
+        rows.append((int(offset), int(line_number)))
+        lo = end + 1
+
+    return rows
+
+#################################################################################
+def indexedCIrows(file_name, index, course_instructor):
+    '''
+    Usage: Read only the CourseInfo rows whose name can match a course taught this quarter, in the order of the file.
+
+    Argument:
+    file_name(string): e.g., './CourseInfo'
+    index(mmap): generated by openCourseInfoIndex()
+    course_instructor(list)
+
+    Return variable:
+    rows(list): (values, line number) of every row, e.g., [(['200', '50', '3', '1', '0', '0', '-', '-', '-'], 12)]
+    '''
+
+    Catalog = course_instructor[7]
+    is_csv = file_name.endswith('.csv')
+    offsets = set()
+    for key in Catalog.Name2Id.keys() | Catalog.Alias2Id.keys():
+        offsets.update(indexLookup(index, key))
+
+    rows = []
+    with open(file_name, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as catalog:
+        for offset, line_number in sorted(offsets):
+            end = catalog.find(b'\n', offset)
+            line = catalog[offset:end if end != -1 else len(catalog)].decode().rstrip('\r\n')
+            if is_csv:
+                rows.append((next(csv.reader([line]))[:-1], line_number))
+            else:
+                rows.append((line.strip().split('#')[0].split(), line_number))
+
+    return rows
+
 #################################################################################
 def read_courseInfo(file_name, course_instructor, config):
     '''
@@ -643,6 +1024,11 @@ def read_courseInfo(file_name, course_instructor, config):
     NonExemptedC(list): a list of course ids of non-exempted courses
     TotalNonExemptedHours(float): total number of non-exempted hours
 
+    A file of at least 'CourseInfo-index-min-bytes' bytes (e.g., a university-wide catalog) is not read line by line: 
+    only the rows of this quarter's courses are read, using the index file next to it (see buildCourseInfoIndex()).
+    Format errors are then only reported for those rows. --check never writes the index file: it uses it if it is 
+    up to date and reads the whole file otherwise.
+
     Format for courseInfo file:
     ###
     200       50 3   1 0   0 
@@ -650,13 +1036,32 @@ def read_courseInfo(file_name, course_instructor, config):
     ###
     '''
 
-    CourseName2Id = course_instructor[0]
     CourseInfo = course_instructor[5]
     information = []
 
+    index = None
+    if (config['CourseInfo-index-min-bytes'] >= 0 and os.path.getsize(file_name) >= max(config['CourseInfo-index-min-bytes'], 1)):
+        index = openCourseInfoIndex(file_name, InputErrors is None)
+
     # Read the CourseInfo file
     line_number = 0
-    if file_name.endswith('.csv'):
+    if (index is not None):
+        with index:
+            rows = indexedCIrows(file_name, index, course_instructor)
+        for values, line_number in rows:
+            try:
+                course_name, course_id, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
+                    is_a_TA_session, mustOnDays, mustStartTime, mustEndTime\
+                    = readCIline(values, course_instructor, line_number)
+            except InputError as e:
+                inputError(str(e))
+                continue
+
+            if (course_name != -1):
+                information.append([course_name, course_id, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
+                    is_a_TA_session, mustOnDays, mustStartTime, mustEndTime, line_number])
+
+    elif file_name.endswith('.csv'):
         with open(file_name, 'r', newline='') as csvfile:
                 csv_reader = csv.reader(csvfile)
 
@@ -673,12 +1078,16 @@ def read_courseInfo(file_name, course_instructor, config):
                         continue
 
                     # In csv file, the last field is ignored since it is for commenting use only
-                    course_name, course_name_before_slash, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
-                        is_a_TA_session, mustOnDays, mustStartTime, mustEndTime\
-                        = readCIline(values[:-1], course_instructor, line_number)
+                    try:
+                        course_name, course_id, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
+                            is_a_TA_session, mustOnDays, mustStartTime, mustEndTime\
+                            = readCIline(values[:-1], course_instructor, line_number)
+                    except InputError as e:
+                        inputError(str(e))
+                        continue
                     
                     if (course_name != -1):
-                        information.append([course_name, course_name_before_slash, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
+                        information.append([course_name, course_id, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
                             is_a_TA_session, mustOnDays, mustStartTime, mustEndTime, line_number])
 
     else:
@@ -693,26 +1102,32 @@ def read_courseInfo(file_name, course_instructor, config):
                 # Split the line into values and create a CourseInfo object
                 values = line.strip().split('#')[0].split()
 
-                course_name, course_name_before_slash, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
-                    is_a_TA_session, mustOnDays, mustStartTime, mustEndTime\
-                    = readCIline(values, course_instructor, line_number)
+                try:
+                    course_name, course_id, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
+                        is_a_TA_session, mustOnDays, mustStartTime, mustEndTime\
+                        = readCIline(values, course_instructor, line_number)
+                except InputError as e:
+                    inputError(str(e))
+                    continue
 
                 if (course_name != -1):
-                    information.append([course_name, course_name_before_slash, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
+                    information.append([course_name, course_id, length_per_session, num_sessions_per_week, large_class, ten_percent_rule_exempted,\
                         is_a_TA_session, mustOnDays, mustStartTime, mustEndTime, line_number])
 
-    NonExemptedC, TotalNonExemptedHours = CourseInfoFromCI(information, config, CourseName2Id, CourseInfo)
+    NonExemptedC, TotalNonExemptedHours = CourseInfoFromCI(information, config, CourseInfo)
 
     return NonExemptedC, TotalNonExemptedHours
 
 #################################################################################
-def read_conflict(file_name, course_instructor):
+def read_conflict(file_name, course_instructor, placeholders):
     '''
     Usage: Read the conflict file and store all the parameters. 
 
     Argument: 
     file_name(string): conflict file's file name. e.g., './ConflictCourses'
     course_instructor(list): a list that stores all the information read from courseInstructor file
+    placeholders(set): ids of placeholder instructors, see placeholderInstructors(). Their courses are not conflicted
+                       because of the shared name, since real TAs are assigned to them after scheduling.
 
     Return variable: 
     conflict_course_pairs(set): a set of conflicted course pair, e.g., {(13, 14), (13, 17)}
@@ -724,7 +1139,7 @@ def read_conflict(file_name, course_instructor):
     ###
     '''
 
-    CourseName2Id = course_instructor[0]
+    Catalog = course_instructor[7]
     Instructor2Courses = course_instructor[4]
     conflict_course_pairs = set()
 
@@ -736,7 +1151,7 @@ def read_conflict(file_name, course_instructor):
             courses = line.split('#')[0].strip().split()
             
             # Adding conflicted pairs from conflicted files
-            course_ids = [CourseName2Id[course.split('/')[0].lower()] for course in courses if course.split('/')[0].lower() in CourseName2Id]
+            course_ids = [c for c in (findInCatalog(Catalog, course) for course in courses) if c != -1]
             for i in range(len(course_ids)-1):
                 #print out the course name for i
                 for j in range(i + 1, len(course_ids)):
@@ -746,7 +1161,7 @@ def read_conflict(file_name, course_instructor):
     # Adding conflicted pairs from same instructors 
     for key in Instructor2Courses.keys():
         # We don't assume '-' is the same instructor, so we only care about instructor whose id is not -1 and have multiple courses
-        if (key != -1 and len(Instructor2Courses[key]) > 1): 
+        if (key != -1 and key not in placeholders and len(Instructor2Courses[key]) > 1): 
             course_ids = Instructor2Courses[key]
             for i in range(len(course_ids)-1):
                 for j in range(i + 1, len(course_ids)):
@@ -755,31 +1170,184 @@ def read_conflict(file_name, course_instructor):
     return conflict_course_pairs
 
 #################################################################################
-def print_conflictPairs(conflict_course_pairs, course_instructor):
+def print_conflictPairs(conflict_course_pairs, course_instructor, placeholders):
     '''
     Usage: Print our conflicted course pairs in stderr file
 
     Argument: 
     conflict_course_pairs(list): a list of conflicted course pair generated from read_conflit() function
     course_instructor(list): a list that stores all the information read from courseInstructor file generated from read_courseInstructor() function
+    placeholders(set): ids of placeholder instructors. Their pairs come from the conflict file only, see read_conflict()
     '''
 
     #print conflicted course pairs that are taught in this quarter in stderr
     InstructorId2Name = course_instructor[3]
     CourseInfo = course_instructor[5]
+    sameInstructor = lambda c1, c2: CourseInfo[c1].instructorId == CourseInfo[c2].instructorId and CourseInfo[c1].instructorId not in placeholders
     print(f'', file=sys.stderr)
     for (c1,c2) in conflict_course_pairs:
-        if (CourseInfo[c1].instructorId != CourseInfo[c2].instructorId):
+        if not sameInstructor(c1, c2):
             print(f'{CourseInfo[c1].courseName}, {CourseInfo[c2].courseName} are conflicted', file=sys.stderr)
 
     print(f'', file=sys.stderr)
     for (c1,c2) in conflict_course_pairs:
-        if (CourseInfo[c1].instructorId == CourseInfo[c2].instructorId):
+        if sameInstructor(c1, c2):
             print(f'{CourseInfo[c1].courseName}, {CourseInfo[c2].courseName} are conflicted because they are taught by {InstructorId2Name[CourseInfo[c1].instructorId]}', file=sys.stderr)
     print(f'', file=sys.stderr)
 
     return
 
+#################################################################################
+def read_enrollment(file_name, course_instructor):
+    '''
+    Usage: Stream the historical enrollment file once and count, for every pair of courses taught this quarter, 
+           how many students have taken both. Only one bitmask of this quarter's courses is kept per student, 
+           so memory does not grow with the number of rows.
+
+    Argument: 
+    file_name(string): enrollment file's file name. e.g., './Enrollment'
+    course_instructor(list)
+
+    Return variable: 
+    CoEnrollment(dict): maps a course pair to the number of students who took both. e.g., {(3, 7): 12}
+    rowNum(int): number of enrollment rows read
+
+    Format for enrollment file (cross-listed names such as 432/532, 432 or 532 all count as the same course):
+    ###
+    # Student   Course
+    1001        200
+    1001        432/532
+    ###
+    '''
+
+    TotalCourseNum = course_instructor[6]
+    Catalog = course_instructor[7]
+
+    StudentCourses = defaultdict(int)
+    rowNum = 0
+    line_number = 0
+    with open(file_name, 'r', newline='') as file:
+        is_csv = file_name.endswith('.csv')
+        rows = csv.reader(file) if is_csv else (line.split('#')[0].split() for line in file)
+        if is_csv:
+            # Skip the header line
+            next(rows, None)
+            line_number += 1
+        for values in rows:
+            line_number += 1
+            # Ignore empty lines and comment lines
+            if (len(values) == 0 or not values[0]):
+                continue
+            if (len(values) < 2):
+                inputError(f"Incorrect Enrollment format for line {line_number}. Each row should have a student id and a course.")
+                continue
+            rowNum += 1
+            course_id = findInCatalog(Catalog, values[1])
+            if (course_id != -1):
+                StudentCourses[values[0]] |= 1 << course_id
+
+    CoEnrollment = defaultdict(int)
+    for mask in StudentCourses.values():
+        # Students who took at most one of this quarter's courses do not add to any pair
+        if (mask & (mask - 1) == 0):
+            continue
+        course_ids = [c for c in range(TotalCourseNum) if mask >> c & 1]
+        for i in range(len(course_ids)-1):
+            for j in range(i + 1, len(course_ids)):
+                CoEnrollment[(course_ids[i], course_ids[j])] += 1
+
+    return dict(CoEnrollment), rowNum
+
+#################################################################################
+def splitCoEnrollment(CoEnrollment, conflict_course_pairs, config):
+    '''
+    Usage: Pairs whose co-enrollment count reaches 'Enrollment-hard-conflict-threshold' become conflicted pairs.
+           Pairs whose count reaches 'Enrollment-soft-conflict-cutoff' are penalized in the objective if they overlap.
+           Pairs below the cutoff are ignored so that the ILP problem stays small.
+
+    Argument: 
+    CoEnrollment(dict): generated by read_enrollment()
+    conflict_course_pairs(set) {modified}
+    config(dict)
+
+    Return variable: 
+    SoftConflictPairs(dict): maps a course pair to its co-enrollment count. e.g., {(3, 7): 12}
+    hardPairNum(int): number of pairs added to conflict_course_pairs
+    '''
+
+    SoftConflictPairs = {}
+    hardPairNum = 0
+    threshold = config['Enrollment-hard-conflict-threshold']
+    for pair, count in CoEnrollment.items():
+        if (pair in conflict_course_pairs):
+            continue
+        if (threshold > 0 and count >= threshold):
+            conflict_course_pairs.add(pair)
+            hardPairNum += 1
+        elif (count >= config['Enrollment-soft-conflict-cutoff']):
+            SoftConflictPairs[pair] = count
+
+    return SoftConflictPairs, hardPairNum
+
+#################################################################################
+def read_referenceSchedule(file_name, course_instructor, config):
+    '''
+    Usage: Read a schedule made before (schedule.txt or schedule.csv of an earlier run). It is optional: 
+           it is only read if 'ReferenceSchedule' is not '-' in config file. Courses are matched by course name, 
+           so a course keeps its reference time even if its instructor changed.
+
+    Argument: 
+    file_name(string): e.g., './output-v1/schedule.csv'
+    course_instructor(list)
+    config(dict)
+
+    Return variable: 
+    Reference(dict): maps a course id to the days and the starting slot of the course in the reference schedule, e.g., {0: ([0, 2, 4], 12)}
+                     Courses that are not taught this quarter are left out.
+
+    Format for reference schedule file (schedule.txt or schedule.csv):
+    ###
+    200     	McGarrity           	MWF  	14:30   	15:20   	50   	-  	-  
+    LING 200,McGarrity,50,-,-,M W F,1430,1520,0,
+    ###
+    '''
+
+    Catalog = course_instructor[7]
+    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
+    slotLength = config['Slot-length-in-minutes']
+    Reference = {}
+    line_number = 0
+
+    with open(file_name, 'r', newline='') as file:
+        is_csv = file_name.endswith('.csv')
+        rows = csv.reader(file) if is_csv else (line.split() for line in file)
+        for values in rows:
+            line_number += 1
+            # Skip empty lines, the csv header and the empty rows between course groups
+            if (len(values) == 0 or not values[0] or values[0] == 'Course'):
+                continue
+            try:
+                if is_csv:
+                    if (len(values) < 7):
+                        raise InputError(f"Incorrect ReferenceSchedule format for line {line_number}.")
+                    course_name = values[0][len('LING '):] if values[0].startswith('LING ') else values[0]
+                    days, start = values[5].replace(' ', ''), values[6][:2] + ':' + values[6][2:]
+                else:
+                    if (len(values) < 4):
+                        raise InputError(f"Incorrect ReferenceSchedule format for line {line_number}.")
+                    course_name, days, start = values[0], values[2], values[3]
+                day_list = days2listint(days.lower(), "ReferenceSchedule", line_number)
+                slot = timeSlotName2Id(start_time, time_transfer(start, "ReferenceSchedule", line_number), slotLength)
+            except InputError as e:
+                inputError(str(e))
+                continue
+            course_id = findInCatalog(Catalog, course_name)
+            if (course_id != -1):
+                # A start time between two slots can not be kept
+                Reference[course_id] = (day_list, int(slot) if slot == int(slot) else -1)
+
+    return Reference
+
 #################################################################################
 def setDefaultInsPref(prefStartTime, prefEndTime, prefDays, config, line_number):
     '''
@@ -803,12 +1371,12 @@ def setDefaultInsPref(prefStartTime, prefEndTime, prefDays, config, line_number)
         prefStartSlot = 0
     else:
         pstart = time_transfer(prefStartTime, "insPref", line_number)
-        prefStartSlot = math.floor(timeSlotName2Id(start_time, pstart))
+        prefStartSlot = math.floor(timeSlotName2Id(start_time, pstart, config['Slot-length-in-minutes']))
     if (prefEndTime == '-'):
         prefEndSlot = config['SlotNumPerday'] - 1
     else:
         pend = time_transfer(prefEndTime, "insPref", line_number)
-        prefEndSlot = math.floor(timeSlotName2Id(start_time, pend - timedelta(hours=0, minutes=1)))
+        prefEndSlot = math.floor(timeSlotName2Id(start_time, pend - timedelta(hours=0, minutes=1), config['Slot-length-in-minutes']))
     if (prefDays == '-'):
         prefDayList = [0,1,2,3,4]
     else:
@@ -822,7 +1390,7 @@ def readInsPrefline(values, line_number):
     Usage: Read lines in inspref file
 
     Argument: 
-    values(list): e,g., ['Bender', 'TRF', '-', '-', '1']
+    values(list): e,g., ['Bender', 'TRF', '-', '-', '1'] or ['Bender', '-', '-', '9:30', '1', 'never']
     line_number(int): the line number in txt file or csv file
 
     Return variable: 
@@ -831,43 +1399,55 @@ def readInsPrefline(values, line_number):
     prefStartTime(string): e.g., '-'
     prefEndTime(string): e.g., '-'
     sameDay(string): e.g., '1'
+    weight(float): weight of the window, 1 if the column is left out. None for 'never'.
     '''
 
-    if (len(values) != 5):
-        sys.exit(f"Incorrect InstructorPref format for line {line_number}. Each row should have 5 columns.")
+    if (len(values) not in [5, 6]):
+        raise InputError(f"Incorrect InstructorPref format for line {line_number}. Each row should have 5 or 6 columns.")
     instructor_name = values[0]
     prefDays = values[1].lower()
     prefStartTime = values[2]
     prefEndTime = values[3]
     sameDay = values[4]
-
-    return instructor_name, prefDays, prefStartTime, prefEndTime, sameDay
+    weight = 1
+    if (len(values) == 6 and values[5].lower() == 'never'):
+        weight = None
+    elif (len(values) == 6):
+        try:
+            weight = float(values[5])
+        except ValueError:
+            weight = -1
+        if not (weight > 0):
+            raise InputError(f"Incorrect weight '{values[5]}' in InstructorPref line {line_number}. It should be a positive number or 'never'.")
+
+    return instructor_name, prefDays, prefStartTime, prefEndTime, sameDay, weight
 
 #################################################################################
-def processInsPref(information, InstructorName2Id, Instructor2Courses, config, CourseInfo, line_number, IW):
+def processInsPref(information, InstructorName2Id, Instructor2Courses, config, CourseInfo):
     '''
-    Usage: processing insPref file, adding sameDay pairs, setting up IW matrix.
+    Usage: processing insPref file, adding sameDay pairs, collecting the preferred and the avoided windows of every instructor.
 
     Argument: 
-    information(list)
+    information(list): e.g., information[0] = ['Bender', 'trf', '-', '-', '1', 1, 3]
     InstructorName2Id(list)
     Instructor2Courses(list)
     config(dict)
     CourseInfo(list)
-    line_number(int)
-    IW(list) {modified}: instructor's preference weight matrix
 
     Return variable: 
     instructor_in_insPref(list): a list of instructor id who appears in the instructor's preference file
     SameDayPairs: a set of same day course pairs.
+    Preferences(dict): maps an instructor id to the list of its PrefWindow, see createIW()
     '''
 
     instructor_in_insPref = [] 
     SameDayPairs = set()
-    for instructor_name, prefDays, prefStartTime, prefEndTime, sameDay in information:
+    Preferences = defaultdict(list)
+    for instructor_name, prefDays, prefStartTime, prefEndTime, sameDay, weight, line_number in information:
         InstructorID = InstructorName2Id[instructor_name.lower()]
 
-        instructor_in_insPref.append(InstructorID)
+        if (InstructorID not in instructor_in_insPref):
+            instructor_in_insPref.append(InstructorID)
         course_ids = Instructor2Courses[InstructorID]
 
         if (config["Assume-same-day-if-not-specified"] == 0\
@@ -879,39 +1459,44 @@ def processInsPref(information, InstructorName2Id, Instructor2Courses, config, C
                     else:
                         SameDayPairs.add((course_ids[j], course_ids[i]))  
 
-        prefStartSlot, prefEndSlot, prefDayList = setDefaultInsPref(prefStartTime, prefEndTime, prefDays, config, line_number)
+        try:
+            prefStartSlot, prefEndSlot, prefDayList = setDefaultInsPref(prefStartTime, prefEndTime, prefDays, config, line_number)
+        except InputError as e:
+            inputError(str(e))
+            continue
+        Preferences[InstructorID].append(PrefWindow(prefDayList, prefStartSlot, prefEndSlot, weight))
 
-        for c in course_ids:
-            for d in prefDayList:
-                for t in range(prefStartSlot, prefEndSlot - math.ceil(CourseInfo[c].lengPerSession/30) + 1):
-                    try:
-                        IW[c][d][t] = 1 / CourseInfo[c].sessionsPerWeek
-                    except:
-                        sys.exit(f"CourseInfo for {CourseInfo[c].courseName} fail to find")
-                    if (1 / CourseInfo[c].sessionsPerWeek < 0):
-                        sys.exit(f"CourseInfo for {CourseInfo[c].courseName} fail to find")
+    # An instructor who only lists times to avoid prefers the rest of the week
+    for InstructorID, windows in Preferences.items():
+        if all(window.weight is None for window in windows):
+            windows.append(PrefWindow([0, 1, 2, 3, 4], 0, config['SlotNumPerday'] - 1, 1))
 
-    return instructor_in_insPref, SameDayPairs
+    return instructor_in_insPref, SameDayPairs, Preferences
 
 #################################################################################
-def read_instructorPref(file_name, course_instructor, config):
+def read_instructorPref(file_name, course_instructor, config, placeholders):
     '''
-    Usage: Read the instructor preference file and create matrix IW(instructor pref weight). 
+    Usage: Read the instructor preference file. An instructor may have several lines: every line is a window of days and
+           times with a weight, and 'never' as the weight makes the window a time the instructor can not teach. 
+           The windows are turned into IW coefficients of the candidate starting slots by createIW().
 
     Argument: 
     file_name(string): instructor preference file's file name. e.g., './InstructorPref'.
     course_instructor(list): a list that stores all the information read from courseInstructor file.
     config(dict): a dictionary that store all the information read from config file. 
+    placeholders(set): ids of placeholder instructors. Their courses are not assumed to be on the same day.
 
     Return variable: 
-    IW(list): Instructor preference weight matrix. IW[c][d][s] = 1/CourseInfo[c].sessionsPerWeek if the slot is prefered and = 0 otherwise; where c is courseId, d is day, s is slotId. 
+    Preferences(dict): maps an instructor id to the list of its PrefWindow
     SameDayPairs:  a set of course pairs that insrtuctors want them to be on the same day, e.g., {(16, 14), (8, 9), (4, 1), (5, 6)}.
     instructor_in_insPref(list): a list of instructor id who appears in insturctorPref file. e.g., [7, 8, 5, 1, 3, 10, 2, 13]
 
-    Format for instructorPref file:
+    Format for instructorPref file (the weight column is optional, 1 by default):
     ###
     Ferjan-Ramirez   -     -     14:30   1
     Xia              TR   10:30   -      1
+    Xia              F    13:00   -      1   0.3
+    Xia              -     -      9:30   1   never
     ###
     '''
 
@@ -920,7 +1505,6 @@ def read_instructorPref(file_name, course_instructor, config):
     Instructor2Courses = course_instructor[4]
     CourseInfo = course_instructor[5]
     TotalCourseNum = course_instructor[6]
-    IW = [[[0 for _ in range(config['SlotNumPerday'])] for _ in range(5)] for _ in range(TotalCourseNum)]
     line_number = 0
     information = []
 
@@ -941,10 +1525,14 @@ def read_instructorPref(file_name, course_instructor, config):
                     continue
 
                 # In csv file, the last field is ignored since it is for commenting use only
-                instructor_name, prefDays, prefStartTime, prefEndTime, sameDay = readInsPrefline(values[:-1], line_number)
+                try:
+                    instructor_name, prefDays, prefStartTime, prefEndTime, sameDay, weight = readInsPrefline(values[:-1], line_number)
+                except InputError as e:
+                    inputError(str(e))
+                    continue
                 if (instructor_name.lower() not in InstructorName2Id):
                     continue
-                information.append([instructor_name, prefDays, prefStartTime, prefEndTime, sameDay])
+                information.append([instructor_name, prefDays, prefStartTime, prefEndTime, sameDay, weight, line_number])
 
     else:
         with open(file_name, "r") as file:
@@ -955,18 +1543,22 @@ def read_instructorPref(file_name, course_instructor, config):
                     continue
 
                 values = line.strip().split()
-                instructor_name, prefDays, prefStartTime, prefEndTime, sameDay = readInsPrefline(values, line_number)
+                try:
+                    instructor_name, prefDays, prefStartTime, prefEndTime, sameDay, weight = readInsPrefline(values, line_number)
+                except InputError as e:
+                    inputError(str(e))
+                    continue
                 if (instructor_name.lower() not in InstructorName2Id):
                     continue
-                information.append([instructor_name, prefDays, prefStartTime, prefEndTime, sameDay])
+                information.append([instructor_name, prefDays, prefStartTime, prefEndTime, sameDay, weight, line_number])
 
-    instructor_in_insPref, SameDayPairs = processInsPref(information, InstructorName2Id, Instructor2Courses, config, CourseInfo, line_number, IW)
+    instructor_in_insPref, SameDayPairs, Preferences = processInsPref(information, InstructorName2Id, Instructor2Courses, config, CourseInfo)
                
     insNotInPref(TotalCourseNum, CourseInfo, instructor_in_insPref, InstructorId2Name)   
     if (config["Assume-same-day-if-not-specified"] == 1):
-        addSameDayPairs(Instructor2Courses, CourseInfo, SameDayPairs)
+        addSameDayPairs({i: course_ids for i, course_ids in Instructor2Courses.items() if i not in placeholders}, CourseInfo, SameDayPairs)
 
-    return IW, SameDayPairs, instructor_in_insPref
+    return Preferences, SameDayPairs, instructor_in_insPref
 
 #################################################################################
 def addSameDayPairs(Instructor2Courses, CourseInfo, SameDayPairs):
@@ -1006,9 +1598,6 @@ def insNotInPref(TotalCourseNum, CourseInfo, instructor_in_insPref, InstructorId
 
     instructor_notIn_insPref = set()
     for c in range(TotalCourseNum):
-        if (CourseInfo[c].sessionsPerWeek < 0):
-            print(f"{CourseInfo[c].courseName} has incorrect session num. Please check CourseInfo file")
-            sys.exit("incorrect session Num")
         if (CourseInfo[c].instructorId not in instructor_in_insPref):
             instructor_notIn_insPref.add(InstructorId2Name[CourseInfo[c].instructorId])
     for i in instructor_notIn_insPref:
@@ -1016,6 +1605,51 @@ def insNotInPref(TotalCourseNum, CourseInfo, instructor_in_insPref, InstructorId
     
     return
 
+#################################################################################
+def createIW(Preferences, course_instructor, Candidates):
+    '''
+    Usage: Create IW (instructor preference weight) for the candidate starting slots only. A session earns the largest
+           weight of the windows it fits in, divided by the number of sessions per week. Slots whose session overlaps 
+           a 'never' window earn nothing and are listed in Avoid, so that ILP() sets the upper bounds of their X to 0.
+
+    Argument: 
+    Preferences(dict): generated by read_instructorPref()
+    course_instructor(list)
+    Candidates(list): candidate starting slots of every course, see createCandidates()
+
+    Return variable: 
+    IW(list): IW[c][d] maps every candidate starting slot t of course c to its weight, e.g., IW[3][1] = {4: 0.5, 6: 0}
+    Avoid(set): (c, d, t) of the starting slots the instructor can not teach at
+    '''
+
+    CourseInfo = course_instructor[5]
+    IW = []
+    Avoid = set()
+    for c in range(course_instructor[6]):
+        windows = Preferences.get(CourseInfo[c].instructorId, [])
+        slotNum = CourseInfo[c].slotNum
+        IW_c = []
+        for d in range(5):
+            IW_cd = {}
+            for t in Candidates[c]:
+                weight = 0
+                for window in windows:
+                    if (d not in window.days):
+                        continue
+                    if (window.weight is None and t <= window.endSlot and t + slotNum - 1 >= window.startSlot):
+                        Avoid.add((c, d, t))
+                    elif (window.weight is not None and window.startSlot <= t < window.endSlot - slotNum + 1):
+                        weight = max(weight, window.weight)
+                # Courses missing from CourseInfo are reported by checkCourses()
+                if ((c, d, t) in Avoid or CourseInfo[c].sessionsPerWeek < 1):
+                    IW_cd[t] = 0
+                else:
+                    IW_cd[t] = weight / CourseInfo[c].sessionsPerWeek
+            IW_c.append(IW_cd)
+        IW.append(IW_c)
+
+    return IW, Avoid
+
 #################################################################################
 def createCW(course_instructor, config):
     '''
@@ -1066,71 +1700,227 @@ def createCW(course_instructor, config):
     return CW
 
 #################################################################################
-def addConstraints(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, Y, problem):
+def createCandidates(course_instructor, config):
     '''
-    Usage: adding constraints for ILP 
+    Usage: Create the candidate starting slots of every course. Only candidate slots get an X variable, so the size of
+           the ILP problem depends on the number of starting times a course may take, not on the slot length.
+           A course may start at
+           (1) every 'Start-time-step-in-minutes' from InstructDayStartsAt,
+           (2) the starting times listed for its length in config file (e.g., '80-min-class-start-time'),
+           (3) its must start time, if it has one;
+           and the starting slot is removed if
+           (a) the course can not end by InstructDayEndsAt,
+           (b) it is earlier than mustStartSlot or the course can not end by mustEndSlot,
+           (c) Must-follow-block-policy is 1 and the slot is in block scheduling time but not in the listed starting times.
 
     Argument: 
     course_instructor(list)
     config(dict)
-    conflict_course_pairs(set)
-    NonExemptedC(list): e.g., [0, 1, 2, 3, 4, 5]
-    TotalNonExemptedHours(float): 
-    SameDayPairs(set)
-    X(list): variable X for our ILP problem. X[c][d][s] = 1 means course c start at slot s on day d.
-    Y(list): variable Y for our ILP problem. Y[c][d][s] = 1 means course c durates at slot s on day d.
-    problem(pulp){modified}: ILP problem we defined using pulp. In this function, we will add new constraints to it.
+
+    Return variable: 
+    Candidates(list): Candidates[c] is a sorted list of starting slots of course c, e.g., [0, 2, 4, 6, 8, 10, 12, 13, 14]
     '''
 
-    TotalCourseNum = course_instructor[6]
     CourseInfo = course_instructor[5]
+    TotalCourseNum = course_instructor[6]
     totalSlot = config['SlotNumPerday']
-    addMatrixYC(TotalCourseNum, CourseInfo, totalSlot, X, Y, problem)
-    addSessionC(TotalCourseNum, CourseInfo, totalSlot, X, config, problem)
-    addTwiceAWeekC(TotalCourseNum, CourseInfo, totalSlot, X, problem)
-    addThreeTimesAWeekC(TotalCourseNum, CourseInfo, totalSlot, X, problem)
-    addConflictedC(conflict_course_pairs, totalSlot, Y, problem)
-    add10PercentC(config,TotalNonExemptedHours, NonExemptedC, Y, problem)
-    addSamedayC(config, SameDayPairs, CourseInfo, totalSlot, X, problem)
-    addLatestStartC(TotalCourseNum, totalSlot, CourseInfo, config, X, problem)
-    addMustTimeC(TotalCourseNum, totalSlot, CourseInfo, X, problem)
-    addBlockC(TotalCourseNum, CourseInfo, config, X, problem)
+    step = config['Start-time-step-in-minutes'] // config['Slot-length-in-minutes']
+    BlockingSlot = set(range(config['BlockSchedulingStartsAtid'], config['BlockSchedulingEndsAtid'] + 1))
+    Candidates = []
 
-    return
+    for c in range(TotalCourseNum):
+        course = CourseInfo[c]
+        block_start_time = config.get(f'{course.lengPerSession}-min-class-start-time', [])
+        starts = set(range(0, totalSlot, step)) | set(block_start_time)
+        if (course.mustStartSlot != -1):
+            starts.add(course.mustStartSlot)
 
-#################################################################################
-def addMatrixYC(TotalCourseNum, CourseInfo, totalSlot, X, Y, problem):
-    '''
-    Usage: adding Constraint 1: Matrix Y must be consistent with Matrix X
+        latest = totalSlot - course.slotNum
+        if (course.mustEndSlot != -1):
+            latest = min(latest, course.mustEndSlot - course.slotNum + 1)
+        earliest = max(0, course.mustStartSlot)
+        starts = [t for t in starts if earliest <= t <= latest]
 
-    Argument: 
-    TotalCourseNum(int)
-    CourseInfo(list)
-    totalSlot(int)
-    X(list)
-    Y(list)
-    problem(pulp) {modified}
-    '''
+        if (config['Must-follow-block-policy'] == 1 and block_start_time != []):
+            starts = [t for t in starts if t not in BlockingSlot or t in block_start_time]
 
-    for c in range(TotalCourseNum):
-        slotNum = CourseInfo[c].slotNum
-        for d in range(5):
-            problem += pulp.lpSum(X[c][d][t] for t in range(totalSlot)) * slotNum == pulp.lpSum(Y[c][d][t] for t in range(totalSlot))
-            for t in range(totalSlot):
-                for j in range(t, min(t + slotNum, totalSlot)):
-                    problem += Y[c][d][j] >= X[c][d][t]
-    
-    return
+        Candidates.append(sorted(starts))
+
+    return Candidates
 
 #################################################################################
-def addSessionC(TotalCourseNum, CourseInfo, totalSlot, X, config, problem):
+def checkCourses(course_instructor, Candidates):
     '''
-    Usage: adding Constraint 2: Each course must meet the correct number of times per week
+    Usage: check courses against each other's files before setting up the ILP problem, so that the program
+           ends with a clear message instead of "Pulp fail to find an optimal solution".
+
+    Argument: 
+    course_instructor(list)
+    Candidates(list): generated by createCandidates()
+    '''
+
+    CourseInfo = course_instructor[5]
+    # Days a course can be taught on, see addTwiceAWeekC() and addThreeTimesAWeekC()
+    DayPatterns = {2: [[0, 2], [1, 3]], 3: [[0, 2, 4]]}
+    for c in range(course_instructor[6]):
+        course = CourseInfo[c]
+        if (course.sessionsPerWeek < 1):
+            inputError(f"course {course.courseName} is not found in CourseInfo. Please either add the course to CourseInfo or remove it from CoursesThisQuarter.")
+            continue
+        patterns = DayPatterns.get(course.sessionsPerWeek, [[0, 1, 2, 3, 4]])
+        if (course.sessionsPerWeek == 2 and course.largeClass == 1):
+            patterns = [[1, 3]]
+        if (len(course.mustOnDays) > course.sessionsPerWeek\
+            or not any(set(course.mustOnDays) <= set(days) for days in patterns)):
+            inputError(f"MustDays {''.join(intlist2days(sorted(course.mustOnDays)))} for {course.courseName} can not be met by a course that meets "\
+                       f"{course.sessionsPerWeek} times per week on {' or '.join(''.join(intlist2days(days)) for days in patterns)}.")
+            continue
+        if (Candidates[c] == []):
+            inputError(f"{course.courseName} can not start at any time. Please check its must start/end time, its length and the block policy.")
+
+    return
+
+#################################################################################
+# Families of constraints that are only added once a solution violates them if 'Lazy-constraints' is 1, see addLazyC()
+LazyFamilies = ['Conflict', '10-percent']
+
+# Families of constraints that may be violated at a penalty if 'Elastic' is 1, see addElasticSlack()
+ElasticFamilies = ['Conflict', '10-percent', 'Must-on-days', 'Same-day']
+
+#################################################################################
+def addConstraints(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, problem):
+    '''
+    Usage: adding constraints for ILP 
+
+    Argument: 
+    course_instructor(list)
+    config(dict)
+    conflict_course_pairs(set)
+    NonExemptedC(list): e.g., [0, 1, 2, 3, 4, 5]
+    TotalNonExemptedHours(float): 
+    SameDayPairs(set)
+    X(list): variable X for our ILP problem. X[c][d][s] = 1 means course c start at slot s on day d. 
+             X[c][d] is a dictionary that only has the candidate starting slots of course c.
+    problem(pulp){modified}: ILP problem we defined using pulp. In this function, we will add new constraints to it.
+
+    Return variable:
+    families(dict): maps a constraint name to the family of the constraint, e.g., {'_C1': 'Session'}
+
+    Note: latest starting time, must starting/ending time and block policy are not constraints, since slots that 
+          violate them have no X variable (see createCandidates()).
+          If 'Lazy-constraints' is 1, the families in LazyFamilies are left out, see addLazyC().
+    '''
+
+    TotalCourseNum = course_instructor[6]
+    CourseInfo = course_instructor[5]
+    families = {}
+    builders = [('Session', addSessionC, (TotalCourseNum, CourseInfo, X, config, problem)),
+                ('Twice-a-week', addTwiceAWeekC, (TotalCourseNum, CourseInfo, X, problem)),
+                ('Three-times-a-week', addThreeTimesAWeekC, (TotalCourseNum, CourseInfo, X, problem)),
+                ('Conflict', addConflictedC, (conflict_course_pairs, CourseInfo, X, problem)),
+                ('10-percent', add10PercentC, (config, TotalNonExemptedHours, NonExemptedC, CourseInfo, X, problem)),
+                ('Same-day', addSamedayC, (config, SameDayPairs, CourseInfo, X, problem)),
+                ('Must-on-days', addMustTimeC, (TotalCourseNum, CourseInfo, X, problem))]
+    if (config['Lazy-constraints'] == 1):
+        builders = [builder for builder in builders if builder[0] not in LazyFamilies]
+    for family, builder, arguments in builders:
+        first = len(problem.constraints)
+        builder(*arguments)
+        recordFamily(problem, first, family, families)
+
+    return families
+
+#################################################################################
+def addElasticSlack(problem, families, config):
+    '''
+    Usage: make the constraints of the families in ElasticFamilies elastic. A constraint "a <= b" becomes "a - over <= b", 
+           "a >= b" becomes "a + under >= b" and "a == b" gets both. Slack variables are named after their constraint, 
+           e.g., Slack_over__C12, so that elasticViolations() finds the constraint again.
+
+    Argument: 
+    problem(pulp) {modified}
+    families(dict)
+    config(dict)
+
+    Return variable:
+    penalty(pulp expression): 'Elastic-penalty' for every unit of slack, to be subtracted from the objective function
+    '''
+
+    slacks = []
+    for name, row in problem.constraints.items():
+        if (families.get(name) not in ElasticFamilies):
+            continue
+        if (row.sense != pulp.LpConstraintGE):
+            slack = pulp.LpVariable(f"Slack_over_{name}", 0)
+            row.addInPlace(-slack)
+            slacks.append(slack)
+        if (row.sense != pulp.LpConstraintLE):
+            slack = pulp.LpVariable(f"Slack_under_{name}", 0)
+            row.addInPlace(slack)
+            slacks.append(slack)
+
+    return pulp.lpSum(config['Elastic-penalty'] * slack for slack in slacks)
+
+#################################################################################
+def elasticViolations(problem, descriptions, Schedule):
+    '''
+    Usage: list the elastic constraints the schedule violates and write them to the notes of the courses in them
+
+    Argument: 
+    problem(pulp)
+    descriptions(dict): description of every constraint, see describeConstraint()
+    Schedule(list) {modified}: notes of the courses in a violated constraint
+
+    Return variable:
+    Violations(list): list of (description, amount, unit, course names). amount is in hours for the 10% rule and in
+                      sessions otherwise, e.g., 
+                      [('ConflictCourses: 442/542 and 450/550 can not overlap on T at 10:30', 1.0, 'session', ['442/542', '450/550'])]
+    '''
+
+    Violations = []
+    for var in problem.variables():
+        if not (var.name.startswith('Slack_') and (var.varValue or 0) > 1e-6):
+            continue
+        name = var.name.split('_', 2)[2]
+        courses = sorted({int(x.name.split('_')[1]) for x in problem.constraints[name] if x.name.startswith('X_') and (x.varValue or 0) >= 0.5})
+        description = descriptions.get(name, name)
+        amount, unit = var.varValue, 'session'
+        # A 10%-rule row counts the 30 min cells of its hour, see addTenPercentHourC()
+        if (name.startswith('TenPercent_')):
+            amount, unit = amount / 2, 'hour'
+        Violations.append((description, amount, unit, [Schedule[c].courseName for c in courses]))
+        note = f"violates {description} by {amount:g} {unit}(s)"
+        for c in courses:
+            Schedule[c].notes = f"{Schedule[c].notes}; {note}" if Schedule[c].notes else note
+    Violations.sort(key=lambda violation: (-violation[1], violation[0]))
+
+    return Violations
+
+#################################################################################
+def recordFamily(problem, first, family, families):
+    '''
+    Usage: record the family of the constraints added to the problem since it had first constraints
+
+    Argument: 
+    problem(pulp)
+    first(int): number of constraints before the family was added
+    family(string): e.g., 'Session'
+    families(dict) {modified}
+    '''
+
+    for name in list(problem.constraints)[first:]:
+        families[name] = family
+
+    return
+
+#################################################################################
+def addSessionC(TotalCourseNum, CourseInfo, X, config, problem):
+    '''
+    Usage: adding Constraint 1: Each course must meet the correct number of times per week
 
     Argument: 
     TotalCourseNum(int)
     CourseInfo(list)
-    totalSlot(int)
     X(list)
     problem(pulp) {modified}
     '''
@@ -1143,52 +1933,50 @@ def addSessionC(TotalCourseNum, CourseInfo, totalSlot, X, config, problem):
                      Please either add the course to CourseInfo or remove it from '{config['CourseInstructor']}'")
             
         #Total sessions taught in a week equal to sessionsPerWeek
-        problem += pulp.lpSum(X[c][d][t] for d in range(5) for t in range(totalSlot)) == sessionsPerWeek
+        problem += pulp.lpSum(X[c][d].values() for d in range(5)) == sessionsPerWeek
 
         #Each course meet at most once per day
         for d in range(5):
-            problem += pulp.lpSum(X[c][d][t] for t in range(totalSlot)) <= 1
+            problem += pulp.lpSum(X[c][d].values()) <= 1
     
     return
 
 #################################################################################
-def addTwiceAWeekC(TotalCourseNum, CourseInfo, totalSlot, X, problem):
+def addTwiceAWeekC(TotalCourseNum, CourseInfo, X, problem):
     '''
-    Usage: adding Constraint 3: Each course that meets twice per week must be taught on MW or TR
+    Usage: adding Constraint 2: Each course that meets twice per week must be taught on MW or TR
            (This should be for regular courses, but by coincident, it also works for TA session.)
 
     Argument: 
     TotalCourseNum(int)
     CourseInfo(list)
-    totalSlot(int)
     X(list)
     problem(pulp) {modified}
     '''
 
     for c in range(TotalCourseNum):
         if CourseInfo[c].sessionsPerWeek == 2: 
-            for t in range(totalSlot):
+            for t in X[c][0]:
                 problem += X[c][1][t] == X[c][3][t]   # T and R have the same schedule
                 problem += X[c][0][t] == X[c][2][t]   # M and W have the same schedule
             # not meet on Friday
-            problem += pulp.lpSum(X[c][4][t] for t in range(totalSlot)) == 0
+            problem += pulp.lpSum(X[c][4].values()) == 0
 
             if CourseInfo[c].largeClass == 1:
                 # must meet on T and R
-                problem += pulp.lpSum(X[c][1][t] for t in range(totalSlot)) == 1
-                problem += pulp.lpSum(X[c][3][t] for t in range(totalSlot)) == 1
+                problem += pulp.lpSum(X[c][1].values()) == 1
+                problem += pulp.lpSum(X[c][3].values()) == 1
 
     return
 
 #################################################################################
-def addThreeTimesAWeekC(TotalCourseNum, CourseInfo, totalSlot, X, problem):
+def addThreeTimesAWeekC(TotalCourseNum, CourseInfo, X, problem):
     '''
-    Usage: adding Constraint 4: Courses that meet three times per week must be taught on MWF
+    Usage: adding Constraint 3: Courses that meet three times per week must be taught on MWF
 
     Argument: 
     TotalCourseNum(int)
     CourseInfo(list)
-    totalSlot(int)
     X(list)
     problem(pulp) {modified}
     '''
@@ -1196,65 +1984,223 @@ def addThreeTimesAWeekC(TotalCourseNum, CourseInfo, totalSlot, X, problem):
     for c in range(TotalCourseNum):
         if CourseInfo[c].sessionsPerWeek == 3: 
             # must meet on M, W, F
-            problem += pulp.lpSum(X[c][0][t] for t in range(totalSlot)) == 1
-            problem += pulp.lpSum(X[c][2][t] for t in range(totalSlot)) == 1
-            problem += pulp.lpSum(X[c][4][t] for t in range(totalSlot)) == 1
+            problem += pulp.lpSum(X[c][0].values()) == 1
+            problem += pulp.lpSum(X[c][2].values()) == 1
+            problem += pulp.lpSum(X[c][4].values()) == 1
             # M, W, and F have the same schedule
-            for t in range(totalSlot):
+            for t in X[c][0]:
                 problem += X[c][0][t] == X[c][2][t]   
                 problem += X[c][0][t] == X[c][4][t] 
 
     return  
 
 #################################################################################
-def addConflictedC(conflict_course_pairs, totalSlot, Y, problem):
+def coveringStarts(X_cd, slotNum, point):
+    '''
+    Usage: find the X variables of a course on a day whose session covers a slot
+
+    Argument: 
+    X_cd(dict): X[c][d], maps a candidate starting slot to its X variable
+    slotNum(int): number of slots of a session
+    point(int): a slot id
+
+    Return variable: 
+    variables(list): X variables whose session [start, start + slotNum) contains point
+    '''
+
+    return [var for t, var in X_cd.items() if t <= point < t + slotNum]
+
+#################################################################################
+def addConflictedC(conflict_course_pairs, CourseInfo, X, problem):
     '''
-    Usage: adding Constraint 5: Conflicted courses should not overlap in time
+    Usage: adding Constraint 4: Conflicted courses should not overlap in time.
+           Two sessions overlap if and only if one of them starts while the other is taught, so we only check 
+           the candidate starting slots of the two courses instead of every slot of the day.
 
     Argument: 
     conflict_course_pairs(set)
-    totalSlot(int)
-    Y(list)
+    CourseInfo(list)
+    X(list)
     problem(pulp) {modified}
     '''
 
     for (c1, c2) in conflict_course_pairs:
         for d in range(5):
-            for t in range(totalSlot):
-                problem += Y[c1][d][t] + Y[c2][d][t] <= 1
+            addConflictedPairC(c1, c2, d, CourseInfo, X, problem, set())
+    
+    return
+
+#################################################################################
+def addConflictedPairC(c1, c2, d, CourseInfo, X, problem, rows):
+    '''
+    Usage: adding the conflict constraints of one conflicted pair on one day
+
+    Argument: 
+    c1(int), c2(int): course ids
+    d(int): day
+    CourseInfo(list)
+    X(list)
+    problem(pulp) {modified}
+    rows(set) {modified}: variable names of the rows already added, a row is not added twice
+    '''
+
+    for point in sorted(set(X[c1][d]) | set(X[c2][d])):
+        v1 = coveringStarts(X[c1][d], CourseInfo[c1].slotNum, point)
+        v2 = coveringStarts(X[c2][d], CourseInfo[c2].slotNum, point)
+        # If only one course can be taught at this point, "at most once per day" already covers it
+        if (v1 == [] or v2 == []):
+            continue
+        key = frozenset(var.name for var in v1 + v2)
+        if (key not in rows):
+            rows.add(key)
+            problem += pulp.lpSum(v1 + v2) <= 1
+
+    return
+
+#################################################################################
+def ruleCellCount(start, slotNum, cellStart, cellNum, slotsPerCell):
+    '''
+    Usage: count the 30 min cells of the 10% rule that a session overlaps
+
+    Argument: 
+    start(int): starting slot of the session
+    slotNum(int): number of slots of the session
+    cellStart(int): slot id where the first cell begins
+    cellNum(int): number of consecutive cells to check
+    slotsPerCell(int): number of slots in a 30 min cell
+
+    Return variable: 
+    count(int): e.g., a 50 min course starting at 8:30 overlaps both cells of the 8:30-9:30 hour, so count = 2
+    '''
+
+    count = 0
+    for k in range(cellNum):
+        begin = cellStart + k * slotsPerCell
+        if (start < begin + slotsPerCell and start + slotNum > begin):
+            count += 1
+
+    return count
+
+#################################################################################
+def add10PercentC(config, TotalNonExemptedHours, NonExemptedC, CourseInfo, X, problem):
+    '''
+    Usage: adding Constraint 5: Meet the 10%-rule requirement.
+           For every hour, a session counts once for each 30 min cell of the hour it overlaps.
+
+    Argument: 
+    config(dict)
+    TotalNonExemptedHour(float)
+    NonExemptedC(list)
+    CourseInfo(list)
+    X(list)
+    problem(pulp) {modified}
+    '''
+
+    for t in range(config['10PercRuleStartsAtid'], config['10PercRuleEndsAtid'] + 1, 2 * config['SlotsPerRuleCell']):
+        addTenPercentHourC(t, config, TotalNonExemptedHours, NonExemptedC, CourseInfo, X, problem)
     
     return
 
 #################################################################################
-def add10PercentC(config, TotalNonExemptedHours, NonExemptedC, Y, problem):
+def addTenPercentHourC(t, config, TotalNonExemptedHours, NonExemptedC, CourseInfo, X, problem):
     '''
-    Usage: adding Constraint 5: Meet the 10%-rule requirement
+    Usage: adding the 10%-rule constraint of the hour that starts at slot t
 
     Argument: 
+    t(int): slot id
     config(dict)
     TotalNonExemptedHour(float)
-    Y(list)
+    NonExemptedC(list)
+    CourseInfo(list)
+    X(list)
     problem(pulp) {modified}
     '''
 
     target = math.ceil(config['RulePercentage'] * TotalNonExemptedHours)
-    for t in range(config['10PercRuleStartsAtid'], config['10PercRuleEndsAtid'] + 1, 2):
-        t1 = pulp.lpSum(Y[c][d][t] for c in NonExemptedC for d in range(5))
-        t2 = pulp.lpSum(Y[c][d][t + 1] for c in NonExemptedC for d in range(5))
-        problem += t1 + t2 <= 2 * target
-    
+    slotsPerCell = config['SlotsPerRuleCell']
+    terms = []
+    for c in NonExemptedC:
+        for d in range(5):
+            for start, var in X[c][d].items():
+                count = ruleCellCount(start, CourseInfo[c].slotNum, t, 2, slotsPerCell)
+                if (count > 0):
+                    terms.append(count * var)
+    # The name tells which hour the constraint is for, see describeConstraint()
+    problem += pulp.lpSum(terms) <= 2 * target, f"TenPercent_{t}"
+
     return
 
 #################################################################################
-def addSamedayC(config, SameDayPairs, CourseInfo, totalSlot, X, problem):
+def addLazyC(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, X, problem, families, everything):
+    '''
+    Usage: row generation for the families in LazyFamilies. Scan the current solution and add the conflict constraints 
+           of every conflicted pair that overlaps on a day, and the 10%-rule constraint of every hour over the target.
+           If everything is True, add all the constraints of these families that are not in the problem yet.
+
+    Argument: 
+    course_instructor(list)
+    config(dict)
+    conflict_course_pairs(set)
+    NonExemptedC(list)
+    TotalNonExemptedHours(float)
+    X(list)
+    problem(pulp) {modified}
+    families(dict) {modified}: the family of every added constraint is recorded here
+    everything(bool)
+
+    Return variable:
+    involved(set): ids of the courses in a violated constraint
+    rowNum(int): number of constraints added
+    '''
+
+    CourseInfo = course_instructor[5]
+    constraintNum = len(problem.constraints)
+    Start = {}
+    for c in range(len(X)):
+        for d in range(5):
+            for t, var in X[c][d].items():
+                if ((var.varValue or 0) >= 0.5):
+                    Start[(c, d)] = t
+    involved = set()
+
+    def overlap(c1, c2, d):
+        return ((c1, d) in Start and (c2, d) in Start and Start[(c1, d)] < Start[(c2, d)] + CourseInfo[c2].slotNum\
+                and Start[(c2, d)] < Start[(c1, d)] + CourseInfo[c1].slotNum)
+
+    first = len(problem.constraints)
+    rows = {frozenset(var.name for var in row) for row in problem.constraints.values()} if everything else set()
+    for (c1, c2) in conflict_course_pairs:
+        for d in range(5):
+            if (everything or overlap(c1, c2, d)):
+                addConflictedPairC(c1, c2, d, CourseInfo, X, problem, rows)
+                involved |= {c1, c2} if not everything else set()
+    recordFamily(problem, first, 'Conflict', families)
+
+    first = len(problem.constraints)
+    target = math.ceil(config['RulePercentage'] * TotalNonExemptedHours)
+    slotsPerCell = config['SlotsPerRuleCell']
+    for t in range(config['10PercRuleStartsAtid'], config['10PercRuleEndsAtid'] + 1, 2 * slotsPerCell):
+        if (f"TenPercent_{t}" in problem.constraints):
+            continue
+        counts = [(c, ruleCellCount(Start[(c, d)], CourseInfo[c].slotNum, t, 2, slotsPerCell))\
+                  for c in NonExemptedC for d in range(5) if (c, d) in Start]
+        if (everything or sum(count for c, count in counts) > 2 * target):
+            addTenPercentHourC(t, config, TotalNonExemptedHours, NonExemptedC, CourseInfo, X, problem)
+            involved |= {c for c, count in counts if count > 0} if not everything else set()
+    recordFamily(problem, first, '10-percent', families)
+
+    return involved, len(problem.constraints) - constraintNum
+
+#################################################################################
+def addSamedayC(config, SameDayPairs, CourseInfo, X, problem):
     '''
-    Usage: adding Constraint 7: Whether SameDay preferences are treated as hard constraint is specified in config file
+    Usage: adding Constraint 6: Whether SameDay preferences are treated as hard constraint is specified in config file.
+           If 'Treat-same-day-preference-as-hard-constraint' is 2, they are soft instead, see addSameDaySoftC().
 
     Argument: 
     config(dict)
     SameDayPairs(set)
     CourseInfo(list)
-    totalSlot(int): total number of slot in a day
     X(list)
     problem(pulp) {modified}
     '''
@@ -1264,39 +2210,79 @@ def addSamedayC(config, SameDayPairs, CourseInfo, totalSlot, X, problem):
         for (c1, c2) in SameDayPairs:
             assert (CourseInfo[c1].sessionsPerWeek <= CourseInfo[c2].sessionsPerWeek)
             for d in range(5):
-                problem += pulp.lpSum(X[c1][d][t] for t in range(totalSlot)) <= pulp.lpSum(X[c2][d][t] for t in range(totalSlot))
+                problem += pulp.lpSum(X[c1][d].values()) <= pulp.lpSum(X[c2][d].values())
     
     return
 
 #################################################################################
-def addLatestStartC(TotalCourseNum, totalSlot, CourseInfo, config, X, problem):
+def defineD(SameDayPairs, CourseInfo, config):
     '''
-    Usage: adding Constraint 8: X's time later than InstructDayEndsAt - course length should be set to 0
+    Usage: Define variable D. D[(i, d)] = 1 means instructor i, who wants the courses in SameDayPairs on the same days,
+           teaches on day d. Only used if 'Treat-same-day-preference-as-hard-constraint' is 2. It is continuous, 
+           since addSameDaySoftC() bounds it by binary X variables and the objective penalizes it.
 
     Argument: 
-    TotalCourseNum(int)
-    totalSlot(int): total number of slot in a day
+    SameDayPairs(set)
     CourseInfo(list)
     config(dict)
+
+    Return variable: 
+    D(dict): e.g., {(3, 0): D_3_0, ...}
+    '''
+
+    D = {}
+    if (config['Treat-same-day-preference-as-hard-constraint'] == 2):
+        for i in sorted({CourseInfo[c].instructorId for pair in SameDayPairs for c in pair}):
+            for d in range(5):
+                D[(i, d)] = pulp.LpVariable(f"D_{i}_{d}", 0, 1, cat='Continuous')
+
+    return D
+
+#################################################################################
+def addSameDaySoftC(SameDayPairs, CourseInfo, X, D, problem):
+    '''
+    Usage: adding soft same-day constraints: D[(i, d)] must be 1 if a course of instructor i in SameDayPairs meets on day d.
+           One constraint per course and day instead of one per pair and day, and no schedule becomes infeasible.
+
+    Argument: 
+    SameDayPairs(set)
+    CourseInfo(list)
     X(list)
+    D(dict)
     problem(pulp) {modified}
     '''
-    
-    for c in range(TotalCourseNum):
+
+    if (D == {}):
+        return
+    for c in sorted({c for pair in SameDayPairs for c in pair}):
         for d in range(5):
-            for t in range(totalSlot - CourseInfo[c].slotNum + 1, config['SlotNumPerday']):
-                problem += X[c][d][t] == 0
-    
+            if (X[c][d] != {}):
+                problem += pulp.lpSum(X[c][d].values()) <= D[(CourseInfo[c].instructorId, d)]
+
     return
 
 #################################################################################
-def addMustTimeC(TotalCourseNum, totalSlot, CourseInfo, X, problem):
+def sameDayPenalty(D, config):
+    '''
+    Usage: the soft same-day term of the objective function
+
+    Argument: 
+    D(dict)
+    config(dict)
+
+    Return variable: 
+    penalty(pulp expression): 'Same-day-weight' for every day an instructor with a same-day preference teaches
+    '''
+
+    return pulp.lpSum(config['Same-day-weight'] * var for var in D.values())
+
+#################################################################################
+def addMustTimeC(TotalCourseNum, CourseInfo, X, problem):
     '''
-    Usage: adding Constraint 9: mustOnDays, mustStartSlot and mustEndSlot
+    Usage: adding Constraint 7: mustOnDays. (mustStartSlot and mustEndSlot are handled by createCandidates())
 
     Argument: 
     TotalCourseNum(int)
-    totalSlot(int): total number of slot in a day
     CourseInfo(list)
     X(list)
     problem(pulp) {modified}
@@ -1308,643 +2294,3131 @@ def addMustTimeC(TotalCourseNum, totalSlot, CourseInfo, X, problem):
             d1 = CourseInfo[c].mustOnDays
             for d in [0,1,2,3,4]:
                 if (d in d1):
-                    problem += pulp.lpSum(X[c][d][t] for t in range(totalSlot)) == 1
+                    problem += pulp.lpSum(X[c][d].values()) == 1
                 else:
-                    problem += pulp.lpSum(X[c][d][t] for t in range(totalSlot)) == 0
-
-        if (CourseInfo[c].mustStartSlot != -1):
-            for d in range(5):
-                for t in range(0, CourseInfo[c].mustStartSlot):
-                    problem += X[c][d][t] == 0
-
-        if (CourseInfo[c].mustEndSlot != -1):
-            for d in range(5):
-                for t in range(CourseInfo[c].mustEndSlot - CourseInfo[c].slotNum + 2, totalSlot):
-                    problem += X[c][d][t] == 0
+                    problem += pulp.lpSum(X[c][d].values()) == 0
     
     return
 
 #################################################################################
-def addBlockC(TotalCourseNum, CourseInfo, config, X, problem):
+def defineO(SoftConflictPairs):
     '''
-    Usage: adding Constraint 10: If must-follow-block-policy is 1, we set corresponding X value
+    Usage: Define variable O. O[(c1, c2, d)] = 1 means the soft conflicted courses c1 and c2 overlap on day d. 
+           It is continuous even for the ILP problem: once X is binary, the constraints in addSoftConflictC() 
+           and the penalty in the objective make it 0 or 1.
 
     Argument: 
-    TotalCourseNum(int)
+    SoftConflictPairs(dict)
+
+    Return variable: 
+    O(dict)
+    '''
+
+    O = {}
+    for (c1, c2) in SoftConflictPairs:
+        for d in range(5):
+            O[(c1, c2, d)] = pulp.LpVariable(f"O_{c1}_{c2}_{d}", 0, 1, cat='Continuous')
+
+    return O
+
+#################################################################################
+def addSoftConflictC(SoftConflictPairs, CourseInfo, X, O, problem):
+    '''
+    Usage: adding soft conflict constraints: O[(c1, c2, d)] must be 1 if c1 and c2 overlap on day d. 
+           As in addConflictedC(), we only check the candidate starting slots of the two courses.
+
+    Argument: 
+    SoftConflictPairs(dict)
     CourseInfo(list)
-    config(list)
     X(list)
+    O(dict)
     problem(pulp) {modified}
     '''
 
-    BlockingSlot = list(range(config['BlockSchedulingStartsAtid'], config['BlockSchedulingEndsAtid'] + 1))
-    if (config['Must-follow-block-policy'] == 1):
-        for c in range(TotalCourseNum):
-            match CourseInfo[c].lengPerSession:
-                case 50:
-                    for d in range(5):
-                        for t in BlockingSlot:
-                            if (t not in config['50-min-class-start-time']):
-                                problem += X[c][d][t] == 0
-                case 80:
-                    for d in range(5):
-                        for t in BlockingSlot:
-                            if (t not in config['80-min-class-start-time']):
-                                problem += X[c][d][t] == 0
-                case 110:
-                    for d in range(5):
-                        for t in BlockingSlot:
-                            if (t not in config['110-min-class-start-time']):
-                                problem += X[c][d][t] == 0
-                case 170:
-                    for d in range(5):
-                        for t in BlockingSlot:
-                            if (t not in config['170-min-class-start-time']):
-                                problem += X[c][d][t] == 0
+    for (c1, c2) in SoftConflictPairs:
+        for d in range(5):
+            rows = set()
+            for point in sorted(set(X[c1][d]) | set(X[c2][d])):
+                v1 = coveringStarts(X[c1][d], CourseInfo[c1].slotNum, point)
+                v2 = coveringStarts(X[c2][d], CourseInfo[c2].slotNum, point)
+                if (v1 == [] or v2 == []):
+                    continue
+                key = frozenset(var.name for var in v1 + v2)
+                if (key not in rows):
+                    rows.add(key)
+                    problem += pulp.lpSum(v1 + v2) - 1 <= O[(c1, c2, d)]
 
     return
 
 #################################################################################
-def defineXY(TotalCourseNum, totalSlot, type):
+def softConflictPenalty(SoftConflictPairs, O, config):
     '''
-    Usage: Define variable X and Y. Their types can be either binary or continous depending on it is a ILP problem or LP problem.
-    
+    Usage: the penalty term of the objective function for soft conflicted courses that overlap
+
     Argument: 
-    TotalCourseNum(int)
-    totalSlot(int)
-    type(string): either "binary" or "continous"
+    SoftConflictPairs(dict)
+    O(dict)
+    config(dict)
 
     Return variable: 
-    X(list): an three-dimensional list
-    Y(list): an three-dimensional list
+    penalty(pulp expression): 'Enrollment-conflict-penalty' times the number of co-enrolled students, for every day two courses overlap
     '''
 
-    X = []
-    Y = []
-    for c in range(TotalCourseNum):
-        X_c = []
-        Y_c = []
-        for d in range(5):
-            X_d = []
-            Y_d = []
-            for t in range(totalSlot):
-                if (type == 'binary'):
-                    X_d.append(pulp.LpVariable(f"X_{c}_{d}_{t}", 0, 1, cat=pulp.LpBinary))
-                    Y_d.append(pulp.LpVariable(f"Y_{c}_{d}_{t}", 0, 1, cat=pulp.LpBinary))
-                else:
-                    X_d.append(pulp.LpVariable(f"X_{c}_{d}_{t}", 0, 1, cat='Continuous'))
-                    Y_d.append(pulp.LpVariable(f"Y_{c}_{d}_{t}", 0, 1, cat='Continuous'))
+    weight = config['Enrollment-conflict-penalty']
 
-            X_c.append(X_d)
-            Y_c.append(Y_d)
-        X.append(X_c)
-        Y.append(Y_c)
-    
-    return X, Y
+    return pulp.lpSum(weight * SoftConflictPairs[(c1, c2)] * var for (c1, c2, d), var in O.items())
 
 #################################################################################
-def readParameterForProblem(course_instructor, config):
+def defineK(Reference, X):
     '''
-    Usage: read parameters for ILP/LP problem
+    Usage: Define variable K. K[c] = 1 means course c keeps the days and the starting time it has in the reference schedule.
+           It is continuous, since addStabilityC() bounds it by binary X variables and the objective rewards it.
+           Courses whose reference time is not a candidate starting slot any more can not keep it and have no K.
 
     Argument: 
-    course_instructor(list)
-    config(dict)
+    Reference(dict): generated by read_referenceSchedule()
+    X(list)
 
     Return variable: 
-    TotalCourseNum(int)
-    totalSlot(int)
-    l1(float): weight for CW matrix
-    l2(float): weight for IW matrix
+    K(dict)
     '''
 
-    TotalCourseNum = course_instructor[6]
-    totalSlot = config['SlotNumPerday']
-    l1 = config['UWPolicyWeight']
-    l2 = config['InstructorPrefWeight']
+    K = {}
+    for c, (days, start) in Reference.items():
+        if all(start in X[c][d] for d in days):
+            K[c] = pulp.LpVariable(f"K_{c}", 0, 1, cat='Continuous')
 
-    return TotalCourseNum, totalSlot, l1, l2
+    return K
 
 #################################################################################
-def solveProblem(problem):
+def addStabilityC(Reference, X, K, config, problem):
     '''
-    Usage: this function will set time limit for ILP/LP, call a solver, and then solve it.
+    Usage: adding stability constraints: K[c] can only be 1 if course c starts at its reference time on all its reference days.
+           If 'Max-moved-courses' is not negative, at most that many courses of the reference schedule may move.
 
-    Argument:  
+    Argument: 
+    Reference(dict)
+    X(list)
+    K(dict)
+    config(dict)
     problem(pulp) {modified}
     '''
 
-    pulp.LpSolverDefault.timeLimit = 15 #Set the time limit for pulp solver
-    solver = pulp.getSolver('COIN_CMD', timeLimit=15)
-    problem.solve(solver)
+    for c, var in K.items():
+        days, start = Reference[c]
+        for d in days:
+            problem += var <= X[c][d][start]
+
+    maxMoved = config['Max-moved-courses']
+    if (maxMoved >= 0 and len(Reference) - maxMoved > 0):
+        problem += pulp.lpSum(K.values()) >= len(Reference) - maxMoved
 
     return
 
 #################################################################################
-def ILP(IW, CW, course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs):
+def stabilityReward(K, config):
     '''
-    Usage: Define an ILP problem then solve it.
+    Usage: the stability term of the objective function
 
-    Argument:  
-    IW(list): instructor preference weight matrix
-    CW(list): UW policy weight matrix
-    course_instructor(list)
+    Argument: 
+    K(dict)
     config(dict)
-    conflict_course_pairs(set)
-    NonExemptedC(list)
-    TotalNonExemptedHours(float)
-    SameDayPairs(list)
 
     Return variable: 
-    X(list)
-    Y(list)
-    problem(pulp)
+    reward(pulp expression): 'Stability-weight' for every course that keeps its reference time
     '''
 
-    # Read parameters for ILP problem
-    TotalCourseNum, totalSlot, l1, l2 = readParameterForProblem(course_instructor, config)
+    return pulp.lpSum(config['Stability-weight'] * var for var in K.values())
 
-    # Create the ILP problem
-    problem = pulp.LpProblem("ILP_Maximization_Problem", pulp.LpMaximize)
-    
-    # Initialize variable X and Y (three dimensional list)
-    X, Y = defineXY(TotalCourseNum, totalSlot, "binary")
+#################################################################################
+def referenceStart(Reference, X, K):
+    '''
+    Usage: set the values of X and K to the reference schedule, so that CBC can start from it (see writeMipStart())
 
-    # objective function
-    problem +=  pulp.lpSum((l1 * CW[c][d][t] + l2 * IW[c][d][t]) * X[c][d][t] for c in range(TotalCourseNum) for d in range(5) for t in range(totalSlot))
-    
-    #adding constraints
-    addConstraints(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, Y, problem)
+    Argument: 
+    Reference(dict)
+    X(list) {modified}
+    K(dict) {modified}
+
+    Return variable: 
+    names(set): names of the variables that are set. CBC finds values for the others, e.g., for new courses.
+    '''
+
+    names = set()
+    for c, (days, start) in Reference.items():
+        for d in range(5):
+            for t, var in X[c][d].items():
+                var.varValue = 1 if (d in days and t == start) else 0
+                names.add(var.name)
+        if (c in K):
+            K[c].varValue = 1
+            names.add(K[c].name)
+
+    return names
+
+#################################################################################
+def movedCourses(Schedule, Reference):
+    '''
+    Usage: find the courses that do not keep the days and the starting time they have in the reference schedule
+
+    Argument: 
+    Schedule(list)
+    Reference(dict)
+
+    Return variable: 
+    moved(list): names of the moved courses
+    '''
+
+    return [Schedule[c].courseName for c, (days, start) in Reference.items() if sorted(Schedule[c].days) != sorted(days) or Schedule[c].startSlot != start]
+
+#################################################################################
+def coEnrollmentOverlaps(Schedule, CourseInfo, SoftConflictPairs):
+    '''
+    Usage: find the soft conflicted courses that overlap in the final schedule
+
+    Argument: 
+    Schedule(list)
+    CourseInfo(list)
+    SoftConflictPairs(dict)
+
+    Return variable: 
+    overlaps(list): e.g., [('200', '201', 12)] means 200 and 201 overlap and 12 students took both of them
+    '''
+
+    Record = {record.courseId: record for record in Schedule}
+    overlaps = []
+    for (c1, c2), count in sorted(SoftConflictPairs.items()):
+        r1, r2 = Record[c1], Record[c2]
+        if (set(r1.days) & set(r2.days) and r1.startSlot < r2.startSlot + CourseInfo[c2].slotNum\
+            and r2.startSlot < r1.startSlot + CourseInfo[c1].slotNum):
+            overlaps.append((r1.courseName, r2.courseName, count))
+
+    return overlaps
+
+#################################################################################
+def substituteFixed(row):
+    '''
+    Usage: move the variables whose lower and upper bounds are equal to the right hand side of a constraint,
+           and remove variables with coefficient 0
+
+    Argument: 
+    row(pulp constraint): e.g., x1 + x2 + x3 <= 1
+
+    Return variable: 
+    row(pulp constraint): the row itself if it has no such variable, otherwise a new constraint with the same name,
+                          e.g., x2 + x3 <= 0 if x1 is fixed to 1
+    '''
+
+    # The row is built again instead of deleting terms, since the constraints of pulp 3 are not dicts
+    terms = [(var, coef) for var, coef in row.items() if coef != 0 and not (var.lowBound is not None and var.lowBound == var.upBound)]
+    if (len(terms) == len(row)):
+        return row
+    constant = row.constant + sum(coef * var.lowBound for var, coef in row.items() if var.lowBound is not None and var.lowBound == var.upBound)
+
+    return pulp.LpConstraint(pulp.LpAffineExpression(terms, constant=constant), sense=row.sense, name=row.name)
+
+#################################################################################
+def tightenBound(var, coef, sense, rhs):
+    '''
+    Usage: turn a constraint with a single variable (coef * var {sense} rhs) into a bound of the variable
+
+    Argument: 
+    var(pulp variable) {modified}
+    coef(float)
+    sense(int): pulp.LpConstraintLE, pulp.LpConstraintEQ or pulp.LpConstraintGE
+    rhs(float)
+
+    Return variable: 
+    changed(bool): True if a bound became tighter, None if the bounds contradict each other (the constraint is kept)
+    '''
+
+    value = rhs / coef
+    if (coef < 0):
+        sense = -sense
+    lowBound, upBound = var.lowBound, var.upBound
+    if (var.cat == pulp.LpInteger):
+        upper, lower = math.floor(value + 1e-9), math.ceil(value - 1e-9)
+    else:
+        upper, lower = value, value
+    if (sense != pulp.LpConstraintGE and (upBound is None or upper < upBound)):
+        upBound = upper
+    if (sense != pulp.LpConstraintLE and (lowBound is None or lower > lowBound)):
+        lowBound = lower
+    if (lowBound is not None and upBound is not None and lowBound > upBound):
+        return None
+    changed = (lowBound, upBound) != (var.lowBound, var.upBound)
+    var.lowBound, var.upBound = lowBound, upBound
+
+    return changed
+
+#################################################################################
+def activityRange(row):
+    '''
+    Usage: find the smallest and the largest value the left hand side of a constraint can take within the variable bounds
+
+    Argument: 
+    row(pulp constraint)
+
+    Return variable: 
+    lower(float): None if the left hand side is not bounded from below
+    upper(float): None if the left hand side is not bounded from above
+    '''
+
+    lower, upper = 0, 0
+    for var, coef in row.items():
+        low, up = (var.lowBound, var.upBound) if coef > 0 else (var.upBound, var.lowBound)
+        lower = None if lower is None or low is None else lower + coef * low
+        upper = None if upper is None or up is None else upper + coef * up
+
+    return lower, upper
+
+#################################################################################
+def canonicalKey(row):
+    '''
+    Usage: scale a constraint so that its first variable (by name) has coefficient 1
+
+    Argument: 
+    row(pulp constraint)
+
+    Return variable: 
+    key(tuple): variable names and coefficients of the scaled left hand side
+    sense(int)
+    rhs(float)
+    '''
+
+    terms = sorted((var.name, coef) for var, coef in row.items())
+    scale = terms[0][1]
+    sense = row.sense if scale > 0 else -row.sense
+
+    return tuple((name, coef / scale) for name, coef in terms), sense, -row.constant / scale
+
+#################################################################################
+def canonicalize(problem, families):
+    '''
+    Usage: remove redundant constraints before the problem is handed to the solver.
+           1. Fixed variables are moved to the right hand side. A constraint with a single variable becomes a bound of the variable,
+              and a constraint that can only hold at one end of its range (e.g., sum of X == 0) fixes all of its variables.
+              This is repeated until no bound changes. Constraints that always hold within the bounds are vacuous.
+           2. Constraints with the same left hand side are merged: an equality makes inequalities with the same left hand side
+              dominated, and of several inequalities only the tightest one is kept.
+           3. A constraint "sum of binary X <= 1" is dominated if its variables are a strict subset of another such constraint.
+           Constraints whose bounds contradict each other are kept, so the solver still reports an infeasible problem.
+
+    Argument: 
+    problem(pulp) {modified}
+    families(dict): generated by addConstraints()
+
+    Return variable: 
+    removed(dict): number of removed constraints of every family and reason, e.g., {'Session': {'dominated': 120}}
+    fixedBy(dict): maps the name of a variable whose lower and upper bounds became equal to the constraint that fixed it,
+                   e.g., {'X_3_4_12': '_C40'}
+    '''
+
+    removed = defaultdict(lambda: defaultdict(int))
+    constraints = problem.constraints
+    fixedBy = {}
+    wasFixed = set(var.name for var in problem.variables() if var.lowBound is not None and var.lowBound == var.upBound)
+
+    # Step 1: fixings and bounds
+    changed = True
+    while changed:
+        changed = False
+        for name in list(constraints):
+            row = substituteFixed(constraints[name])
+            constraints[name] = row
+            rhs = -row.constant
+            if (len(row) == 0):
+                if (row.valid(1e-9)):
+                    del constraints[name]
+                    removed[families.get(name, 'Other')]['vacuous'] += 1
+                continue
+            if (len(row) == 1):
+                var, coef = next(iter(row.items()))
+                tightened = tightenBound(var, coef, row.sense, rhs)
+                if (tightened is not None):
+                    changed = changed or tightened
+                    if (var.lowBound == var.upBound and var.name not in wasFixed and var.name not in fixedBy):
+                        fixedBy[var.name] = name
+                    del constraints[name]
+                    removed[families.get(name, 'Other')]['bound'] += 1
+                continue
+            lower, upper = activityRange(row)
+            if (row.sense == pulp.LpConstraintLE and upper is not None and upper <= rhs + 1e-9) or\
+               (row.sense == pulp.LpConstraintGE and lower is not None and lower >= rhs - 1e-9):
+                del constraints[name]
+                removed[families.get(name, 'Other')]['vacuous'] += 1
+                continue
+            atLower = row.sense != pulp.LpConstraintGE and lower is not None and abs(lower - rhs) <= 1e-9
+            atUpper = row.sense != pulp.LpConstraintLE and upper is not None and abs(upper - rhs) <= 1e-9
+            if (atLower or atUpper):
+                # Every variable must stay at the bound that gives the lowest (or the highest) value
+                for var, coef in row.items():
+                    value = var.lowBound if (coef > 0) == atLower else var.upBound
+                    var.lowBound, var.upBound = value, value
+                    if (var.name not in wasFixed and var.name not in fixedBy):
+                        fixedBy[var.name] = name
+                del constraints[name]
+                removed[families.get(name, 'Other')]['bound'] += 1
+                changed = True
+
+    # Step 2: constraints with the same left hand side
+    groups = defaultdict(list)
+    for name, row in constraints.items():
+        # A row left without variables is a contradiction kept in step 1
+        if (len(row) == 0):
+            continue
+        key, sense, rhs = canonicalKey(row)
+        groups[key].append((name, sense, rhs))
+    for key, rows in groups.items():
+        if (len(rows) == 1):
+            continue
+        equalities = [rhs for name, sense, rhs in rows if sense == pulp.LpConstraintEQ]
+        tightest = {pulp.LpConstraintLE: min([rhs for name, sense, rhs in rows if sense == pulp.LpConstraintLE], default=None),
+                    pulp.LpConstraintGE: max([rhs for name, sense, rhs in rows if sense == pulp.LpConstraintGE], default=None)}
+        kept = set()
+        for name, sense, rhs in rows:
+            if (sense == pulp.LpConstraintEQ):
+                # Two different equalities contradict each other, so both are kept
+                if (abs(rhs - equalities[0]) > 1e-9 or sense not in kept):
+                    kept.add(sense)
+                    continue
+                reason = 'duplicate'
+            elif (equalities != []):
+                if (sense == pulp.LpConstraintLE and rhs < equalities[0] - 1e-9) or (sense == pulp.LpConstraintGE and rhs > equalities[0] + 1e-9):
+                    continue
+                reason = 'dominated'
+            elif (abs(rhs - tightest[sense]) <= 1e-9):
+                if (sense not in kept):
+                    kept.add(sense)
+                    continue
+                reason = 'duplicate'
+            else:
+                reason = 'dominated'
+            del constraints[name]
+            removed[families.get(name, 'Other')][reason] += 1
+
+    # Step 3: set packing constraints contained in larger ones
+    packing = {}
+    for name, row in constraints.items():
+        if (row.sense != pulp.LpConstraintGE and row.constant == -1 and len(row) > 1 and
+            all(coef == 1 and var.cat == pulp.LpInteger and var.lowBound == 0 and var.upBound == 1 for var, coef in row.items())):
+            packing[name] = set(var.name for var in row)
+    rowsOf = defaultdict(set)
+    for name, names in packing.items():
+        for varName in names:
+            rowsOf[varName].add(name)
+    for name, names in packing.items():
+        if (constraints[name].sense == pulp.LpConstraintEQ):
+            continue
+        candidates = set.intersection(*sorted((rowsOf[varName] for varName in names), key=len))
+        if any(len(packing[other]) > len(names) for other in candidates):
+            del constraints[name]
+            for varName in names:
+                rowsOf[varName].discard(name)
+            removed[families.get(name, 'Other')]['dominated'] += 1
+
+    # A variable that is neither in a constraint nor in the objective function has no column in the MPS file,
+    # so its bound could not be written. A coefficient 0 keeps the column.
+    used = set(var.name for row in constraints.values() for var in row)
+    for var in problem.variables():
+        if (var.name not in used and var not in problem.objective):
+            problem.objective[var] = 0
+
+    return removed, fixedBy
+
+#################################################################################
+def describeConstraint(name, family, row, CourseInfo, config):
+    '''
+    Usage: describe which input a constraint comes from, so that it can be shown to users
+
+    Argument: 
+    name(string): name of the constraint, e.g., '_C12' or 'TenPercent_4'
+    family(string): e.g., 'Conflict', see addConstraints()
+    row(pulp constraint)
+    CourseInfo(list)
+    config(dict)
+
+    Return variable: 
+    description(string): e.g., 'ConflictCourses: 442/542 and 450/550 can not overlap on T at 10:30'
+    '''
+
+    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
+    slotLength = config['Slot-length-in-minutes']
+    # X variables are named X_c_d_t, see defineX()
+    xs = [tuple(int(i) for i in var.name.split('_')[1:]) for var in row if var.name.startswith('X_')]
+    courseIds = sorted(set(c for c, d, t in xs))
+    courses = [CourseInfo[c].courseName for c in courseIds]
+    days = ''.join(intlist2days(sorted(set(d for c, d, t in xs))))
+    latest = timeSlotId2ISlot(start_time, max(t for c, d, t in xs), slotLength) if xs != [] else '-'
+
+    match family:
+        case 'Session':
+            if (len(days) > 1):
+                return f"CourseInfo: {courses[0]} meets {CourseInfo[courseIds[0]].sessionsPerWeek} times a week"
+            return f"CourseInfo: {courses[0]} meets at most once on {days}"
+        case 'Twice-a-week':
+            return f"CourseInfo: {courses[0]} meets twice a week, on MW or TR at the same time"
+        case 'Three-times-a-week':
+            return f"CourseInfo: {courses[0]} meets three times a week, on MWF at the same time"
+        case 'Conflict':
+            # All sessions in the constraint are taught at the latest starting slot
+            return f"ConflictCourses: {' and '.join(courses)} can not overlap on {days} at {latest}"
+        case '10-percent':
+            hour = timeSlotId2ISlot(start_time, int(name.split('_')[1]), slotLength)
+            return f"config: 10% rule for the hour starting at {hour}"
+        case 'Same-day':
+            return f"InstructorPref: {' and '.join(courses)} are taught on the same days ({days})"
+        case 'Must-on-days':
+            mustOnDays = ''.join(intlist2days(CourseInfo[courseIds[0]].mustOnDays))
+            return f"CoursesThisQuarter: {courses[0]} must meet on {mustOnDays} ({days})"
+        case 'Soft-conflict':
+            return f"Enrollment: {' and '.join(courses)} share students, so overlapping on {days} costs points"
+        case 'Soft-same-day':
+            return f"InstructorPref: the instructor of {courses[0]} teaches on {days}, and every teaching day costs points"
+        case 'Stability':
+            if (courses == []):
+                return f"config: at most {config['Max-moved-courses']} courses of ReferenceSchedule may move"
+            return f"ReferenceSchedule: {courses[0]} keeps {days} {latest}"
+
+    return f"{family}: {', '.join(courses)}"
+
+#################################################################################
+def defineX(Candidates, type):
+    '''
+    Usage: Define variable X. Its type can be either binary or continous depending on it is a ILP problem or LP problem.
+    
+    Argument: 
+    Candidates(list): candidate starting slots of every course, see createCandidates()
+    type(string): either "binary" or "continous"
+
+    Return variable: 
+    X(list): X[c][d] is a dictionary that maps a candidate starting slot t to variable X_c_d_t
+    '''
+
+    X = []
+    for c in range(len(Candidates)):
+        X_c = []
+        for d in range(5):
+            X_d = {}
+            for t in Candidates[c]:
+                if (type == 'binary'):
+                    X_d[t] = pulp.LpVariable(f"X_{c}_{d}_{t}", 0, 1, cat=pulp.LpBinary)
+                else:
+                    X_d[t] = pulp.LpVariable(f"X_{c}_{d}_{t}", 0, 1, cat='Continuous')
+            X_c.append(X_d)
+        X.append(X_c)
+    
+    return X
+
+#################################################################################
+def readParameterForProblem(course_instructor, config):
+    '''
+    Usage: read parameters for ILP/LP problem
+
+    Argument: 
+    course_instructor(list)
+    config(dict)
+
+    Return variable: 
+    TotalCourseNum(int)
+    totalSlot(int)
+    l1(float): weight for CW matrix
+    l2(float): weight for IW matrix
+    '''
+
+    TotalCourseNum = course_instructor[6]
+    totalSlot = config['SlotNumPerday']
+    l1 = config['UWPolicyWeight']
+    l2 = config['InstructorPrefWeight']
+
+    return TotalCourseNum, totalSlot, l1, l2
+
+#################################################################################
+class SolverFile:
+    def __init__(self, path, maximize, variables, constraintNames):
+        self.path = path #string, e.g., '/dev/shm/time-schedule-x1y2/problem.mps'
+        self.maximize = maximize #bool, True for a maximization problem
+        self.variables = variables #list of pulp variables, variables[i] is column Xi in the MPS file
+        self.constraintNames = constraintNames #list of string, constraintNames[i] is the name of row Ci in problem.constraints
+
+#################################################################################
+class SolverBackend:
+    def __init__(self, name, path, reason):
+        self.name = name #string, a key of SolverBackends, e.g., 'CBC'
+        self.path = path #string, path of the solver binary, e.g., '/usr/bin/cbc'
+        self.reason = reason #string, why the backend was chosen, e.g., 'the only backend found'
+
+# Solver backends in the order they are preferred without a calibration file, with the pulp solver that finds each one.
+# The CBC backends solve the MPS file (see cbcCommand()); GLPK is run through pulp, see solveWithGLPK().
+SolverBackends = {'CBC': 'COIN_CMD', 'CBC-bundled': 'PULP_CBC_CMD', 'GLPK': 'GLPK_CMD'}
+
+# The backend of this run, see chooseSolver()
+Backend = None
+
+#################################################################################
+class Relaxation:
+    def __init__(self, duals, reducedCosts, descriptions, fixedBy):
+        self.duals = duals #dict, dual value of every constraint in the LP relaxation, e.g., {'_C12': 0.5}
+        self.reducedCosts = reducedCosts #dict, reduced cost of every variable in the LP relaxation, e.g., {'X_3_1_4': -0.33}
+        self.descriptions = descriptions #dict, the input every constraint comes from, e.g., {'_C12': 'ConflictCourses: 442/542 and 450/550 can not overlap on T at 10:30'}
+        self.fixedBy = fixedBy #dict, the constraint that fixed a variable before solving, see canonicalize()
+
+#################################################################################
+class PoolSubspace:
+    def __init__(self, kept, forbidden, parent):
+        self.kept = kept #dict, maps a course id to the names of the X variables it keeps, e.g., {3: frozenset({'X_3_0_4', 'X_3_2_4'})}
+        self.forbidden = forbidden #list of (course id, names of X variables), the course can not take all of them again
+        self.parent = parent #list, the assignment this subspace was split from, see currentAssignment(). CBC starts from it.
+
+#################################################################################
+def writeProblemFile(problem):
+    '''
+    Usage: write the problem once as a fixed-format MPS file with short names (X0000001, C0000001), so that the
+           LP relaxation and the ILP problem are solved from the same file. The file is put on tmpfs (/dev/shm)
+           if the machine has it, so writing and reading it does not touch the disk.
+
+    Argument:
+    problem(pulp)
+
+    Return variable:
+    solverFile(SolverFile)
+    '''
+
+    tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+    path = os.path.join(tempfile.mkdtemp(prefix='time-schedule-', dir=tmp_dir), 'problem.mps')
+    variables = problem.writeMPS(path, rename=1)[0]
+
+    return SolverFile(path, problem.sense == pulp.LpMaximize, list(variables), list(problem.constraints))
+
+#################################################################################
+def removeProblemFile(solverFile):
+    '''
+    Usage: remove the MPS file and the solution files next to it
+
+    Argument:
+    solverFile(SolverFile)
+    '''
+
+    shutil.rmtree(os.path.dirname(solverFile.path), ignore_errors=True)
+
+    return
+
+#################################################################################
+# Lines of CBC's log that tell how the search goes, see parseCBCLine()
+CBCLogPatterns = [
+    ('lp', re.compile(r'^Optimal objective (\S+) - \d+ iterations'), ['bound']),
+    ('root', re.compile(r'^Continuous objective value is (\S+) - '), ['bound']),
+    ('incumbent', re.compile(r'^Cbc00(?:04|12|16)I Integer solution of (\S+) found .*and (\d+) nodes'), ['incumbent', 'nodes']),
+    ('progress', re.compile(r'^Cbc0010I After (\d+) nodes, \d+ on tree, (\S+) best solution, best possible (\S+)'), ['nodes', 'incumbent', 'bound']),
+    ('done', re.compile(r'^Cbc0001I Search completed - best objective (\S+), took \d+ iterations and (\d+) nodes'), ['incumbent', 'nodes']),
+    ('stopped', re.compile(r'^Cbc0005I Partial search - best objective (\S+) \(best possible (\S+)\), took \d+ iterations and (\d+) nodes'), ['incumbent', 'bound', 'nodes']),
+]
+
+#################################################################################
+def parseCBCLine(line, state):
+    '''
+    Usage: update the state of the search from one line of CBC's log
+
+    Argument:
+    line(string): e.g., 'Cbc0010I After 100 nodes, 12 on tree, 19 best solution, best possible 19.5 (1.20 seconds)'
+    state(dict) {modified}: e.g., {'incumbent': 19.0, 'bound': 19.5, 'nodes': 100}
+
+    Return variable:
+    event(string): e.g., 'incumbent', 'progress' or None if the line does not tell anything about the search
+    '''
+
+    for event, pattern, fields in CBCLogPatterns:
+        match = pattern.match(line)
+        if match:
+            for field, value in zip(fields, match.groups()):
+                value = int(value) if field == 'nodes' else float(value)
+                # CBC writes 1e+50 as the best solution before it finds one
+                if (field != 'incumbent' or abs(value) < 1e49):
+                    state[field] = value
+            if (event == 'done' and 'incumbent' in state):
+                state['bound'] = state['incumbent']
+            return event
+
+    return None
+
+#################################################################################
+def solverStatus(phase, seconds, state):
+    '''
+    Usage: one row of the solver trace, also shown as the live status line
+
+    Argument:
+    phase(string): e.g., 'LP' or 'ILP'
+    seconds(float): time since CBC started
+    state(dict)
+
+    Return variable:
+    row(list): [phase, seconds, incumbent, bound, gap, nodes], unknown values are ''
+    '''
+
+    incumbent = state.get('incumbent', '')
+    bound = state.get('bound', '')
+    gap = ''
+    if (incumbent != '' and bound != ''):
+        gap = abs(bound - incumbent) / max(abs(incumbent), 1e-9)
+
+    return [phase, round(seconds, 3), incumbent, bound, gap, state.get('nodes', 0)]
+
+#################################################################################
+def streamCBC(cmds, phase, trace):
+    '''
+    Usage: run CBC and read its log while it runs. Every line is passed on to stdout as before. Lines about the search
+           (incumbent, best bound, gap, node count) are added to the solver trace, and if stderr is a terminal,
+           shown there as a one-line live status. CBC is run on a pseudo terminal where possible, since it only
+           writes its log in large blocks to a pipe.
+
+    Argument:
+    cmds(list): CBC command line
+    phase(string): e.g., 'LP' or 'ILP'
+    trace(list) {modified}: rows of the solver trace, see writeSolverTrace()
+
+    Return variable:
+    returncode(int)
+    '''
+
+    try:
+        import pty
+        master, slave = pty.openpty()
+        process = subprocess.Popen(cmds, stdin=subprocess.DEVNULL, stdout=slave)
+        os.close(slave)
+        output = os.fdopen(master, 'rb', buffering=0)
+    except (ImportError, OSError):
+        process = subprocess.Popen(cmds, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+        output = process.stdout
+
+    live = sys.stderr.isatty()
+    start = time.perf_counter()
+    state = {}
+    pending = b''
+    while True:
+        try:
+            data = output.read(65536)
+        except OSError: # the pseudo terminal is closed when CBC exits
+            data = b''
+        if not data:
+            break
+        lines = (pending + data).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            line = line.decode(errors='replace').rstrip('\r')
+            sys.stdout.write(line + '\n')
+            event = parseCBCLine(line, state)
+            if event:
+                row = solverStatus(phase, time.perf_counter() - start, state)
+                trace.append(row[:2] + [event] + row[2:])
+                if live:
+                    incumbent, bound, gap, nodes = row[2:]
+                    print(f"\r{phase} {row[1]:7.1f}s  incumbent {incumbent}  bound {bound}  gap "\
+                          f"{gap if gap == '' else f'{gap:.2%}'}  nodes {nodes}   ", end='', file=sys.stderr, flush=True)
+    if pending:
+        sys.stdout.write(pending.decode(errors='replace').rstrip('\r') + '\n')
+    output.close()
+    if (live and state):
+        print('', file=sys.stderr)
+
+    return process.wait()
+
+#################################################################################
+def writeSolverTrace(trace, output_dir):
+    '''
+    Usage: write the solver trace as a time series, e.g., to see how fast the gap closes on instances of some size
+
+    Argument:
+    trace(list)
+    output_dir(string)
+
+    File output:
+    solver-trace.csv
+
+    Format for solver-trace.csv file:
+    ###
+    phase,seconds,event,incumbent,bound,gap,nodes
+    ILP,0.061,incumbent,19.0,19.5,0.02631578947368421,0
+    ###
+    '''
+
+    with open(output_dir+"solver-trace.csv", "w", newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['phase', 'seconds', 'event', 'incumbent', 'bound', 'gap', 'nodes'])
+        writer.writerows(trace)
+
+    return
+
+#################################################################################
+def objectiveGranule(objective):
+    '''
+    Usage: find the granularity of the objective function, the largest number g such that every coefficient is a multiple of g.
+           With the shipped settings the IW and CW coefficients are multiples of 1/6, so the objective value of any schedule is too.
+           The continuous variables of soft conflicts are integral at the optimum, so their coefficients count as well.
+
+    Argument:
+    objective(pulp expression)
+
+    Return variable:
+    granule(float): None if a coefficient is not a fraction with a small denominator
+    '''
+
+    granule = Fraction(0)
+    for coef in objective.values():
+        fraction = Fraction(coef).limit_denominator(10000)
+        if (abs(fraction - coef) > 1e-9 * max(1, abs(coef))):
+            return None
+        # gcd(a/b, c/d) = gcd(ad, cb) / bd
+        granule = Fraction(math.gcd(granule.numerator * fraction.denominator, fraction.numerator * granule.denominator),
+                           granule.denominator * fraction.denominator)
+    if (granule == 0):
+        return None
+
+    return float(granule)
+
+#################################################################################
+def roundBound(bound, granule):
+    '''
+    Usage: round an upper bound down to the closest multiple of granule. No schedule has an objective value between the two.
+
+    Argument:
+    bound(float)
+    granule(float): None if unknown
+
+    Return variable:
+    bound(float)
+    '''
+
+    if (granule is None):
+        return bound
+
+    return granule * math.floor(bound / granule + 1e-6)
+
+#################################################################################
+def cbcCommand(solverFile, relaxation, timeLimit, granule, mipStart):
+    '''
+    Usage: build the command line that runs CBC on the MPS file
+
+    Argument:
+    solverFile(SolverFile)
+    relaxation(bool): if True, only solve the LP relaxation (integer markers in the file are ignored)
+    timeLimit(float): time limit in seconds
+    granule(float): granularity of the objective function, None if unknown. CBC stops as soon as the incumbent
+                    is within one granule of its bound, and prunes nodes that can not improve it by a granule.
+    mipStart(string): a solution file CBC starts from, see writeMipStart(). None to start from nothing.
+
+    Return variable:
+    cmds(list)
+    solution_file(string): the solution file CBC will write
+    '''
+
+    solution_file = solverFile.path[:-len('.mps')] + ('-lp.sol' if relaxation else '-ilp.sol')
+    cmds = [Backend.path, solverFile.path] + (['max'] if solverFile.maximize else [])
+    cmds += ['sec', str(timeLimit), 'timeMode', 'elapsed']
+    if (granule is not None and not relaxation):
+        # Slightly less than a granule, so that rounding errors in CBC do not hide a better schedule
+        cmds += ['allowableGap', repr(granule * 0.999), 'increment', repr(granule * 0.999)]
+    if (mipStart is not None):
+        cmds += ['mipStart', mipStart]
+    # Row duals are only needed for the LP relaxation
+    cmds += ['initialSolve', 'printingOptions', 'all'] if relaxation else ['branch', 'printingOptions', 'normal']
+    cmds += ['solution', solution_file]
+
+    return cmds, solution_file
+
+#################################################################################
+def runCBC(solverFile, relaxation, timeLimit, phase, trace, granule, mipStart):
+    '''
+    Usage: run CBC on the MPS file. CBC's log goes to stdout as before.
+
+    Argument:
+    solverFile(SolverFile)
+    relaxation(bool)
+    timeLimit(int): time limit in seconds
+    phase(string): e.g., 'LP' or 'ILP'
+    trace(list) {modified}: rows of the solver trace
+    granule(float): see cbcCommand()
+    mipStart(string): see cbcCommand()
+
+    Return variable:
+    solution_file(string): the solution file written by CBC
+    '''
+
+    cmds, solution_file = cbcCommand(solverFile, relaxation, timeLimit, granule, mipStart)
+    sys.stdout.flush()
+    if (streamCBC(cmds, phase, trace) != 0 or not os.path.exists(solution_file)):
+        sys.exit(f"Fail to run CBC on {solverFile.path}.")
+
+    return solution_file
+
+#################################################################################
+def readSolution(solution_file, solverFile):
+    '''
+    Usage: read a CBC solution file. Names in the file are X or C followed by the column or row index,
+           so a line is mapped back to its variable or constraint without a dictionary lookup by name.
+
+    Argument:
+    solution_file(string)
+    solverFile(SolverFile)
+
+    Return variable:
+    status(string): e.g., 'Optimal', 'Infeasible', 'Not Solved'
+    objective(float): the objective value CBC reports
+    values(list): values[i] is the value of solverFile.variables[i], 0 if the file does not list it
+    duals(dict): maps a constraint name to its dual value, empty if the file has no rows
+    reducedCosts(dict): maps a variable name to its reduced cost. Only the LP relaxation is printed with all variables.
+    '''
+
+    CBCStatus = {'Optimal': 'Optimal', 'Infeasible': 'Infeasible', 'Integer': 'Infeasible', 'Unbounded': 'Unbounded', 'Stopped': 'Not Solved'}
+    values = [0.0] * len(solverFile.variables)
+    duals = {}
+    reducedCosts = {}
+    with open(solution_file) as file:
+        first_line = file.readline()
+        status = CBCStatus.get(first_line.split()[0], 'Undefined')
+        try:
+            objective = float(first_line.rsplit(None, 1)[-1])
+        except ValueError:
+            objective = None
+        for line in file:
+            fields = line.split()
+            if (len(fields) < 4):
+                break
+            # Lines start with '**' if the value is infeasible
+            if (fields[0] == '**'):
+                fields = fields[1:]
+            name = fields[1]
+            if (name[0] == 'X'):
+                values[int(name[1:])] = float(fields[2])
+                reducedCosts[solverFile.variables[int(name[1:])].name] = float(fields[3])
+            elif (name[0] == 'C'):
+                duals[solverFile.constraintNames[int(name[1:])]] = float(fields[3])
+
+    return status, objective, values, duals, reducedCosts
+
+#################################################################################
+def solveFromFile(problem, solverFile, relaxation, metrics, trace, phase, mipStart):
+    '''
+    Usage: solve the problem (or its LP relaxation) from an MPS file written by writeProblemFile().
+           The values of the variables are stored back into the pulp problem, and for the ILP problem the status as well.
+
+    Argument:
+    problem(pulp) {modified}
+    solverFile(SolverFile)
+    relaxation(bool)
+    metrics(dict) {modified}: time of running CBC and of reading its solution, e.g., 'LP-solve-seconds' and 'LP-read-seconds',
+                              and for the ILP problem the node count and when the best solution was found
+    trace(list) {modified}: rows of the solver trace
+    phase(string): e.g., 'LP' or 'ILP'
+    mipStart(string): a solution file CBC starts from, None to start from nothing
+
+    Return variable:
+    status(string)
+    objective(float)
+    duals(dict)
+    reducedCosts(dict)
+    '''
+
+    if (Backend.name == 'GLPK'):
+        return solveWithGLPK(problem, relaxation, metrics, phase)
+    solve_start = time.perf_counter()
+    first_row = len(trace)
+    granule = None if relaxation else objectiveGranule(problem.objective)
+    if (granule is not None):
+        metrics[f'{phase}-objective-granule'] = granule
+    solution_file = runCBC(solverFile, relaxation, 15, phase, trace, granule, mipStart)
+    read_start = time.perf_counter()
+    status, objective, values, duals, reducedCosts = readSolution(solution_file, solverFile)
+    for var, value in zip(solverFile.variables, values):
+        var.varValue = value
+    if not relaxation:
+        problem.assignStatus({name: code for code, name in pulp.LpStatus.items()}[status])
+        incumbents = [row for row in trace[first_row:] if row[2] == 'incumbent']
+        if (incumbents != []):
+            metrics[f'{phase}-time-to-best-seconds'] = incumbents[-1][1]
+        if (len(trace) > first_row):
+            metrics[f'{phase}-nodes'] = trace[-1][6]
+    metrics[f'{phase}-solve-seconds'] = metrics.get(f'{phase}-solve-seconds', 0) + read_start - solve_start
+    metrics[f'{phase}-read-seconds'] = metrics.get(f'{phase}-read-seconds', 0) + time.perf_counter() - read_start
+
+    return status, objective, duals, reducedCosts
+
+#################################################################################
+def solveProblem(problem, metrics, trace, phase):
+    '''
+    Usage: write the problem to a file, solve it with CBC (time limit 15 seconds), then remove the file.
+
+    Argument:  
+    problem(pulp) {modified}
+    metrics(dict) {modified}
+    trace(list) {modified}: rows of the solver trace
+    phase(string): name of the problem in metrics and in the solver trace, e.g., 'Room-ILP'
+    '''
+
+    solverFile = writeProblemFile(problem)
+    solveFromFile(problem, solverFile, False, metrics, trace, phase, None)
+    removeProblemFile(solverFile)
+
+    return
+
+#################################################################################
+def solveWithGLPK(problem, relaxation, metrics, phase):
+    '''
+    Usage: solveFromFile() for the GLPK backend. pulp writes an LP file of its own and runs glpsol on it (time limit 
+           15 seconds), and glpsol's log goes to stdout. GLPK gives no duals and no reduced costs, does not start from 
+           a MIP start and adds nothing to the solver trace.
+
+    Argument:
+    problem(pulp) {modified}
+    relaxation(bool)
+    metrics(dict) {modified}
+    phase(string)
+
+    Return variable:
+    same as solveFromFile(), duals and reducedCosts are empty
+    '''
+
+    solve_start = time.perf_counter()
+    sys.stdout.flush()
+    status = pulp.LpStatus[problem.solve(pulp.GLPK_CMD(path=Backend.path, mip=not relaxation, timeLimit=15))]
+    metrics[f'{phase}-solve-seconds'] = metrics.get(f'{phase}-solve-seconds', 0) + time.perf_counter() - solve_start
+
+    return status, pulp.value(problem.objective), {}, {}
+
+#################################################################################
+def detectSolvers():
+    '''
+    Usage: find the backends in SolverBackends that pulp can run on this machine
+
+    Return variable:
+    Available(dict): maps a backend name to the path of its binary, e.g., {'CBC': '/usr/bin/cbc', 'GLPK': '/usr/bin/glpsol'}
+    '''
+
+    Available = {}
+    for name, pulpName in SolverBackends.items():
+        solver = pulp.getSolver(pulpName, msg=False)
+        if (solver.available()):
+            Available[name] = solver.path
+
+    return Available
+
+#################################################################################
+def instanceFeatures(course_instructor, conflict_course_pairs, TotalNonExemptedHours, config):
+    '''
+    Usage: describe the problem with a few numbers that are known before it is built, for chooseSolver()
+
+    Argument:
+    course_instructor(list)
+    conflict_course_pairs(set)
+    TotalNonExemptedHours(float)
+    config(dict)
+
+    Return variable:
+    features(dict): 'Courses': number of courses. 'Conflict-density': conflicted pairs over all pairs of courses.
+                    'Rule-tightness': non-exempted hours over what the 10%-rule allows in all hours together, 
+                    above 1 no schedule meets the rule. e.g., {'Courses': 38, 'Conflict-density': 0.0825, 'Rule-tightness': 0.837}
+    '''
+
+    courseNum = course_instructor[6]
+    hourNum = len(range(config['10PercRuleStartsAtid'], config['10PercRuleEndsAtid'] + 1, 2 * config['SlotsPerRuleCell']))
+    target = math.ceil(config['RulePercentage'] * TotalNonExemptedHours)
+    features = {'Courses': courseNum,
+                'Conflict-density': round(2 * len(conflict_course_pairs) / (courseNum * (courseNum - 1)), 4) if courseNum > 1 else 0,
+                'Rule-tightness': round(TotalNonExemptedHours / (hourNum * target), 3) if hourNum * target > 0 else 0}
+
+    return features
+
+#################################################################################
+def chooseSolver(config, Available, features, needsCBC):
+    '''
+    Usage: choose the solver backend of this run. 'Solver' in the config file names a backend, or is 'auto'. With 'auto',
+           the backend that did best on the calibrated instance closest to this one is chosen, see bin/benchmark.py --calibrate;
+           without a calibration file, the first backend found in SolverBackends. GLPK gives no reduced costs and takes 
+           no MIP start, so Reduced-cost-fixing and Heuristic-start are turned off with it.
+
+    Argument:
+    config(dict) {modified}: Reduced-cost-fixing and Heuristic-start if the backend is GLPK
+    Available(dict): generated by detectSolvers()
+    features(dict): generated by instanceFeatures()
+    needsCBC(bool): True if --prices or --alternatives is used, they run CBC on the MPS file
+
+    Return variable:
+    backend(SolverBackend)
+    '''
+
+    candidates = [name for name in Available if not needsCBC or name != 'GLPK']
+    if (candidates == []):
+        sys.exit(f"No solver found. Please install one of {', '.join(SolverBackends)}" + (" (--prices and --alternatives need CBC)." if needsCBC else "."))
+
+    if (config['Solver'] != 'auto'):
+        if (config['Solver'] not in candidates):
+            sys.exit(f"Solver {config['Solver']} is not available" + (" for --prices and --alternatives" if needsCBC else "") + f". Found: {', '.join(candidates)}.")
+        name, reason = config['Solver'], 'set in the config file'
+    elif (len(candidates) == 1):
+        name, reason = candidates[0], 'the only backend found'
+    elif (config['Solver-calibration'] == '-'):
+        name, reason = candidates[0], f"the first one found of {', '.join(SolverBackends)}, no calibration file"
+    else:
+        # The last row of an instance and a backend counts, so a calibration file can simply be appended to
+        Results = defaultdict(dict)
+        Features = {}
+        with open(config['Solver-calibration'], newline='') as file:
+            for row in csv.DictReader(file):
+                # A run that failed before the problem was read has no features
+                if (row['backend'] not in candidates or '' in [row[key] for key in features]):
+                    continue
+                objective = float(row['objective']) if row['objective'] else -math.inf
+                seconds = float(row['solve-seconds']) if row['solve-seconds'] else math.inf
+                Results[row['case']][row['backend']] = (row['status'] == 'Optimal', objective, seconds)
+                Features[row['case']] = {key: float(row[key]) for key in features}
+        if (Results == {}):
+            name, reason = candidates[0], f"the first one found of {', '.join(SolverBackends)}, {config['Solver-calibration']} has none of them"
+        else:
+            distance = lambda case: sum(abs(value - Features[case][key]) / max(abs(value), abs(Features[case][key]), 1e-9) for key, value in features.items())
+            case = min(Results, key=distance)
+            scores = Results[case]
+            # Solved to optimality first, then the better schedule, then the faster one
+            name = min(scores, key=lambda backend: (not scores[backend][0], -scores[backend][1], scores[backend][2]))
+            closest = ', '.join(f'{key} {value:g}' for key, value in Features[case].items())
+            reason = f"best on {case} ({closest}) in {config['Solver-calibration']}: "\
+                + ', '.join(f'{backend} {score[2]:.2f}s' if score[0] else f'{backend} not solved' for backend, score in scores.items())
+
+    if (name == 'GLPK' and (config['Reduced-cost-fixing'] == 1 or config['Heuristic-start'] == 1)):
+        config['Reduced-cost-fixing'] = 0
+        config['Heuristic-start'] = 0
+        reason += '; Reduced-cost-fixing and Heuristic-start are off, GLPK gives no reduced costs and takes no MIP start'
+
+    return SolverBackend(name, Available[name], reason)
+
+#################################################################################
+def coursePatterns(c, CourseInfo, X):
+    '''
+    Usage: list the ways a course can be taught: the days it meets and one starting slot for all of them,
+           following the day patterns of addTwiceAWeekC(), addThreeTimesAWeekC() and addMustTimeC().
+           Variables fixed by canonicalize() are respected.
+
+    Argument: 
+    c(int): course id
+    CourseInfo(list)
+    X(list)
+
+    Return variable:
+    Patterns(list): list of (days, start, variables), e.g., [((0, 2), 4, [X_3_0_4, X_3_2_4]), ...]
+    '''
+
+    sessionsPerWeek = CourseInfo[c].sessionsPerWeek
+    if (sessionsPerWeek == 2):
+        DaySets = [(1, 3)] if CourseInfo[c].largeClass == 1 else [(0, 2), (1, 3)]
+    elif (sessionsPerWeek == 3):
+        DaySets = [(0, 2, 4)]
+    else:
+        DaySets = list(itertools.combinations(range(5), sessionsPerWeek))
+    if (CourseInfo[c].mustOnDays != []):
+        DaySets = [days for days in DaySets if sorted(days) == sorted(CourseInfo[c].mustOnDays)]
+    mustTake = {var.name for d in range(5) for var in X[c][d].values() if var.lowBound == 1}
+
+    Patterns = []
+    for days in DaySets:
+        for t in sorted(set.intersection(*(set(X[c][d]) for d in days))):
+            variables = [X[c][d][t] for d in days]
+            if (all(var.upBound != 0 for var in variables) and mustTake <= {var.name for var in variables}):
+                Patterns.append((days, t, variables))
+
+    return Patterns
+
+#################################################################################
+def completeContinuous(problem):
+    '''
+    Usage: once every binary variable has a value, give each continuous variable (O and K) the best value its constraints 
+           allow, so that the objective value of a schedule built outside of CBC can be computed
+
+    Argument: 
+    problem(pulp) {modified}: varValue of the continuous variables
+    '''
+
+    rowsOf = defaultdict(list)
+    for row in problem.constraints.values():
+        for var, coef in row.items():
+            if (var.cat == 'Continuous'):
+                rowsOf[var.name].append((row, coef))
+    for var in problem.variables():
+        if (var.cat != 'Continuous'):
+            continue
+        low = var.lowBound if var.lowBound is not None else -math.inf
+        up = var.upBound if var.upBound is not None else math.inf
+        for row, coef in rowsOf[var.name]:
+            rest = sum(coef2 * (var2.varValue or 0) for var2, coef2 in row.items() if var2 is not var) + row.constant
+            bound = -rest / coef
+            if (row.sense == pulp.LpConstraintEQ):
+                low, up = max(low, bound), min(up, bound)
+            elif ((row.sense == pulp.LpConstraintLE) == (coef > 0)):
+                up = min(up, bound)
+            else:
+                low = max(low, bound)
+        var.varValue = up if problem.objective.get(var, 0) > 0 else low
+
+    return
+
+#################################################################################
+def greedyIncumbent(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, problem, Guide):
+    '''
+    Usage: build a schedule without a solver. Courses with the fewest ways left to be taught go first, and each takes 
+           the way with the most objective points that does not overlap a conflicted course, break a hard same-day pair
+           or push an hour over the 10% rule. The schedule is then checked against every constraint of the problem.
+           With a Guide (the LP solution), this rounds the LP solution: courses the LP solution already teaches at one
+           starting slot go first, and every course takes the way with the largest LP value before the most points.
+
+    Argument: 
+    course_instructor(list)
+    config(dict)
+    conflict_course_pairs(set)
+    NonExemptedC(list)
+    TotalNonExemptedHours(float)
+    SameDayPairs(list)
+    X(list)
+    problem(pulp) {modified}: varValue of every variable is set to the schedule
+    Guide(dict): LP value of every X variable, e.g., {'X_3_0_4': 0.5}. None to follow the objective only.
+
+    Return variable:
+    objective(float): objective value of the schedule, None if the greedy schedule is not feasible
+    '''
+
+    CourseInfo = course_instructor[5]
+    TotalCourseNum = course_instructor[6]
+    Partners = defaultdict(list)
+    for (c1, c2) in conflict_course_pairs:
+        Partners[c1].append(c2)
+        Partners[c2].append(c1)
+    SameDay = defaultdict(list)
+    if (config['Treat-same-day-preference-as-hard-constraint'] == 1):
+        for (c1, c2) in SameDayPairs:
+            SameDay[c1].append((c1, c2))
+            SameDay[c2].append((c1, c2))
+    NonExempted = set(NonExemptedC)
+    target = math.ceil(config['RulePercentage'] * TotalNonExemptedHours)
+    slotsPerCell = config['SlotsPerRuleCell']
+    Cells = range(config['10PercRuleStartsAtid'], config['10PercRuleEndsAtid'] + 1, 2 * slotsPerCell)
+    load = defaultdict(int)
+    Counts = {}
+
+    def cellCounts(c, days, t):
+        if (c not in NonExempted):
+            return {}
+        if ((c, days, t) not in Counts):
+            Counts[(c, days, t)] = {cell: len(days) * ruleCellCount(t, CourseInfo[c].slotNum, cell, 2, slotsPerCell) for cell in Cells}
+        return Counts[(c, days, t)]
+
+    def fits(c, days, t):
+        for c2 in Partners[c]:
+            if (c2 in Placed and set(days) & set(Placed[c2][0])\
+                and t < Placed[c2][1] + CourseInfo[c2].slotNum and Placed[c2][1] < t + CourseInfo[c].slotNum):
+                return False
+        for (c1, c2) in SameDay[c]:
+            Days = {c: days, **{other: Placed[other][0] for other in (c1, c2) if other in Placed}}
+            if (c1 in Days and c2 in Days and not set(Days[c1]) <= set(Days[c2])):
+                return False
+        return all(load[cell] + count <= 2 * target for cell, count in cellCounts(c, days, t).items())
+
+    def mass(pattern):
+        # A pattern is only taken as a whole, so its LP value is the smallest one of its days
+        return min(Guide.get(var.name, 0) for var in pattern[2]) if Guide is not None else 0
+
+    def score(c, pattern):
+        # Among the patterns with the most points, the one that leaves the most room under the 10% rule
+        return (round(mass(pattern), 6), round(sum(problem.objective.get(var, 0) for var in pattern[2]), 9),\
+                -max([load[cell] + count for cell, count in cellCounts(c, *pattern[:2]).items()], default=0))
+
+    # The course with the fewest patterns left that fit the courses placed so far goes next (after the courses that are
+    # integral in the LP solution, if there is a Guide). If a course has no pattern left,
+    # start again with that course first (at most 10 times).
+    Patterns = {c: coursePatterns(c, CourseInfo, X) for c in range(TotalCourseNum)}
+    maxCount = max([count for c in NonExemptedC for pattern in Patterns[c] for count in cellCounts(c, *pattern[:2]).values()], default=0)
+    Fractional = {c for c in range(TotalCourseNum) if all(mass(pattern) < 1 - 1e-6 for pattern in Patterns[c])} if Guide is not None else set()
+    First = []
+    while (len(First) <= 10):
+        Left = dict(Patterns)
+        Placed = {}
+        load.clear()
+        while (Left != {}):
+            c = min(Left, key=lambda c: (-First.index(c) if c in First else 1, c in Fractional, len(Left[c]), -len(Partners[c]), c))
+            pattern = max((pattern for pattern in Left.pop(c) if fits(c, *pattern[:2])), key=lambda pattern: score(c, pattern), default=None)
+            if (pattern is None):
+                break
+            Placed[c] = pattern[:2]
+            Changed = set(Partners[c]) | {other for pair in SameDay[c] for other in pair}
+            for cell, count in cellCounts(c, *Placed[c]).items():
+                load[cell] += count
+                # Patterns of other courses can only stop fitting under the 10% rule once an hour is almost full
+                if (count > 0 and load[cell] + maxCount > 2 * target):
+                    Changed |= NonExempted
+            for c2 in Changed:
+                if (c2 in Left):
+                    Left[c2] = [pattern for pattern in Left[c2] if fits(c2, *pattern[:2])]
+        if (len(Placed) == TotalCourseNum):
+            break
+        First.append(c)
+    if (len(Placed) < TotalCourseNum):
+        return None
+
+    for var in problem.variables():
+        var.varValue = 0
+    for c, (days, t) in Placed.items():
+        for d in days:
+            X[c][d][t].varValue = 1
+    completeContinuous(problem)
+    if not (all(row.valid(1e-6) for row in problem.constraints.values())\
+            and all(var.valid(1e-6) for var in problem.variables())):
+        return None
+
+    return problem.objective.value()
+
+#################################################################################
+def heuristicIncumbent(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, problem, upper_bound, metrics):
+    '''
+    Usage: build a schedule by rounding the LP solution and one by following the objective (see greedyIncumbent()),
+           keep the better one and report how far it is from the upper bound
+
+    Argument: 
+    course_instructor(list)
+    config(dict)
+    conflict_course_pairs(set)
+    NonExemptedC(list)
+    TotalNonExemptedHours(float)
+    SameDayPairs(list)
+    X(list)
+    problem(pulp) {modified}: varValue of every variable is set to the better schedule. It must hold the LP solution.
+    upper_bound(float): optimal value of the LP relaxation
+    metrics(dict) {modified}: objective values of both schedules and the gap to the upper bound
+
+    Return variable:
+    incumbent(float): objective value of the better schedule, None if both are not feasible
+    '''
+
+    Guide = {var.name: var.varValue or 0 for c in range(len(X)) for d in range(5) for var in X[c][d].values()}
+    rounded = greedyIncumbent(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, problem, Guide)
+    Values = {var: var.varValue for var in problem.variables()}
+    greedy = greedyIncumbent(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, problem, None)
+    metrics['Heuristic-LP-rounding-objective'] = rounded if rounded is not None else 'none'
+    metrics['Heuristic-greedy-objective'] = greedy if greedy is not None else 'none'
+    if (rounded is not None and (greedy is None or rounded >= greedy)):
+        for var, value in Values.items():
+            var.varValue = value
+    incumbent = max([objective for objective in (rounded, greedy) if objective is not None], default=None)
+    metrics['Heuristic-objective'] = incumbent if incumbent is not None else 'none'
+    if (incumbent is not None):
+        gap = 100 * (upper_bound - incumbent) / abs(upper_bound) if upper_bound != 0 else 0
+        metrics['Heuristic-gap-percentage'] = gap
+        print(f"Heuristic objective: {incumbent:g} (upper bound {upper_bound:g}, gap {gap:.1f}%)", file=sys.stderr)
+
+    return incumbent
+
+#################################################################################
+def reducedCostFixing(X, CourseInfo, reducedCosts, upper_bound, incumbent, granule):
+    '''
+    Usage: fix to 0 every X variable that can not be 1 in a schedule as good as the incumbent. In the LP relaxation, 
+           taking a variable with reduced cost r < 0 costs at least -r, so no such schedule is better than upper_bound + r.
+
+    Argument: 
+    X(list) {modified}: upper bounds of the fixed variables
+    CourseInfo(list)
+    reducedCosts(dict): reduced costs of the LP relaxation
+    upper_bound(float): optimal value of the LP relaxation
+    incumbent(float): objective value of a known schedule, e.g., from heuristicIncumbent()
+    granule(float): granularity of the objective function, see objectiveGranule()
+
+    Return variable:
+    fixed(list): the fixed variables. Their upper bounds must be set back to 1 before the problem is changed.
+    FixedNum(dict): number of fixed variables of every course, e.g., {'442/542': 12}
+    '''
+
+    fixed = []
+    FixedNum = {}
+    for c in range(len(X)):
+        for d in range(5):
+            for t, var in X[c][d].items():
+                reducedCost = reducedCosts.get(var.name, 0)
+                if (reducedCost < 0 and var.upBound != 0 and var.lowBound != 1 and var.varValue == 0\
+                    and roundBound(upper_bound + reducedCost, granule) < incumbent - 1e-6):
+                    var.upBound = 0
+                    fixed.append(var)
+                    FixedNum[CourseInfo[c].courseName] = FixedNum.get(CourseInfo[c].courseName, 0) + 1
+
+    return fixed, FixedNum
+
+#################################################################################
+def ILP(IW, CW, course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, SoftConflictPairs, Reference, Candidates, Avoid, metrics, trace):
+    '''
+    Usage: Define an ILP problem, remove its redundant constraints, then solve its LP relaxation and itself from the same MPS file.
+           The optimal value of the LP relaxation is an upper bound for the ILP problem.
+           If 'Lazy-constraints' is 1, the problem starts without the conflict and 10%-rule constraints. They are added 
+           when the schedule violates them and the problem is solved again until the schedule violates none, 
+           see addLazyC(). The upper bound is then the one of the smaller problem.
+           If 'Reduced-cost-fixing' is 1, the reduced costs of the LP relaxation and a heuristic schedule fix X variables 
+           to 0 before the ILP problem is solved, see reducedCostFixing(). If 'Heuristic-start' is 1, CBC starts from 
+           the heuristic schedule, see heuristicIncumbent(). If 'Elastic' is 1, the families in ElasticFamilies
+           may be violated at a penalty, see addElasticSlack(). Redundant constraints are only removed if 'Canonicalize' is 1.
+
+    Argument:  
+    IW(list): instructor preference weight matrix
+    CW(list): UW policy weight matrix
+    course_instructor(list)
+    config(dict)
+    conflict_course_pairs(set)
+    NonExemptedC(list)
+    TotalNonExemptedHours(float)
+    SameDayPairs(list)
+    SoftConflictPairs(dict): course pairs with co-enrolled students, see splitCoEnrollment()
+    Reference(dict): days and starting slots in the reference schedule, see read_referenceSchedule(). The ILP problem rewards 
+                     courses that keep them and CBC starts from the reference schedule. Empty if there is no reference schedule.
+    Candidates(list): candidate starting slots of every course
+    Avoid(set): starting slots the instructors can not teach at, see createIW(). Their X can not be 1.
+    metrics(dict) {modified}: build, file writing, solving and solution reading time are recorded here
+    trace(list) {modified}: rows of the solver trace. It is written to the output directory if the problem can not be solved.
+
+    Return variable: 
+    X(list)
+    problem(pulp)
+    upper_bound(float): the optimal value of the LP relaxation
+    relaxation(Relaxation): dual values and reduced costs of the LP relaxation, used to explain unmet preferences
+    '''
+
+    build_start = time.perf_counter()
+    # Read parameters for ILP problem
+    TotalCourseNum, totalSlot, l1, l2 = readParameterForProblem(course_instructor, config)
+
+    # Create the ILP problem
+    problem = pulp.LpProblem("ILP_Maximization_Problem", pulp.LpMaximize)
+    
+    # Initialize variable X (a list of dictionaries)
+    X = defineX(Candidates, "binary")
+    for (c, d, t) in Avoid:
+        X[c][d][t].upBound = 0
+    O = defineO(SoftConflictPairs)
+    K = defineK(Reference, X)
+    D = defineD(SameDayPairs, course_instructor[5], config)
+
+    # objective function
+    problem +=  pulp.lpSum((l1 * CW[c][d][t] + l2 * IW[c][d][t]) * var for c in range(TotalCourseNum) for d in range(5) for t, var in X[c][d].items())\
+        - softConflictPenalty(SoftConflictPairs, O, config) + stabilityReward(K, config) - sameDayPenalty(D, config)
+    
+    #adding constraints
+    families = addConstraints(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, problem)
+    first = len(problem.constraints)
+    addSoftConflictC(SoftConflictPairs, course_instructor[5], X, O, problem)
+    recordFamily(problem, first, 'Soft-conflict', families)
+    first = len(problem.constraints)
+    addStabilityC(Reference, X, K, config, problem)
+    recordFamily(problem, first, 'Stability', families)
+    first = len(problem.constraints)
+    addSameDaySoftC(SameDayPairs, course_instructor[5], X, D, problem)
+    recordFamily(problem, first, 'Soft-same-day', families)
+    if (config['Elastic'] == 1):
+        problem.setObjective(problem.objective - addElasticSlack(problem, families, config))
+    metrics['ILP-build-seconds'] = time.perf_counter() - build_start
+    metrics['ILP-variables'] = problem.numVariables()
+
+    #remove redundant constraints, but remember where every constraint comes from
+    canonical_start = time.perf_counter()
+    constraintNum = problem.numConstraints()
+    descriptions = {name: describeConstraint(name, families.get(name, 'Other'), row, course_instructor[5], config) for name, row in problem.constraints.items()}
+    removed, fixedBy = canonicalize(problem, families) if config['Canonicalize'] == 1 else ({}, {})
+    metrics['Canonical-seconds'] = time.perf_counter() - canonical_start
+    metrics['Canonical-fixed-variables'] = len(fixedBy)
+    metrics['Canonical-removed-constraints'] = constraintNum - problem.numConstraints()
+    for family, reasons in removed.items():
+        metrics[f'Canonical-removed-{family}'] = ', '.join(f'{reason} {count}' for reason, count in sorted(reasons.items()))
+    metrics['ILP-constraints'] = problem.numConstraints()
+
+    #write the problem once for both solves
+    write_start = time.perf_counter()
+    solverFile = writeProblemFile(problem)
+    metrics['MPS-write-seconds'] = time.perf_counter() - write_start
+    metrics['MPS-bytes'] = os.path.getsize(solverFile.path)
+
+    #solve the LP relaxation, then the ILP problem
+    status, upper_bound, duals, reducedCosts = solveFromFile(problem, solverFile, True, metrics, trace, 'LP', None)
+    if (status != 'Optimal'):
+        removeProblemFile(solverFile)
+        writeSolverTrace(trace, config['OutputDir'])
+        sys.exit("Pulp fail to find an optimal solution for LP.")
+    # No schedule is better than the LP bound rounded down to the objective granularity
+    metrics['Rounded upper bound'] = roundBound(upper_bound, objectiveGranule(problem.objective))
+    #round the LP solution and build a greedy schedule, the better one is the incumbent
+    incumbent = None
+    if (config['Reduced-cost-fixing'] == 1 or config['Heuristic-start'] == 1):
+        heuristic_start = time.perf_counter()
+        incumbent = heuristicIncumbent(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, problem, upper_bound, metrics)
+        metrics['Heuristic-seconds'] = time.perf_counter() - heuristic_start
+    #fix the X variables the LP relaxation rules out for any schedule as good as the incumbent, then write the file again
+    fixed = []
+    if (config['Reduced-cost-fixing'] == 1):
+        fixing_start = time.perf_counter()
+        if (incumbent is not None):
+            fixed, FixedNum = reducedCostFixing(X, course_instructor[5], reducedCosts, upper_bound, incumbent, objectiveGranule(problem.objective))
+            metrics['Reduced-cost-fixed-variables'] = len(fixed)
+            if (FixedNum != {}):
+                metrics['Reduced-cost-fixed-per-course'] = ', '.join(f'{name} {count}' for name, count in sorted(FixedNum.items()))
+        if (fixed != []):
+            removeProblemFile(solverFile)
+            solverFile = writeProblemFile(problem)
+        metrics['Reduced-cost-fixing-seconds'] = time.perf_counter() - fixing_start
+    if (Reference != {}):
+        mipStart = writeMipStart(solverFile, referenceStart(Reference, X, K))
+    elif (config['Heuristic-start'] == 1 and incumbent is not None):
+        mipStart = writeMipStart(solverFile, None)
+    else:
+        mipStart = None
+    solveFromFile(problem, solverFile, False, metrics, trace, 'ILP', mipStart)
+    #add the conflict and 10%-rule constraints the schedule violates, then solve again from the courses they leave alone
+    if (config['Lazy-constraints'] == 1):
+        metrics['Lazy-rounds'] = 0
+        metrics['Lazy-constraints-added'] = 0
+        while (pulp.LpStatus[problem.status] == 'Optimal'):
+            first = len(problem.constraints)
+            involved, rowNum = addLazyC(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, X, problem, families, False)
+            if (rowNum == 0):
+                break
+            for name in list(problem.constraints)[first:]:
+                descriptions[name] = describeConstraint(name, families[name], problem.constraints[name], course_instructor[5], config)
+            metrics['Lazy-rounds'] += 1
+            metrics['Lazy-constraints-added'] += rowNum
+            removeProblemFile(solverFile)
+            solverFile = writeProblemFile(problem)
+            names = {var.name for c in range(TotalCourseNum) if c not in involved for d in range(5) for var in X[c][d].values()}
+            solveFromFile(problem, solverFile, False, metrics, trace, 'ILP', writeMipStart(solverFile, names))
+        metrics['ILP-constraints'] = problem.numConstraints()
+    removeProblemFile(solverFile)
+    # Later phases change the problem, so a schedule as good as the incumbent may need the fixed variables again
+    for var in fixed:
+        var.upBound = 1
+    metrics['Result'] = pulp.LpStatus[problem.status]
+
+    if (pulp.LpStatus[problem.status] != 'Optimal'):
+        writeSolverTrace(trace, config['OutputDir'])
+        sys.exit("Pulp fail to find an optimal solution.") 
+
+    return X, problem, upper_bound, Relaxation(duals, reducedCosts, descriptions, fixedBy)
+
+#################################################################################
+def extractSolution(X, course_instructor, config, IW, CW, instructor_in_insPref):
+    '''
+    Usage: read the solution of the ILP problem once and store it as one CourseSchedule record per course.
+           All output writers render from these records instead of walking X or Y again.
+
+    Argument: 
+    X(list)
+    course_instructor(list)
+    config(dict)
+    IW(list)
+    CW(list)
+    instructor_in_insPref(list): instructor id for those who appear in instrutcor pref file
+
+    Return variable: 
+    Schedule(list): Schedule[courseId] is a CourseSchedule that stores when the course is taught.
+    NumCNoPref(int): total number of courses that don't have an instructor preference (could be regular course or TA session)
+    InsNotMet(defaultdict): instructor who has a preference that are not met. 
+        key is the instructor id and value is a set of course names that didn't meet preference. e.g., {8: {'520'}})
+    BPNotMet(set): a set of course names that didn't meet block policy. e.g., {'234', '233AH'}
+    IW_point(float): IW points earned from objective function
+    CW_point(float): CW points earned from objective function
+    '''
+
+    InstructorId2Name = course_instructor[3]
+    CourseInfo = course_instructor[5]
+    TotalCourseNum = course_instructor[6]
+    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
+    slotLength = config['Slot-length-in-minutes']
+    BlockingSlot = list(range(config['BlockSchedulingStartsAtid'], config['BlockSchedulingEndsAtid'] + 1))
+    Schedule = []
+    NumCNoPref = 0
+    InsNotMet = defaultdict(set)
+    BPNotMet = set()
+    IW_point = 0
+    CW_point = 0
+
+    for c in range(TotalCourseNum):
+        course_name = CourseInfo[c].courseName
+        instructor_id = CourseInfo[c].instructorId
+        if (instructor_id != -1):
+            instructor_name = InstructorId2Name[instructor_id]
+        else:
+            instructor_name = '-'  
+        meetIP = 'y'
+        days = []
+        slots = set()
+
+        for d in range(5):
+            for t, var in X[c][d].items():
+                if (var.varValue >= 1):
+                    CW_point += CW[c][d][t]
+                    IW_point += IW[c][d][t]
+                    if (IW[c][d][t] == 0):
+                        meetIP = 'n'
+                        if (instructor_id in instructor_in_insPref):
+                            InsNotMet[instructor_id].add(course_name)
+                    days.append(d)
+                    slots.add(t)
+        # If an instructor does not appear in the insPref file, we use '-'
+        if (instructor_id not in instructor_in_insPref):
+            meetIP = '-'
+            NumCNoPref += 1
+
+        slots = list(slots)
+        if (len(slots) > 1):
+            sys.exit('more than one session in a day')  
+
+        session_length = CourseInfo[c].lengPerSession
+        course_start = timeSlotId2ISlot(start_time, slots[0], slotLength)
+        course_end = (start_time + timedelta(minutes=slots[0] * slotLength + session_length)).strftime('%H:%M')
+        meetBP, course_BPNotMet = checkMeetBP(config, slots, session_length, BlockingSlot, course_name)
+        BPNotMet |= course_BPNotMet
+
+        Schedule.append(CourseSchedule(c, course_name, instructor_name, days, slots[0], course_start, course_end, meetBP, meetIP))
+
+    return Schedule, NumCNoPref, InsNotMet, BPNotMet, IW_point, CW_point
+
+#################################################################################
+def generate_output(Schedule, output_dir, course_instructor):
+    '''
+    Usage: generate schedule.txt based on the solution records we get from extractSolution()
+
+    Argument: 
+    Schedule(list)
+    output_dir(string)
+    course_instructor(list)
+
+    File output:
+    schedule.txt
+
+    Format for schedule.txt file:
+    ###
+    200     	McGarrity           	MWF  	14:30   	15:20   	50   	-  	-  
+    233     	Evans               	MWF  	08:30   	09:20   	50   	y  	y  
+    ###
+    '''
+
+    CourseInfo = course_instructor[5]
+
+    with open(output_dir+"schedule.txt", "w") as file:
+        for record in Schedule:
+            teaching_days = ''.join(intlist2days(record.days))
+            formatted_output = "{:<8}\t{:<20}\t{:<5}\t{:<8}\t{:<8}\t{:<5}\t{:<3}\t{:<3}\n"\
+                .format(record.courseName, record.instructorName, teaching_days, record.courseStart, record.courseEnd,\
+                        CourseInfo[record.courseId].lengPerSession, record.meetBP, record.meetIP)
+            file.write(formatted_output)
+    
+    return
+
+#################################################################################
+def checkMeetBP(config, slots, session_length, BlockingSlot, course_name):
+    '''
+    Usage: check whether a course meet Block Policy or not
+
+    Argument: 
+    config(dict)
+    slots(dict): currently we only have one element in slots, which is slot id for a course
+    session_length(int): session length for a course 
+    BlockingSlot(list): slot id that are between block starting time and block ending time
+    course_name(string): e.g., '200'
+
+    Return variable: 
+    meetBP(string): 'n' or 'y' or '-'. '-' means its before block starting time or after block ending time. 
+    BPNotMet(set): an set that contain course id that doesn't meet block policy
+    '''
+
+    meetBP = 'y'  
+    BPNotMet = set()        
+    #if course begin after 14:30, meetBP = '-'
+    if (slots[0] > config['BlockSchedulingEndsAtid'] or slots[0] < config['BlockSchedulingStartsAtid']):
+        meetBP = '-'
+    #if course begin before 14:30 and violates block policy, meetBP = 'n'
+    else:
+        match session_length:
+            case 50:
+                for s in slots:
+                    if (s in BlockingSlot and s not in config['50-min-class-start-time']):
+                        meetBP = 'n'
+                        BPNotMet.add(course_name)
+            case 80:
+                for s in slots:
+                    if (s in BlockingSlot and s not in config['80-min-class-start-time']):
+                        meetBP = 'n'
+                        BPNotMet.add(course_name)
+            case 110:
+                for s in slots:
+                    if (s in BlockingSlot and s not in config['110-min-class-start-time']):
+                        meetBP = 'n'
+                        BPNotMet.add(course_name)
+            case 170:
+                for s in slots:
+                    if (s in BlockingSlot and s not in config['170-min-class-start-time']):
+                        meetBP = 'n'
+                        BPNotMet.add(course_name)
+
+    return meetBP, BPNotMet
+
+#################################################################################
+def generateHeatMap(Schedule, output_dir, config, course_instructor, NonExemptedC, TotalNonExemptedHours):
+    '''
+    Usage: generate heatmap.txt based on the solution records we get from extractSolution()
+
+    Argument: 
+    Schedule(list)
+    output_dir(string)
+    config(dict)
+    course_instructor(list)
+    NonExemptedC(list): a list of non-exempted course's course id
+    TotalNonExemptedHours(float)
+
+    File output: 
+    headtmap.txt
+
+    Format for headtmap.txt file:
+    ###
+        M	T	W	R	F	Hourly total	Hourly Target
+    08:30	2.0	2.0	2.0	3.0	1.0	10.0    	10  
+    ###
+    '''
+
+    CourseInfo = course_instructor[5]
+    start_slot = config['10PercRuleStartsAtid']
+    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
+    end_slot = config['10PercRuleEndsAtid']
+    slotsPerCell = config['SlotsPerRuleCell']
+    target_value = math.ceil(TotalNonExemptedHours * config['RulePercentage'])
+
+    # Occupied[d][k] is the number of non-exempted courses taught in the k-th 30 min cell of the 10% rule on day d
+    cellNum = 2 * len(range(start_slot, end_slot + 1, 2 * slotsPerCell))
+    Occupied = [[0 for _ in range(cellNum)] for _ in range(5)]
+    for c in NonExemptedC:
+        record = Schedule[c]
+        first = max(0, (record.startSlot - start_slot) // slotsPerCell)
+        last = min(cellNum - 1, (record.startSlot + CourseInfo[c].slotNum - 1 - start_slot) // slotsPerCell)
+        for d in record.days:
+            for k in range(first, last + 1):
+                Occupied[d][k] += 1
+
+    with open(output_dir+"heatMap.txt", "w") as file:
+        file.write(f"\tM\tT\tW\tR\tF\tHourly total\tHourly Target\n")
+        for k, i in enumerate(range(start_slot, end_slot + 1, 2 * slotsPerCell)):
+            time = timeSlotId2ISlot(start_time, i, config['Slot-length-in-minutes'])
+            weekly_sum = [(Occupied[d][2*k] + Occupied[d][2*k+1]) / 2 for d in range(5)]
+            formatted_output = "{:<5}\t{:<3}\t{:<3}\t{:<3}\t{:<3}\t{:<3}\t{:<8}\t{:<8}\n".format(time, weekly_sum[0], weekly_sum[1], weekly_sum[2], weekly_sum[3], weekly_sum[4], sum(weekly_sum), target_value)
+            file.write(formatted_output)
+
+    return
+
+#################################################################################
+def printStandardOutput(config, course_instructor, NonExemptedC, TotalNonExemptedHours, IW_point, CW_point, NumCNoPref, InsNotMet, BPNotMet, problem, upper_bound):
+    '''
+    Usage: print out some useful information in stderr file
+
+    Argument: 
+    config(dict): parameters read from config file
+    course_instructor(list): information read from course instructor(courseThisQuarter) file
+    NonExemptedC(list): a list of non-exempted course's course id
+    TotalNonExemptedHours(float): total number of non exempted hours
+    IW_point(float): points earned from instructor preference weight
+    CW_point(float): points earned from UW policy weight
+    NumCNoPref(int): number of course that doesn't have an instructor preference
+    InsNotMet(defaultdict): instructor who has a preference that are not met. 
+        key is the instructor id and value is a set of course names that didn't meet preference. e.g., {8: {'520'}})
+    BPNotMet(set): a set of course names that didn't meet block policy. e.g., {'234', '233AH'}
+    problem(pulp): ILP problem we defined using pulp
+    upper_bound(float): optimal value calculated from LP problem
+    '''
+
+    InstructorId2Name = course_instructor[3]
+    print(f"10%-rule-percentage={config['RulePercentage']}", file=sys.stderr)
+    print(f"Must-follow-block-policy={config['Must-follow-block-policy']}\n", file=sys.stderr)
+    print(f"Result: {pulp.LpStatus[problem.status]}", file=sys.stderr)
+    print(f"Objective value: {pulp.value(problem.objective)}", file=sys.stderr)
+    print(f"Upper bound: {upper_bound}", file=sys.stderr) # Upper bound is the optimal value for LP problem
+    print(f"IW points earned: {IW_point}", file=sys.stderr)
+    print(f"CW points earned: {CW_point}", file=sys.stderr)
+    courseID2Name = course_instructor[1]
+    NonExemptedCName = [courseID2Name[course_id] for course_id in NonExemptedC]
+    TotalC = list(range(course_instructor[6]))
+    ExemptedC = [c for c in TotalC if c not in NonExemptedC]
+    ExemptedCName = [courseID2Name[course_id] for course_id in ExemptedC]
+    print(f"Total Number of Course: {course_instructor[6]}", file=sys.stderr)
+    print(f"Exempted Courses List: {ExemptedCName}", file=sys.stderr)
+    print(f"Total Number of Non-Exempted Courses: {len(NonExemptedCName)}", file=sys.stderr)
+    print(f"Total Number of Non-Exempted Hours: {TotalNonExemptedHours}\n", file=sys.stderr)
+    print(f"The number of courses for which the instructors are not listed in the instructorpref file: {NumCNoPref}", file=sys.stderr)
+    print(f"The number of courses for which the instructors' preference are not met: {int(course_instructor[6] - IW_point - NumCNoPref)}", file=sys.stderr)
+    if (len(InsNotMet) > 0):
+        print(f"Instructors whose preference are not met: ", file=sys.stderr)
+        for i in InsNotMet.keys():
+            print(f"Instructor's name: {InstructorId2Name[i]}\tCourses that violate preference{InsNotMet[i]}", file=sys.stderr)
+    print(f"\nThe number of courses that violate Block Policy: {len(BPNotMet)}", file=sys.stderr)
+    if (len(BPNotMet) > 0):
+        print(f"Courses that violate Block Policy: {BPNotMet}", file=sys.stderr)       
+
+    return        
+
+#################################################################################
+def createCSVrow(record, CourseInfo):
+    '''
+    Usage: generate one row in schedule.csv or schedule-nonEx.csv file
+
+    Argument: 
+    record(CourseSchedule): solution record of a course
+    CourseInfo(list)
+
+    Return variable: 
+    row(list): e.g., ['LING 200', 'Cheng', 50, '-', 'y', 'M W F', '1430', '1520']
+    '''
+
+    teaching_days = ' '.join(intlist2days(record.days))
+    row = ['LING '+record.courseName, record.instructorName, CourseInfo[record.courseId].lengPerSession, record.meetBP, record.meetIP,\
+           teaching_days, record.courseStart.replace(':',''), record.courseEnd.replace(':','')]
+
+    return row
+
+#################################################################################
+def generateNonExCSV(output_dir, Schedule, course_instructor, NonExemptedC):
+    '''
+    Usage: generate schedule-nonEx.csv. Only include non-exempt courses.
+
+    Argument: 
+    output_dir(string)
+    Schedule(list)
+    course_instructor(list)
+    NonExemptedC(list)
+
+    File output:
+    scedule-NonEx.csv
+
+    Format for scedule-NonEx.csv file:
+    ###
+    Course,Instructor,Length,Meet-block-policy,Meet-Instructor-Preference,Days,Start,End,Notes,
+    LING 200,McGarrity,50,-,-,M W F,1430,1520,,
+    ###
+    '''
+
+    CourseInfo = course_instructor[5]
+    fields = ['Course', 'Instructor', 'Length', 'Meet-block-policy','Meet-Instructor-Preference','Days','Start','End','Notes']
+    rows = []
+    for c in NonExemptedC:
+        rows.append(createCSVrow(Schedule[c], CourseInfo) + [Schedule[c].notes])
+
+    with open(output_dir+"schedule-nonEx.csv", 'w') as csvfile:  
+        # creating a csv writer object  
+        csvwriter = csv.writer(csvfile)  
+        csvwriter.writerow('') 
+        csvwriter.writerow(fields)                
+        csvwriter.writerows(rows) 
+    
+    return
+
+#################################################################################
+def generateCSV(output_dir, Schedule, course_instructor, NonExemptedC):
+    '''
+    Usage: generate schedule.csv. Include all the courses. The order is non-exempted courses, exempted courses, TA sessions.
+
+    Argument: 
+    output_dir(string)
+    Schedule(list)
+    course_instructor(list)
+    NonExemptedC(list)
+
+    File output:
+    schedule.csv
+
+    Format for scedule.csv file:
+    ###
+    Course,Instructor,Length,Meet-block-policy,Meet-Instructor-Preference,Days,Start,Exempted,Notes,
+    LING 200,McGarrity,50,-,-,M W F,1430,1520,0,
+    ###
+    '''
+
+    CourseInfo = course_instructor[5]
+    TotalCourseNum = course_instructor[6]
+    NonExemptedSet = set(NonExemptedC)
+    fields = ['Course', 'Instructor', 'Length', 'Meet-block-policy','Meet-Instructor-Preference','Days','Start','End','Exempted','Notes','']
+    rows = []
+
+    #First NonExempted Course
+    for c in NonExemptedC:
+        if (CourseInfo[c].isTASession == 0):
+            rows.append(createCSVrow(Schedule[c], CourseInfo) + ['0', Schedule[c].notes])
+    rows.append(['']*10)
+
+    # Then Exempted Course
+    for c in range(TotalCourseNum):
+        if (c not in NonExemptedSet and CourseInfo[c].isTASession == 0):
+            rows.append(createCSVrow(Schedule[c], CourseInfo) + ['1', Schedule[c].notes])
+    rows.append(['']*10)
+
+    # Finally TA sessions
+    for c in range(TotalCourseNum):
+        if (CourseInfo[c].isTASession == 1):
+            rows.append(createCSVrow(Schedule[c], CourseInfo) + [CourseInfo[c].exempted, Schedule[c].notes])
+
+    with open(output_dir+"schedule.csv", 'w') as csvfile:  
+        # creating a csv writer object  
+        csvwriter = csv.writer(csvfile)  
+        csvwriter.writerow('') 
+        csvwriter.writerow(fields)                
+        csvwriter.writerows(rows) 
+
+    return
+
+#################################################################################
+def explainPreferences(InsNotMet, X, IW, course_instructor, problem, relaxation):
+    '''
+    Usage: explain why instructor preferences are not met with the LP relaxation, without solving anything again.
+           A preferred starting slot (IW > 0) is ruled out by the constraint that fixed its X to 0 before solving, 
+           or it is priced out by the binding constraints that contain it: dual value * coefficient is what the 
+           constraint charges for using the slot. For every course, the constraints are ranked by what they charge
+           over all preferred slots of the course.
+
+    Argument:
+    InsNotMet(defaultdict): generated by extractSolution()
+    X(list)
+    IW(list)
+    course_instructor(list)
+    problem(pulp)
+    relaxation(Relaxation)
+
+    Return variable:
+    Explanations(list): one (instructor name, course name, best slot, causes) for every course whose preference is not met.
+        best slot is (day, slot id, reduced cost) of the preferred slot that is closest to being used by the LP relaxation, 
+        or None if all of them are ruled out. causes is a list of (description, ruled out slot number, charge), 
+        e.g., [('ConflictCourses: 442/542 and 450/550 can not overlap on T at 10:30', 0, 0.5)]
+    '''
+
+    InstructorId2Name = course_instructor[3]
+    CourseInfo = course_instructor[5]
+    TotalCourseNum = course_instructor[6]
+    rowsOf = defaultdict(list)
+    for name, row in problem.constraints.items():
+        if (name in relaxation.duals):
+            for var, coef in row.items():
+                rowsOf[var.name].append((name, coef))
+
+    Explanations = []
+    for c in range(TotalCourseNum):
+        instructor_id = CourseInfo[c].instructorId
+        if (CourseInfo[c].courseName not in InsNotMet.get(instructor_id, set())):
+            continue
+        ruledOut = defaultdict(int)
+        charges = defaultdict(float)
+        best = None
+        for d in range(5):
+            for t, var in X[c][d].items():
+                if (IW[c][d][t] == 0):
+                    continue
+                if (var.name in relaxation.fixedBy):
+                    ruledOut[relaxation.fixedBy[var.name]] += 1
+                    continue
+                reducedCost = relaxation.reducedCosts.get(var.name, 0)
+                if (best is None or reducedCost > best[2]):
+                    best = (d, t, reducedCost)
+                for name, coef in rowsOf[var.name]:
+                    charge = relaxation.duals.get(name, 0) * coef
+                    if (charge > 1e-6):
+                        charges[name] += charge
+        causes = [(name, ruledOut[name], charges[name]) for name in set(ruledOut) | set(charges)]
+        causes.sort(key=lambda cause: (-cause[1], -cause[2], cause[0]))
+        causes = [(relaxation.descriptions.get(name, name), number, charge) for name, number, charge in causes]
+        Explanations.append((InstructorId2Name[instructor_id], CourseInfo[c].courseName, best, causes))
+
+    return Explanations
+
+#################################################################################
+def generateExplanationOutput(Explanations, output_dir, config):
+    '''
+    Usage: generate explanations.txt, which lists why each unmet instructor preference is not met (at most 5 causes per course)
+
+    Argument:
+    Explanations(list): generated by explainPreferences()
+    output_dir(string)
+    config(dict)
+
+    File output:
+    explanations.txt
+
+    Format for explanations.txt file:
+    ###
+    Bender	567
+        closest preferred slot: T 10:30, reduced cost -0.5
+        1. CoursesThisQuarter: 567 must meet on MW (T) rules out 3 preferred slot(s)
+        2. ConflictCourses: 567 and 571 can not overlap on M at 10:30 charges 0.5
+    ###
+    '''
+
+    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
+    slotLength = config['Slot-length-in-minutes']
+    with open(output_dir+"explanations.txt", "w") as file:
+        for instructor_name, course_name, best, causes in Explanations:
+            file.write(f"{instructor_name}\t{course_name}\n")
+            if (best is None and causes == []):
+                file.write("    no candidate starting slot is in the preferred time\n")
+            if (best is not None):
+                d, t, reducedCost = best
+                file.write(f"    closest preferred slot: {intlist2days([d])[0]} {timeSlotId2ISlot(start_time, t, slotLength)}, reduced cost {reducedCost:g}\n")
+            for rank, (description, number, charge) in enumerate(causes[:5]):
+                if (number > 0):
+                    file.write(f"    {rank + 1}. {description} rules out {number} preferred slot(s)\n")
+                else:
+                    file.write(f"    {rank + 1}. {description} charges {charge:g}\n")
+
+    return
+
+#################################################################################
+def read_rooms(file_name):
+    '''
+    Usage: Read the rooms file. It is optional: room assignment is skipped if 'Rooms' is '-' in config file.
+
+    Argument:
+    file_name(string): rooms file's file name. e.g., './Rooms'
+
+    Return variable:
+    Rooms(list): every element of it is an instance of Room
+
+    Format for rooms file:
+    ###
+    # Room      Capacity   Large-class
+    SAV-130     120        1
+    GWN-201     40         0
+    ###
+    '''
+
+    Rooms = []
+    information = []
+    line_number = 0
+
+    if file_name.endswith('.csv'):
+        with open(file_name, 'r', newline='') as csvfile:
+            csv_reader = csv.reader(csvfile)
+
+            # Skip the header line
+            next(csv_reader, None)
+            line_number += 1
+
+            for values in csv_reader:
+                line_number += 1
+                # Skip lines whose first field is empty
+                if not values or not values[0]:
+                    continue
+                # In csv file, the last field is ignored since it is for commenting use only
+                information.append([values[:-1], line_number])
+    else:
+        with open(file_name, "r") as file:
+            for line in file:
+                line_number += 1
+                # Ignore empty lines and lines starting with "#"
+                if not line.strip() or line.startswith("#"):
+                    continue
+                information.append([line.split('#')[0].split(), line_number])
+
+    for values, line_number in information:
+        if (len(values) != 3):
+            inputError(f"Incorrect Rooms format for line {line_number}. Each row should have 3 columns.")
+            continue
+        try:
+            capacity = int(values[1])
+            large = int(values[2])
+        except ValueError:
+            inputError(f"Capacity and Large-class should be integers. Please modify line {line_number} of Rooms file.")
+            continue
+        Rooms.append(Room(values[0], capacity, large))
+
+    if (len(Rooms) == 0):
+        inputError("Rooms file does not have any room.")
+
+    return Rooms
+
+#################################################################################
+def roomCompatible(course, room):
+    '''
+    Usage: check whether a course can be taught in a room. A large class needs a room marked for large classes.
+
+    Argument:
+    course(Course)
+    room(Room)
+
+    Return variable:
+    compatible(bool)
+    '''
+
+    return (course.largeClass != 1 or room.large == 1)
+
+#################################################################################
+def activeCourses(Schedule, CourseInfo, day, point):
+    '''
+    Usage: find the courses that are taught at a slot on a day
+
+    Argument:
+    Schedule(list)
+    CourseInfo(list)
+    day(int)
+    point(int): a slot id
+
+    Return variable:
+    courses(list): e.g., [0, 4, 17]
+    '''
+
+    return [r.courseId for r in Schedule if day in r.days and r.startSlot <= point < r.startSlot + CourseInfo[r.courseId].slotNum]
+
+#################################################################################
+def hallViolator(courses, compatible):
+    '''
+    Usage: match courses to rooms with augmenting paths. If some course can not get a room, return a set of courses
+           that need more rooms than they can use together (Hall's condition fails for this set).
+
+    Argument:
+    courses(list): course ids taught at the same time
+    compatible(dict): compatible[c] is the list of room indices course c can use
+
+    Return variable:
+    violator(list): course ids of the deficient set, [] if every course gets a room
+    rooms(set): room indices the deficient set can use
+    '''
+
+    room2course = {}
+
+    def augment(c, seen):
+        for r in compatible[c]:
+            if r in seen:
+                continue
+            seen.add(r)
+            if (r not in room2course or augment(room2course[r], seen)):
+                room2course[r] = c
+                return True
+        return False
+
+    for c in courses:
+        if not augment(c, set()):
+            # All courses reachable from c by alternating paths form the deficient set
+            violator = {c}
+            rooms = set()
+            stack = [c]
+            while stack:
+                for r in compatible[stack.pop()]:
+                    if (r not in rooms):
+                        rooms.add(r)
+                        if (room2course[r] not in violator):
+                            violator.add(room2course[r])
+                            stack.append(room2course[r])
+            return sorted(violator), rooms
+
+    return [], set(room2course)
+
+#################################################################################
+def findRoomCuts(Schedule, Rooms, CourseInfo):
+    '''
+    Usage: check room feasibility of a time-fixed schedule on every (day, slot) where a session starts.
+
+    Argument:
+    Schedule(list)
+    Rooms(list)
+    CourseInfo(list)
+
+    Return variable:
+    cuts(dict): e.g., {(3, 7, 9): 2} means courses 3, 7 and 9 can only use 2 rooms, so at most 2 of them can be taught at the same time
+    '''
+
+    compatible = {r.courseId: [i for i, room in enumerate(Rooms) if roomCompatible(CourseInfo[r.courseId], room)] for r in Schedule}
+    cuts = {}
+    for d in range(5):
+        points = sorted(set(r.startSlot for r in Schedule if d in r.days))
+        for point in points:
+            courses = activeCourses(Schedule, CourseInfo, d, point)
+            violator, rooms = hallViolator(courses, compatible)
+            if (violator != []):
+                # Every course that can only use these rooms competes for them, not just the ones found at this slot
+                competing = [c for c in compatible if set(compatible[c]) <= rooms]
+                cuts[tuple(sorted(competing))] = len(rooms)
+
+    return cuts
+
+#################################################################################
+def addRoomCuts(cuts, CourseInfo, X, problem):
+    '''
+    Usage: add room feasibility cuts to the time model. Rooms are the same every day, so a cut holds on every day at every
+           slot where one of its courses may start (the most courses of a set are taught together at such a slot).
+
+    Argument:
+    cuts(dict): generated by findRoomCuts()
+    CourseInfo(list)
+    X(list)
+    problem(pulp) {modified}
+
+    Return variable:
+    cutNum(int): number of constraints added
+    '''
 
-    #solve problem
-    solveProblem(problem)
+    cutNum = 0
+    for courses, roomNum in cuts.items():
+        for d in range(5):
+            points = sorted(set(t for c in courses for t in X[c][d]))
+            for point in points:
+                covering = [var for c in courses for var in coveringStarts(X[c][d], CourseInfo[c].slotNum, point)]
+                if (len(covering) > roomNum):
+                    problem += pulp.lpSum(covering) <= roomNum
+                    cutNum += 1
+
+    return cutNum
+
+#################################################################################
+def assignRooms(Schedule, Rooms, CourseInfo, sameRoomAllWeek, metrics, trace):
+    '''
+    Usage: assign rooms to the courses of a time-fixed schedule with a small ILP. Two courses taught at the same time
+           can not share a room, and large rooms are kept for large classes if possible.
+
+    Argument:
+    Schedule(list)
+    Rooms(list)
+    CourseInfo(list)
+    sameRoomAllWeek(bool): if True, a course uses the same room on all its teaching days
+    metrics(dict) {modified}
+    trace(list) {modified}: rows of the solver trace
 
+    Return variable:
+    RoomOf(dict): maps a course id to {day: room index}, e.g., {3: {0: 1, 2: 1}}. Empty if no assignment exists
+    '''
+
+    problem = pulp.LpProblem("Room_Assignment_Problem", pulp.LpMinimize)
+    Z = {}
+    for record in Schedule:
+        c = record.courseId
+        for d in ([None] if sameRoomAllWeek else record.days):
+            for i, room in enumerate(Rooms):
+                if roomCompatible(CourseInfo[c], room):
+                    Z[(c, d, i)] = pulp.LpVariable(f"Z_{c}_{d}_{i}", 0, 1, cat=pulp.LpBinary)
+
+    # Objective: number of small classes in rooms for large classes
+    problem += pulp.lpSum(var for (c, d, i), var in Z.items() if CourseInfo[c].largeClass != 1 and Rooms[i].large == 1)
+
+    for record in Schedule:
+        for d in ([None] if sameRoomAllWeek else record.days):
+            problem += pulp.lpSum(Z[(record.courseId, d, i)] for i in range(len(Rooms)) if (record.courseId, d, i) in Z) == 1
+    for d in range(5):
+        points = sorted(set(r.startSlot for r in Schedule if d in r.days))
+        for point in points:
+            courses = activeCourses(Schedule, CourseInfo, d, point)
+            if (len(courses) < 2):
+                continue
+            key = None if sameRoomAllWeek else d
+            for i in range(len(Rooms)):
+                problem += pulp.lpSum(Z[(c, key, i)] for c in courses if (c, key, i) in Z) <= 1
+
+    solveProblem(problem, metrics, trace, 'Room-assignment')
     if (pulp.LpStatus[problem.status] != 'Optimal'):
-        sys.exit("Pulp fail to find an optimal solution.") 
+        return {}
 
-    return X, Y, problem
+    RoomOf = {record.courseId: {} for record in Schedule}
+    days = {record.courseId: record.days for record in Schedule}
+    for (c, d, i), var in Z.items():
+        if (var.varValue >= 1):
+            for day in (days[c] if d is None else [d]):
+                RoomOf[c][day] = i
+
+    return RoomOf
 
 #################################################################################
-def LP(IW, CW, course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs):
+def generateRoomOutput(Schedule, Rooms, RoomOf, output_dir):
     '''
-    Usage: Define an LP problem then solve it. Only differences with ILP() is we set the varaible to be continuous instead of binary
+    Usage: generate rooms.txt based on the room assignment. A course without a room is listed as unassigned.
 
-    Argument:  
-    IW(list): instructor preference weight matrix
-    CW(list): UW policy weight matrix
+    Argument:
+    Schedule(list)
+    Rooms(list)
+    RoomOf(dict)
+    output_dir(string)
+
+    File output:
+    rooms.txt
+
+    Format for rooms.txt file:
+    ###
+    200     	McGarrity           	MWF  	14:30   	15:20   	SAV-130
+    201     	Evans               	TR   	10:30   	11:50   	T:GWN-201 R:SAV-130
+    ###
+    '''
+
+    with open(output_dir+"rooms.txt", "w") as file:
+        for record in Schedule:
+            teaching_days = ''.join(intlist2days(record.days))
+            rooms = RoomOf.get(record.courseId, {})
+            names = [Rooms[rooms[d]].name if d in rooms else 'unassigned' for d in record.days]
+            if (len(set(names)) == 1):
+                room_name = names[0]
+            else:
+                room_name = ' '.join(f"{day}:{name}" for day, name in zip(intlist2days(record.days), names))
+            formatted_output = "{:<8}\t{:<20}\t{:<5}\t{:<8}\t{:<8}\t{}\n"\
+                .format(record.courseName, record.instructorName, teaching_days, record.courseStart, record.courseEnd, room_name)
+            file.write(formatted_output)
+
+    return
+
+#################################################################################
+def roomPhase(Rooms, X, problem, course_instructor, config, IW, CW, instructor_in_insPref, metrics, trace):
+    '''
+    Usage: the second phase of scheduling. Check whether the time-fixed schedule fits the rooms. If it does not, add cuts
+           for the (day, slot) that need more rooms than we have to the time model and solve it again. Then assign rooms.
+
+    Argument:
+    Rooms(list)
+    X(list)
+    problem(pulp) {modified}: the solved ILP problem, room cuts are added to it
     course_instructor(list)
     config(dict)
-    conflict_course_pairs(set)
-    NonExemptedC(list)
-    TotalNonExemptedHours(float)
-    SameDayPairs(list)
+    IW(list)
+    CW(list)
+    instructor_in_insPref(list)
+    metrics(dict) {modified}
+    trace(list) {modified}: rows of the solver trace
 
-    Return variable: 
-    upper_bound(float): the optimal value of the LP problem, which is the upper bound for the ILP problem.
+    Return variable:
+    RoomOf(dict): maps a course id to {day: room index}. Empty if the schedule does not fit the rooms
     '''
 
-    # Read parameters for LP problem
-    TotalCourseNum, totalSlot, l1, l2 = readParameterForProblem(course_instructor, config)
+    CourseInfo = course_instructor[5]
+    metrics['Room-cuts'] = 0
+    for iteration in range(config['Room-cut-iterations'] + 1):
+        Schedule = extractSolution(X, course_instructor, config, IW, CW, instructor_in_insPref)[0]
+        cuts = findRoomCuts(Schedule, Rooms, CourseInfo)
+        if (cuts == {}):
+            break
+        if (iteration == config['Room-cut-iterations']):
+            print(f"Warning: schedule still needs more rooms than we have after {iteration} iterations", file=sys.stderr)
+            break
+        metrics['Room-cuts'] += addRoomCuts(cuts, CourseInfo, X, problem)
+        solveProblem(problem, metrics, trace, 'Room-ILP')
+        if (pulp.LpStatus[problem.status] != 'Optimal'):
+            sys.exit("Pulp fail to find an optimal solution that fits the rooms.")
+    metrics['Room-cut-iterations'] = iteration
+
+    room_start = time.perf_counter()
+    RoomOf = assignRooms(Schedule, Rooms, CourseInfo, True, metrics, trace)
+    if (RoomOf == {}):
+        print("Warning: fail to assign rooms such that every course uses the same room all week. Assign rooms day by day.", file=sys.stderr)
+        RoomOf = assignRooms(Schedule, Rooms, CourseInfo, False, metrics, trace)
+    metrics['Room-assignment-seconds'] = time.perf_counter() - room_start
+    metrics['Rooms-unassigned-courses'] = 0 if RoomOf else len(Schedule)
+    if (RoomOf == {}):
+        print("Error: the schedule does not fit the rooms. No course is assigned a room (see rooms.txt).", file=sys.stderr)
+    print(f"Room cuts added to the time model: {metrics['Room-cuts']}", file=sys.stderr)
+
+    return RoomOf
 
-    # Create the LP problem
-    problem = pulp.LpProblem("LP_Maximization_Problem", pulp.LpMaximize)
-    
-    # Initialize variable X and Y (three dimensional array)
-    X = []
-    Y = []
-    X, Y = defineXY(TotalCourseNum, totalSlot, "continuous")
+#################################################################################
+def placeholderInstructors(course_instructor, config):
+    '''
+    Usage: find the instructors of CoursesThisQuarter whose names match a pattern in 'Placeholder-instructors', 
+           e.g., TA1 or TBA. It is only used with a TA pool file, otherwise placeholders are treated as real instructors.
 
-    # objective function
-    problem +=  pulp.lpSum((l1 * CW[c][d][t] + l2 * IW[c][d][t]) * X[c][d][t] for c in range(TotalCourseNum) for d in range(5) for t in range(totalSlot))
-    
-    #adding constraints
-    addConstraints(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, X, Y, problem)
+    Argument:
+    course_instructor(list)
+    config(dict)
+
+    Return variable:
+    placeholders(set): instructor ids, e.g., {4, 9}
+    '''
+
+    if (config['TAPool'] == '-'):
+        return set()
+    patterns = config['Placeholder-instructors'].lower().split()
+
+    return {i for i, name in enumerate(course_instructor[3]) if any(fnmatch.fnmatchcase(name.lower(), pattern) for pattern in patterns)}
+
+#################################################################################
+def read_taPool(file_name, config):
+    '''
+    Usage: Read the TA pool file. It is optional: it is only read if 'TAPool' is not '-' in config file.
+           A TA can have more than one line, one for every time window the TA can teach in.
+
+    Argument:
+    file_name(string): TA pool file's file name. e.g., './TAPool'
+    config(dict)
+
+    Return variable:
+    Pool(list): every element of it is an instance of PoolTA
+
+    Format for TA pool file ('-' for the start or the end of the instructional day):
+    ###
+    # TA        Max-sections   Days    Start   End
+    Alice       2              MTWRF   -       -
+    Bob         1              TR      8:30    12:20
+    Bob         1              F       13:30   -
+    ###
+    '''
+
+    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
+    slotLength = config['Slot-length-in-minutes']
+    Pool = []
+    Name2Index = {}
+    information = []
+    line_number = 0
+
+    if file_name.endswith('.csv'):
+        with open(file_name, 'r', newline='') as csvfile:
+            csv_reader = csv.reader(csvfile)
+
+            # Skip the header line
+            next(csv_reader, None)
+            line_number += 1
+
+            for values in csv_reader:
+                line_number += 1
+                # Skip lines whose first field is empty
+                if not values or not values[0]:
+                    continue
+                # In csv file, the last field is ignored since it is for commenting use only
+                information.append([values[:-1], line_number])
+    else:
+        with open(file_name, "r") as file:
+            for line in file:
+                line_number += 1
+                # Ignore empty lines and lines starting with "#"
+                if not line.strip() or line.startswith("#"):
+                    continue
+                information.append([line.split('#')[0].split(), line_number])
+
+    for values, line_number in information:
+        if (len(values) != 5):
+            inputError(f"Incorrect TAPool format for line {line_number}. Each row should have 5 columns.")
+            continue
+        try:
+            maxSections = int(values[1])
+            days = days2listint(values[2].lower(), "TAPool", line_number)
+            start = start_time if values[3] == '-' else time_transfer(values[3], "TAPool", line_number)
+            end = time_transfer(config['InstructDayEndsAt'] if values[4] == '-' else values[4], "TAPool", line_number)
+        except ValueError:
+            inputError(f"Max-sections should be an integer. Please modify line {line_number} of TAPool file.")
+            continue
+        except InputError as e:
+            inputError(str(e))
+            continue
+        window = (days, math.ceil(timeSlotName2Id(start_time, start, slotLength)), math.floor(timeSlotName2Id(start_time, end - timedelta(minutes=1), slotLength)))
+        if (values[0].lower() not in Name2Index):
+            Name2Index[values[0].lower()] = len(Pool)
+            Pool.append(PoolTA(values[0], maxSections, []))
+        Pool[Name2Index[values[0].lower()]].windows.append(window)
+
+    if (len(Pool) == 0):
+        inputError("TAPool file does not have any TA.")
+
+    return Pool
+
+#################################################################################
+def taAvailable(ta, day, start, slotNum):
+    '''
+    Usage: check whether a TA can teach a session of slotNum slots that starts at a slot on a day
+
+    Argument:
+    ta(PoolTA)
+    day(int)
+    start(int): a slot id
+    slotNum(int)
+
+    Return variable:
+    available(bool)
+    '''
+
+    return any(day in days and first <= start and start + slotNum - 1 <= last for days, first, last in ta.windows)
+
+#################################################################################
+def findTACuts(Schedule, Sections, Pool, CourseInfo):
+    '''
+    Usage: check on every (day, slot) where a placeholder section starts whether the TAs who are free then can cover
+           all the placeholder sections taught then. If they can not, return a cut, as findRoomCuts() does for rooms.
+
+    Argument:
+    Schedule(list)
+    Sections(list): course ids of the placeholder sections
+    Pool(list)
+    CourseInfo(list)
+
+    Return variable:
+    cuts(dict): e.g., {(1, 4, (0, 2)): 2} means on Tuesday at slot 4, sections that only TAs 0 and 2 can teach need at most 2 TAs
+    '''
+
+    placed = [Schedule[c] for c in Sections]
+    cuts = {}
+    for d in range(5):
+        points = sorted(set(r.startSlot for r in placed if d in r.days))
+        for point in points:
+            courses = activeCourses(placed, CourseInfo, d, point)
+            compatible = {c: [i for i, ta in enumerate(Pool) if taAvailable(ta, d, Schedule[c].startSlot, CourseInfo[c].slotNum)] for c in courses}
+            violator, tas = hallViolator(courses, compatible)
+            if (violator != []):
+                cuts[(d, point, tuple(sorted(tas)))] = len(tas)
+
+    return cuts
+
+#################################################################################
+def addTACuts(cuts, Sections, Pool, CourseInfo, X, problem):
+    '''
+    Usage: add TA cuts to the time model. At the slot of a cut, the placeholder sections that only the TAs of the cut 
+           can teach (wherever they start) need one of those TAs each, so at most that many of them can be taught then.
+
+    Argument:
+    cuts(dict): generated by findTACuts()
+    Sections(list)
+    Pool(list)
+    CourseInfo(list)
+    X(list)
+    problem(pulp) {modified}
+
+    Return variable:
+    cutNum(int): number of constraints added
+    '''
+
+    cutNum = 0
+    for (d, point, tas), taNum in cuts.items():
+        covering = []
+        for c in Sections:
+            for t, var in X[c][d].items():
+                if (t <= point < t + CourseInfo[c].slotNum and\
+                    all(i in tas for i, ta in enumerate(Pool) if taAvailable(ta, d, t, CourseInfo[c].slotNum))):
+                    covering.append(var)
+        if (len(covering) > taNum):
+            problem += pulp.lpSum(covering) <= taNum
+            cutNum += 1
+
+    return cutNum
+
+#################################################################################
+def assignTAs(Schedule, Sections, Pool, CourseInfo, metrics, trace):
+    '''
+    Usage: assign TAs of the pool to the placeholder sections of a time-fixed schedule with a small ILP. A TA teaches a
+           section on all its days, only in the TA's time windows, never two sections at the same time and at most
+           Max-sections sections. The largest number of sections of a TA is made as small as possible.
 
-    #solve problem
-    solveProblem(problem)
+    Argument:
+    Schedule(list)
+    Sections(list)
+    Pool(list)
+    CourseInfo(list)
+    metrics(dict) {modified}
+    trace(list) {modified}: rows of the solver trace
+
+    Return variable:
+    TAOf(dict): maps a course id to a TA index, e.g., {12: 0}. Empty if no assignment exists
+    '''
 
+    problem = pulp.LpProblem("TA_Assignment_Problem", pulp.LpMinimize)
+    W = {}
+    for c in Sections:
+        record = Schedule[c]
+        for i, ta in enumerate(Pool):
+            if all(taAvailable(ta, d, record.startSlot, CourseInfo[c].slotNum) for d in record.days):
+                W[(c, i)] = pulp.LpVariable(f"W_{c}_{i}", 0, 1, cat=pulp.LpBinary)
+    load = pulp.LpVariable("Max_load", 0)
+
+    # Objective: the most sections a TA teaches
+    problem += load
+
+    for c in Sections:
+        problem += pulp.lpSum(W[(c, i)] for i in range(len(Pool)) if (c, i) in W) == 1
+    for i, ta in enumerate(Pool):
+        sections = pulp.lpSum(W[(c, i)] for c in Sections if (c, i) in W)
+        problem += sections <= ta.maxSections
+        problem += sections <= load
+    placed = [Schedule[c] for c in Sections]
+    for d in range(5):
+        points = sorted(set(r.startSlot for r in placed if d in r.days))
+        for point in points:
+            courses = activeCourses(placed, CourseInfo, d, point)
+            if (len(courses) < 2):
+                continue
+            for i in range(len(Pool)):
+                problem += pulp.lpSum(W[(c, i)] for c in courses if (c, i) in W) <= 1
+
+    solveProblem(problem, metrics, trace, 'TA-assignment')
     if (pulp.LpStatus[problem.status] != 'Optimal'):
-        sys.exit("Pulp fail to find an optimal solution for LP.")  
-    upper_bound =pulp.value(problem.objective)
+        return {}
 
-    return upper_bound
+    return {c: i for (c, i), var in W.items() if var.varValue >= 1}
 
 #################################################################################
-def computeCWIWPoint(course_instructor, config, X, IW, CW):
+def taPhase(Pool, placeholders, X, problem, course_instructor, config, IW, CW, instructor_in_insPref, metrics, trace):
     '''
-    Usage: Compute IW and CW points earned from objective function
+    Usage: assign real TAs to the placeholder sections (a decomposition: the time model is the master problem and 
+           assignTAs() is the sub-problem). If no assignment exists, add TA cuts to the time model and solve it again, 
+           at most 'TA-cut-iterations' times. If no cut is found, the current times of the placeholder sections are forbidden.
 
-    Argument: 
+    Argument:
+    Pool(list)
+    placeholders(set)
+    X(list)
+    problem(pulp) {modified}
     course_instructor(list)
     config(dict)
-    X(list)
     IW(list)
     CW(list)
+    instructor_in_insPref(list)
+    metrics(dict) {modified}
+    trace(list) {modified}
 
-    Return variable: 
-    IW_point(float): IW points earned from objective function
-    CW_point(float): CW points earned from objective function
+    Return variable:
+    TAOf(dict): maps a course id to a TA index, empty if no assignment was found
     '''
 
-    TotalCourseNum = course_instructor[6]
-    totalSlot = config['SlotNumPerday']
-    CW_point = 0
-    IW_point = 0
-    for c in range(TotalCourseNum):
-        for d in range(5):
-            for t in range(totalSlot):
-                CW_point += CW[c][d][t] *  X[c][d][t].varValue
-                IW_point += IW[c][d][t] *  X[c][d][t].varValue
+    CourseInfo = course_instructor[5]
+    Sections = [c for c in range(course_instructor[6]) if CourseInfo[c].instructorId in placeholders]
+    metrics['Placeholder-sections'] = len(Sections)
+    metrics['TA-cuts'] = 0
+    if (Sections == []):
+        return {}
+    if (len(Sections) > sum(ta.maxSections for ta in Pool)):
+        print(f"Warning: the TA pool can teach at most {sum(ta.maxSections for ta in Pool)} sections, but there are {len(Sections)} placeholder sections", file=sys.stderr)
+        return {}
+
+    for iteration in range(config['TA-cut-iterations'] + 1):
+        Schedule = extractSolution(X, course_instructor, config, IW, CW, instructor_in_insPref)[0]
+        TAOf = assignTAs(Schedule, Sections, Pool, CourseInfo, metrics, trace)
+        if (TAOf != {}):
+            break
+        if (iteration == config['TA-cut-iterations']):
+            print(f"Warning: fail to assign TAs to the placeholder sections after {iteration} iterations", file=sys.stderr)
+            break
+        cutNum = addTACuts(findTACuts(Schedule, Sections, Pool, CourseInfo), Sections, Pool, CourseInfo, X, problem)
+        if (cutNum == 0):
+            chosen = [var for c in Sections for d in range(5) for var in X[c][d].values() if var.varValue >= 1]
+            problem += pulp.lpSum(chosen) <= len(chosen) - 1
+            cutNum = 1
+        metrics['TA-cuts'] += cutNum
+        solveProblem(problem, metrics, trace, 'TA-ILP')
+        if (pulp.LpStatus[problem.status] != 'Optimal'):
+            sys.exit("Pulp fail to find an optimal solution that the TA pool can teach.")
+    metrics['TA-cut-iterations'] = iteration
+    print(f"TA cuts added to the time model: {metrics['TA-cuts']}", file=sys.stderr)
+
+    return TAOf
+
+#################################################################################
+def generateTAOutput(Schedule, Pool, TAOf, course_instructor, output_dir):
+    '''
+    Usage: generate ta-assignment.txt, the TA of every placeholder section
+
+    Argument:
+    Schedule(list)
+    Pool(list)
+    TAOf(dict)
+    course_instructor(list)
+    output_dir(string)
+
+    File output:
+    ta-assignment.txt
+
+    Format for ta-assignment.txt file:
+    ###
+    200AA   	TA1                 	TR   	09:30   	10:20   	Alice
+    ###
+    '''
+
+    InstructorId2Name = course_instructor[3]
+    CourseInfo = course_instructor[5]
+    with open(output_dir+"ta-assignment.txt", "w") as file:
+        for c, i in sorted(TAOf.items()):
+            record = Schedule[c]
+            formatted_output = "{:<8}\t{:<20}\t{:<5}\t{:<8}\t{:<8}\t{}\n"\
+                .format(record.courseName, InstructorId2Name[CourseInfo[c].instructorId], ''.join(intlist2days(record.days)),\
+                        record.courseStart, record.courseEnd, Pool[i].name)
+            file.write(formatted_output)
 
-    return IW_point, CW_point
+    return
 
 #################################################################################
-def generate_output(X, output_dir, course_instructor, config, IW, instructor_in_insPref):
+def writeMipStart(solverFile, names):
     '''
-    Usage: generate schedule.txt based on X.varValue we get from ILP problem
+    Usage: write the current values of the variables as a CBC solution file next to the MPS file,
+           so that a re-solve of a slightly changed problem starts from the schedule we already have
 
-    Argument: 
+    Argument:
+    solverFile(SolverFile)
+    names(set): names of the variables to write, None for all of them. CBC completes a start that leaves variables out.
+
+    Return variable:
+    path(string)
+    '''
+
+    path = solverFile.path[:-len('.mps')] + '-start.sol'
+    with open(path, 'w') as file:
+        file.write("Stopped on iterations - objective value 0\n")
+        for i, var in enumerate(solverFile.variables):
+            if (names is not None and var.name not in names):
+                continue
+            # Columns are renamed X0000000, X0000001, ... by writeProblemFile()
+            file.write(f"{i:>7} X{i:07d} {var.varValue or 0:>15} {0:>23}\n")
+
+    return path
+
+#################################################################################
+def priceVariants(problem, X, IW, CW, course_instructor, config, instructor_in_insPref):
+    '''
+    Usage: write two changed copies of the problem for every instructor in the instructor preference file.
+           'relaxed': every candidate starting slot of the instructor's courses earns the points of the instructor's best
+                      window (IW coefficients change, none goes down). 'never' windows stay hard.
+           'hard': starting slots outside the instructor's preference are not allowed (upper bounds of X change).
+           The problem itself is restored after each copy is written.
+
+    Argument:
+    problem(pulp)
     X(list)
-    output_dir(string)
+    IW(list)
+    CW(list)
     course_instructor(list)
     config(dict)
+    instructor_in_insPref(list)
+
+    Return variable:
+    Variants(list): (instructor name, 'relaxed' or 'hard', SolverFile, mipStart file, granule)
+    '''
+
+    InstructorId2Name = course_instructor[3]
+    Instructor2Courses = course_instructor[4]
+    CourseInfo = course_instructor[5]
+    TotalCourseNum, totalSlot, l1, l2 = readParameterForProblem(course_instructor, config)
+    objective = problem.objective
+    Variants = []
+
+    for instructor_id in dict.fromkeys(instructor_in_insPref):
+        course_ids = [c for c in Instructor2Courses[instructor_id] if CourseInfo[c].sessionsPerWeek > 0]
+
+        # Weight of the instructor's best window that any of the courses fits in, e.g., 3 for a window of weight 3
+        weight = max((IW[c][d][t] * CourseInfo[c].sessionsPerWeek for c in course_ids for d in range(5) for t in X[c][d]), default=0)
+        relaxed = objective.copy()
+        for c in course_ids:
+            for d in range(5):
+                for t, var in X[c][d].items():
+                    relaxed[var] = l1 * CW[c][d][t] + l2 * weight / CourseInfo[c].sessionsPerWeek
+        problem.setObjective(relaxed)
+        solverFile = writeProblemFile(problem)
+        Variants.append((InstructorId2Name[instructor_id], 'relaxed', solverFile, writeMipStart(solverFile, None), objectiveGranule(relaxed)))
+        problem.setObjective(objective)
+
+        bounds = []
+        for c in course_ids:
+            for d in range(5):
+                for t, var in X[c][d].items():
+                    # Window weights are positive, so only slots outside every window earn 0
+                    if (IW[c][d][t] == 0):
+                        bounds.append((var, var.upBound))
+                        var.upBound = 0
+        solverFile = writeProblemFile(problem)
+        Variants.append((InstructorId2Name[instructor_id], 'hard', solverFile, writeMipStart(solverFile, None), objectiveGranule(objective)))
+        for var, upBound in bounds:
+            var.upBound = upBound
+
+    return Variants
+
+#################################################################################
+def solveVariant(solverFile, mipStart, granule, deadline):
+    '''
+    Usage: solve a changed copy of the problem without printing CBC's log. It runs in a worker thread of preferencePrices()
+           or solutionPool(), while CBC itself runs in its own process.
+
+    Argument:
+    solverFile(SolverFile)
+    mipStart(string)
+    granule(float)
+    deadline(float): time.perf_counter() value when the time budget runs out
+
+    Return variable:
+    status(string): e.g., 'Optimal', 'Infeasible', 'Not Solved' (time limit) or 'Skipped' (no time left)
+    objective(float): None if CBC found no solution
+    values(list): values[i] is the value of solverFile.variables[i], None if CBC found no solution
+    '''
+
+    remaining = deadline - time.perf_counter()
+    if (remaining < 1):
+        return 'Skipped', None, None
+    cmds, solution_file = cbcCommand(solverFile, False, round(min(15, remaining), 1), granule, mipStart)
+    subprocess.run(cmds, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not os.path.exists(solution_file):
+        return 'Undefined', None, None
+    status, objective, values, duals, reducedCosts = readSolution(solution_file, solverFile)
+    if (status == 'Infeasible'):
+        objective = None
+        values = None
+
+    return status, objective, values
+
+#################################################################################
+def preferencePrices(problem, X, IW, CW, course_instructor, config, instructor_in_insPref, metrics):
+    '''
+    Usage: find the price of every instructor's preference: how much the objective value goes up if the preference is
+           relaxed, and how much it goes down if the preference becomes a hard constraint. Every re-solve starts from the
+           current schedule. They run Price-workers at a time and stop when Price-time-budget-in-seconds is used up.
+
+    Argument:
+    problem(pulp): the solved ILP problem
+    X(list)
     IW(list)
-    instructor_in_insPref(list): instructor id for those who appear in instrutcor pref file
+    CW(list)
+    course_instructor(list)
+    config(dict)
+    instructor_in_insPref(list)
+    metrics(dict) {modified}: number of re-solves and their time
 
-    Return variable: 
-    NumCNoPref(int): total number of courses that don't have an instructor preference (could be regular course or TA session)
-    InsNotMet(defaultdict): instructor who has a preference that are not met. 
-        key is the instructor id and value is a set of course names that didn't meet preference. e.g., {8: {'520'}})
-    BPNotMet(set): a set of course names that didn't meet block policy. e.g., {'234', '233AH'}
+    Return variable:
+    Prices(list): (instructor name, gain if relaxed, loss if hard, note), sorted by gain and loss. 
+                  gain and loss are None if the re-solve gave no answer, and loss is inf if the hard preference can not be met.
+    '''
+
+    price_start = time.perf_counter()
+    deadline = price_start + config['Price-time-budget-in-seconds']
+    workers = config['Price-workers'] if config['Price-workers'] > 0 else os.cpu_count()
+    base = pulp.value(problem.objective)
+
+    Variants = priceVariants(problem, X, IW, CW, course_instructor, config, instructor_in_insPref)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(solveVariant, solverFile, mipStart, granule, deadline) for name, kind, solverFile, mipStart, granule in Variants]
+        results = [future.result()[:2] for future in futures]
+    for name, kind, solverFile, mipStart, granule in Variants:
+        removeProblemFile(solverFile)
+
+    answers = defaultdict(dict)
+    for (name, kind, solverFile, mipStart, granule), (status, objective) in zip(Variants, results):
+        answers[name][kind] = (status, objective)
+    Prices = []
+    for name, answer in answers.items():
+        notes = [f"{kind}: {status}" for kind, (status, objective) in answer.items() if status != 'Optimal']
+        status, objective = answer['relaxed']
+        gain = objective - base if objective is not None else None
+        status, objective = answer['hard']
+        loss = base - objective if objective is not None else (math.inf if status == 'Infeasible' else None)
+        Prices.append((name, gain, loss, ', '.join(notes)))
+    Prices.sort(key=lambda price: (-(price[1] or 0), -(price[2] or 0), price[0]))
+
+    metrics['Price-solves'] = sum(1 for status, objective in results if status != 'Skipped')
+    metrics['Price-seconds'] = time.perf_counter() - price_start
+
+    return Prices
+
+#################################################################################
+def generatePriceOutput(Prices, output_dir):
+    '''
+    Usage: generate preference-prices.txt, the ranked table of preference prices. "Not Solved" means the re-solve hit its
+           time limit, so the number is only a bound; "Skipped" means the time budget ran out before the re-solve started.
+
+    Argument:
+    Prices(list): generated by preferencePrices()
+    output_dir(string)
 
     File output:
-    schedule.txt
+    preference-prices.txt
 
-    Format for schedule.txt file:
+    Format for preference-prices.txt file:
     ###
-    200     	McGarrity           	MWF  	14:30   	15:20   	50   	-  	-  
-    233     	Evans               	MWF  	08:30   	09:20   	50   	y  	y  
+    Instructor          	Gain-if-relaxed	Loss-if-hard	Note
+    Bender              	1              	0           	
+    Xia                 	0              	infeasible  	hard: Infeasible
     ###
     '''
 
-    InstructorId2Name = course_instructor[3]
-    CourseInfo = course_instructor[5]
-    TotalCourseNum = course_instructor[6]
-    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
-    totalSlot = config['SlotNumPerday']
-    BlockingSlot = list(range(config['BlockSchedulingStartsAtid'], config['BlockSchedulingEndsAtid'] + 1))
-    NumCNoPref = 0
-    InsNotMet = defaultdict(set)
+    with open(output_dir+"preference-prices.txt", "w") as file:
+        file.write("{:<20}\t{:<15}\t{:<12}\t{}\n".format('Instructor', 'Gain-if-relaxed', 'Loss-if-hard', 'Note'))
+        for name, gain, loss, note in Prices:
+            gain = '-' if gain is None else f"{gain:.4g}"
+            loss = '-' if loss is None else ('infeasible' if loss == math.inf else f"{loss:.4g}")
+            file.write("{:<20}\t{:<15}\t{:<12}\t{}\n".format(name, gain, loss, note))
 
-    with open(output_dir+"schedule.txt", "w") as file:
-        for c in range(TotalCourseNum):
-            course_name = CourseInfo[c].courseName
-            if (CourseInfo[c].instructorId != -1):
-                instructor_name = InstructorId2Name[CourseInfo[c].instructorId]
-            else:
-                instructor_name = '-'  
-            meetIP = 'y'
-            days = []
-            slots = set()
-            
-            for d in range(5):
-                for t in range(totalSlot):
-                    if (X[c][d][t].varValue >= 1):
-                        if (IW[c][d][t] == 0):
-                            meetIP = 'n'
-                            if (CourseInfo[c].instructorId in instructor_in_insPref):
-                                InsNotMet[CourseInfo[c].instructorId].add(course_name)
-                        days.append(d)
-                        slots.add(t)
-            # If an instructor does not appear in the insPref file, we use '-'
-            if (CourseInfo[c].instructorId not in instructor_in_insPref):
-                meetIP = '-'
-                NumCNoPref += 1
-
-            slots = list(slots)
-            if (len(slots) > 1):
-                # print('more than one session in a day')
-                sys.exit('more than one session in a day')  
-            else:
-                course_start = timeSlotId2ISlot(start_time, slots[0])
+    return
 
-            teaching_days = ''.join(intlist2days(days))
-            session_length = CourseInfo[c].lengPerSession
-            course_end = (time_transfer(course_start, "config", -1) + timedelta(minutes=session_length)).strftime('%H:%M')
-            
-            meetBP, BPNotMet = checkMeetBP(config, slots, session_length, BlockingSlot, course_name)
+#################################################################################
+def currentAssignment(X):
+    '''
+    Usage: read which X variables of every course are 1 in the current solution
 
-            formatted_output = "{:<8}\t{:<20}\t{:<5}\t{:<8}\t{:<8}\t{:<5}\t{:<3}\t{:<3}\n"\
-                .format(course_name, instructor_name, teaching_days, course_start, course_end, session_length, meetBP, meetIP)
-            file.write(formatted_output)
-    
-    return NumCNoPref, InsNotMet, BPNotMet
+    Argument:
+    X(list)
+
+    Return variable:
+    Assignment(list): Assignment[c] is the frozenset of names of the X variables of course c that are 1, e.g., frozenset({'X_3_0_4', 'X_3_2_4'})
+    '''
+
+    return [frozenset(var.name for d in range(5) for var in X[c][d].values() if (var.varValue or 0) >= 0.5) for c in range(len(X))]
 
 #################################################################################
-def checkMeetBP(config, slots, session_length, BlockingSlot, course_name):
+def setAssignment(X, Assignment):
     '''
-    Usage: check whether a course meet Block Policy or not
+    Usage: set the values of X to an assignment, so that extractSolution() and writeMipStart() see that schedule
 
-    Argument: 
-    config(dict)
-    slots(dict): currently we only have one element in slots, which is slot id for a course
-    session_length(int): session length for a course 
-    BlockingSlot(list): slot id that are between block starting time and block ending time
-    course_name(string): e.g., '200'
+    Argument:
+    X(list) {modified}
+    Assignment(list): see currentAssignment()
+    '''
 
-    Return variable: 
-    meetBP(string): 'n' or 'y' or '-'. '-' means its before block starting time or after block ending time. 
-    BPNotMet(set): an set that contain course id that doesn't meet block policy
+    for c in range(len(X)):
+        for d in range(5):
+            for var in X[c][d].values():
+                var.varValue = 1 if var.name in Assignment[c] else 0
+
+    return
+
+#################################################################################
+def movedBetween(Assignment1, Assignment2):
     '''
+    Usage: find the courses that have different days or a different starting time in two assignments
 
-    meetBP = 'y'  
-    BPNotMet = set()        
-    #if course begin after 14:30, meetBP = '-'
-    if (slots[0] > config['BlockSchedulingEndsAtid'] or slots[0] < config['BlockSchedulingStartsAtid']):
-        meetBP = '-'
-    #if course begin before 14:30 and violates block policy, meetBP = 'n'
-    else:
-        match session_length:
-            case 50:
-                for s in slots:
-                    if (s in BlockingSlot and s not in config['50-min-class-start-time']):
-                        meetBP = 'n'
-                        BPNotMet.add(course_name)
-            case 80:
-                for s in slots:
-                    if (s in BlockingSlot and s not in config['80-min-class-start-time']):
-                        meetBP = 'n'
-                        BPNotMet.add(course_name)
-            case 110:
-                for s in slots:
-                    if (s in BlockingSlot and s not in config['110-min-class-start-time']):
-                        meetBP = 'n'
-                        BPNotMet.add(course_name)
-            case 170:
-                for s in slots:
-                    if (s in BlockingSlot and s not in config['170-min-class-start-time']):
-                        meetBP = 'n'
-                        BPNotMet.add(course_name)
+    Return variable:
+    moved(list): course ids
+    '''
 
-    return meetBP, BPNotMet
+    return [c for c in range(len(Assignment1)) if Assignment1[c] != Assignment2[c]]
 
 #################################################################################
-def generateHeatMap(Y, output_dir, config, NonExemptedC, TotalNonExemptedHours):
+def partitionSubspace(subspace, Assignment, X):
     '''
-    Usage: generate heatmap.txt based on Y.varValue we get from ILP problem
+    Usage: split the schedules of a subspace, except Assignment, into disjoint subspaces (the Lawler-Murty scheme).
+           Child i keeps the days and starting times that Assignment gives the first i-1 courses that can move, 
+           and forbids the ones it gives the i-th course. So every other schedule of the subspace is in exactly one child.
 
-    Argument: 
-    Y(list)
-    output_dir(string)
-    config(dict)
-    NonExemptedC(list): a list of non-exempted course's course id
-    TotalNonExemptedHours(float)
+    Argument:
+    subspace(PoolSubspace)
+    Assignment(list): the best assignment in the subspace
+    X(list)
 
-    File output: 
-    headtmap.txt
+    Return variable:
+    children(list): list of PoolSubspace
+    '''
 
-    Format for headtmap.txt file:
-    ###
-        M	T	W	R	F	Hourly total	Hourly Target
-    08:30	2.0	2.0	2.0	3.0	1.0	10.0    	10  
-    ###
+    children = []
+    kept = dict(subspace.kept)
+    for c in range(len(X)):
+        if (c in kept or Assignment[c] == frozenset()):
+            continue
+        # A course whose other starting slots are all fixed to 0 can not move
+        free = sum(1 for d in range(5) for var in X[c][d].values() if var.upBound != 0)
+        if (free <= len(Assignment[c])):
+            continue
+        children.append(PoolSubspace(dict(kept), subspace.forbidden + [(c, Assignment[c])], Assignment))
+        kept[c] = Assignment[c]
+
+    return children
+
+#################################################################################
+def writeSubspace(problem, X, Var, subspace):
     '''
+    Usage: write the problem restricted to a subspace, and a start for CBC: the schedule the subspace was split from, 
+           without the course that has to move. The problem itself is restored after the file is written.
 
-    start_slot = config['10PercRuleStartsAtid']
-    start_time = time_transfer(config['10PercRuleStartsAt'], "config", -1)
-    end_slot = config['10PercRuleEndsAtid']
-    target_value = math.ceil(TotalNonExemptedHours * config['RulePercentage'])
-    with open(output_dir+"heatMap.txt", "w") as file:
-        file.write(f"\tM\tT\tW\tR\tF\tHourly total\tHourly Target\n")
-        for i in range(start_slot, end_slot + 1, 2):
-            time = timeSlotId2ISlot(start_time, i)
-            weekly_sum = []
-            for d in range(5):
-                total_sum = 0
-                for c in NonExemptedC:                    
-                    total_sum += (Y[c][d][i].varValue / 2)
-                    total_sum += (Y[c][d][i+1].varValue / 2)
-                weekly_sum.append(total_sum)
-            formatted_output = "{:<5}\t{:<3}\t{:<3}\t{:<3}\t{:<3}\t{:<3}\t{:<8}\t{:<8}\n".format(time, weekly_sum[0], weekly_sum[1], weekly_sum[2], weekly_sum[3], weekly_sum[4], sum(weekly_sum), target_value)
-            file.write(formatted_output)
+    Argument:
+    problem(pulp)
+    X(list) {modified}: its values are set to subspace.parent
+    Var(dict): maps the name of an X variable to the variable
+    subspace(PoolSubspace)
 
-    return
+    Return variable:
+    solverFile(SolverFile)
+    mipStart(string)
+    '''
+
+    bounds = []
+    for c, names in subspace.kept.items():
+        for d in range(5):
+            for var in X[c][d].values():
+                if (var.name not in names and var.upBound != 0):
+                    bounds.append((var, var.upBound))
+                    var.upBound = 0
+    rows = []
+    for i, (c, names) in enumerate(subspace.forbidden):
+        rows.append(f"NoGood_{i}")
+        problem += (pulp.lpSum(Var[name] for name in names) <= len(names) - 1, rows[-1])
+
+    solverFile = writeProblemFile(problem)
+    for name in rows:
+        del problem.constraints[name]
+    for var, upBound in bounds:
+        var.upBound = upBound
+
+    moving = subspace.forbidden[-1][0]
+    setAssignment(X, subspace.parent)
+    mipStart = writeMipStart(solverFile, {name for c in range(len(X)) if c != moving for name in subspace.parent[c]})
+
+    return solverFile, mipStart
 
 #################################################################################
-def printStandardOutput(config, course_instructor, NonExemptedC, TotalNonExemptedHours, IW_point, CW_point, NumCNoPref, InsNotMet, BPNotMet, problem, upper_bound):
+def addDiversityC(X, Var, Assignment, index, config, problem):
     '''
-    Usage: print out some useful information in stderr file
+    Usage: adding diversity constraints: every later schedule must move at least 'Alternative-min-moved-courses' courses 
+           away from an accepted assignment. S[c] is 1 if course c keeps all the X variables it has in the assignment.
 
-    Argument: 
-    config(dict): parameters read from config file
-    course_instructor(list): information read from course instructor(courseThisQuarter) file
-    NonExemptedC(list): a list of non-exempted course's course id
-    TotalNonExemptedHours(float): total number of non exempted hours
-    IW_point(float): points earned from instructor preference weight
-    CW_point(float): points earned from UW policy weight
-    NumCNoPref(int): number of course that doesn't have an instructor preference
-    InsNotMet(defaultdict): instructor who has a preference that are not met. 
-        key is the instructor id and value is a set of course names that didn't meet preference. e.g., {8: {'520'}})
-    BPNotMet(set): a set of course names that didn't meet block policy. e.g., {'234', '233AH'}
-    problem(pulp): ILP problem we defined using pulp
-    upper_bound(float): optimal value calculated from LP problem
+    Argument:
+    X(list)
+    Var(dict)
+    Assignment(list)
+    index(int): number of the accepted assignment, used in variable names
+    config(dict)
+    problem(pulp) {modified}
     '''
 
-    InstructorId2Name = course_instructor[3]
-    print(f"10%-rule-percentage={config['RulePercentage']}", file=sys.stderr)
-    print(f"Must-follow-block-policy={config['Must-follow-block-policy']}\n", file=sys.stderr)
-    print(f"Result: {pulp.LpStatus[problem.status]}", file=sys.stderr)
-    print(f"Objective value: {pulp.value(problem.objective)}", file=sys.stderr)
-    print(f"Upper bound: {upper_bound}", file=sys.stderr) # Upper bound is the optimal value for LP problem
-    print(f"IW points earned: {IW_point}", file=sys.stderr)
-    print(f"CW points earned: {CW_point}", file=sys.stderr)
-    courseID2Name = course_instructor[1]
-    NonExemptedCName = [courseID2Name[course_id] for course_id in NonExemptedC]
-    TotalC = list(range(course_instructor[6]))
-    ExemptedC = [c for c in TotalC if c not in NonExemptedC]
-    ExemptedCName = [courseID2Name[course_id] for course_id in ExemptedC]
-    print(f"Total Number of Course: {course_instructor[6]}", file=sys.stderr)
-    print(f"Exempted Courses List: {ExemptedCName}", file=sys.stderr)
-    print(f"Total Number of Non-Exempted Courses: {len(NonExemptedCName)}", file=sys.stderr)
-    print(f"Total Number of Non-Exempted Hours: {TotalNonExemptedHours}\n", file=sys.stderr)
-    print(f"The number of courses for which the instructors are not listed in the instructorpref file: {NumCNoPref}", file=sys.stderr)
-    print(f"The number of courses for which the instructors' preference are not met: {int(course_instructor[6] - IW_point - NumCNoPref)}", file=sys.stderr)
-    if (len(InsNotMet) > 0):
-        print(f"Instructors whose preference are not met: ", file=sys.stderr)
-        for i in InsNotMet.keys():
-            print(f"Instructor's name: {InstructorId2Name[i]}\tCourses that violate preference{InsNotMet[i]}", file=sys.stderr)
-    print(f"\nThe number of courses that violate Block Policy: {len(BPNotMet)}", file=sys.stderr)
-    if (len(BPNotMet) > 0):
-        print(f"Courses that violate Block Policy: {BPNotMet}", file=sys.stderr)       
+    S = []
+    for c in range(len(X)):
+        names = Assignment[c]
+        if (names == frozenset()):
+            continue
+        S.append(pulp.LpVariable(f"S_{index}_{c}", 0, 1, cat='Continuous'))
+        problem += S[-1] >= pulp.lpSum(Var[name] for name in names) - (len(names) - 1)
+    problem += pulp.lpSum(S) <= len(S) - config['Alternative-min-moved-courses']
 
-    return        
+    return
 
 #################################################################################
-def createCSVrow(CourseInfo, c, config, InstructorId2Name, totalSlot, X, start_time, BPNotMet, InsNotMet, instructor_in_insPref):
+def solutionPool(problem, X, config, metrics):
     '''
-    Usage: generate one row in schedule.txt file
+    Usage: find up to 'Alternatives' schedules that come closest to the best one. Schedules are split into disjoint 
+           subspaces (see partitionSubspace()), every subspace is solved on its own, 'Alternative-workers' at a time, 
+           and the best answer over all subspaces is the next alternative. Its subspace is split again.
+           If 'Alternative-min-moved-courses' is more than 1, diversity constraints are added for every accepted schedule;
+           an answer found before a schedule was accepted is solved again if it is too close to that schedule.
+           The search stops when 'Alternative-time-budget-in-seconds' is used up, or, if 'Alternative-gap-percentage' is
+           not negative, when the next schedule is more than that percentage below the best objective value.
+           Room cuts already added to the problem are kept, but rooms are not assigned to the alternatives.
 
-    Argument: 
-    CourseInfo(list)
-    c(int): a course id
+    Argument:
+    problem(pulp) {modified}: the solved ILP problem. Diversity constraints stay in it.
+    X(list): its values are set back to the best schedule at the end
     config(dict)
-    InstructorId2Name(list): e.g., ['McGarrity', 'Evans', 'Wassink', ...]
-    totalSlot(int)
-    X(list)
-    start_time(datetime)
-    BPNotMet(set)
-    InsNotMet(defaultdict)
-    instructor_in_insPref(list): instructor id for those appears in instructor preference file
+    metrics(dict) {modified}: number of solves and their time
 
-    Return variable: 
-    course_name(string), e.g., '200'
-    instructor_name(string), e.g., 'Cheng'
-    session_length(int), e.g., 50
-    meetBP(string), e.g., '-'
-    meetIP(string), e.g., 'y'
-    teaching_days(string), e.g., 'M W F'
-    course_start(string), e.g., '14:30'
-    course_end(string), e.g., '15:20'
-    '''
-
-    course_name = CourseInfo[c].courseName
-    if (CourseInfo[c].instructorId != -1):
-        instructor_name = InstructorId2Name[CourseInfo[c].instructorId]
-    else:
-        instructor_name = '-'  
-    days = []
-    slots = set()     
-    for d in range(5):
-        for t in range(totalSlot):
-            if (X[c][d][t].varValue >= 1):
-                days.append(d)
-                slots.add(t)
-    slots = list(slots)
-    if (len(slots) > 1):
-        sys.exit('more than one session in a day')
-    else:
-        course_start = timeSlotId2ISlot(start_time, slots[0])
-    session_length = CourseInfo[c].lengPerSession
-    course_end = (time_transfer(course_start, "config", -1) + timedelta(minutes=session_length)).strftime('%H:%M')
-    teaching_days = ' '.join(intlist2days(days))
+    Return variable:
+    Alternatives(list): (Assignment, objective, status), from the best to the worst. status is 'Not Solved' if a 
+                        solve hit its time limit, so a better schedule may have been missed.
+    '''
 
-    if (slots[0]> config['BlockSchedulingEndsAtid'] or slots[0] < config['BlockSchedulingStartsAtid']):
-        meetBP = '-'
-    elif (c in BPNotMet):
-        meetBP = 'n'
-    else:
-        meetBP = 'y'
+    pool_start = time.perf_counter()
+    deadline = pool_start + config['Alternative-time-budget-in-seconds']
+    workers = config['Alternative-workers'] if config['Alternative-workers'] > 0 else os.cpu_count()
+    minMoved = config['Alternative-min-moved-courses']
+    granule = objectiveGranule(problem.objective)
+    Var = {var.name: var for X_c in X for X_d in X_c for var in X_d.values()}
+    Names = [[var.name for X_d in X_c for var in X_d.values()] for X_c in X]
+    best = currentAssignment(X)
+    base = pulp.value(problem.objective)
+    lowest = base - abs(base) * config['Alternative-gap-percentage'] / 100 if config['Alternative-gap-percentage'] >= 0 else -math.inf
+
+    Accepted = [best]
+    if (minMoved > 1):
+        addDiversityC(X, Var, best, 0, config, problem)
+    Alternatives = []
+    # Heap of solved subspaces: (-objective, order, subspace, assignment, status, number of accepted schedules when solved)
+    queue = []
+    order = 0
+    solves = 0
+    pending = partitionSubspace(PoolSubspace({}, [], best), best, X)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while (len(Alternatives) < config['Alternatives']):
+            files = [writeSubspace(problem, X, Var, subspace) for subspace in pending]
+            futures = [executor.submit(solveVariant, solverFile, mipStart, granule, deadline) for solverFile, mipStart in files]
+            for subspace, (solverFile, mipStart), future in zip(pending, files, futures):
+                status, objective, values = future.result()
+                solves += status != 'Skipped'
+                if (objective is not None):
+                    value = {var.name: v for var, v in zip(solverFile.variables, values)}
+                    assignment = [frozenset(name for name in Names[c] if value.get(name, 0) >= 0.5) for c in range(len(X))]
+                    heapq.heappush(queue, (-objective, order, subspace, assignment, status, len(Accepted)))
+                    order += 1
+                removeProblemFile(solverFile)
+
+            if (queue == []):
+                break
+            negObjective, _, subspace, assignment, status, acceptedNum = heapq.heappop(queue)
+            if (-negObjective < lowest - 1e-6):
+                break
+            # Solved before the last schedules were accepted, and too close to one of them
+            if any(len(movedBetween(assignment, other)) < minMoved for other in Accepted[acceptedNum:]):
+                pending = [subspace]
+                continue
+            Alternatives.append((assignment, -negObjective, status))
+            Accepted.append(assignment)
+            if (minMoved > 1):
+                addDiversityC(X, Var, assignment, len(Accepted) - 1, config, problem)
+            pending = partitionSubspace(subspace, assignment, X) if len(Alternatives) < config['Alternatives'] else []
+    setAssignment(X, best)
+
+    metrics['Alternative-solves'] = solves
+    metrics['Alternative-seconds'] = time.perf_counter() - pool_start
+    metrics['Alternatives found'] = len(Alternatives)
 
-    meetIP = 'y'
-    if (CourseInfo[c].instructorId in InsNotMet and course_name in InsNotMet[CourseInfo[c].instructorId]):
-        meetIP = 'n'
-    if (CourseInfo[c].instructorId not in instructor_in_insPref):
-        meetIP = '-'
-    return course_name, instructor_name, session_length, meetBP, meetIP, teaching_days, course_start, course_end
+    return Alternatives
 
 #################################################################################
-def generateNonExCSV(output_dir, X, course_instructor, config, NonExemptedC, InsNotMet, BPNotMet, instructor_in_insPref):
+def generateAlternativeOutput(Alternatives, X, course_instructor, config, IW, CW, instructor_in_insPref, NonExemptedC, TotalNonExemptedHours, base, output_dir):
     '''
-    Usage: generate schedule-nonEx.csv. Only include non-exempt courses.
+    Usage: write every alternative schedule with the same writers as the best one, into output_dir/alternative-<k>/, 
+           and generate alternatives.txt, which lists how each alternative differs from the best schedule.
 
-    Argument: 
-    output_dir(string)
-    X(list)
+    Argument:
+    Alternatives(list): generated by solutionPool()
+    X(list): its values are set back to the best schedule at the end
     course_instructor(list)
     config(dict)
-    NonExemptedC(list)
-    InsNotMe(defaultdict)
-    BPNotMet(set)
+    IW(list)
+    CW(list)
     instructor_in_insPref(list)
+    NonExemptedC(list)
+    TotalNonExemptedHours(float)
+    base(float): objective value of the best schedule
+    output_dir(string)
 
     File output:
-    scedule-NonEx.csv
+    alternatives.txt, alternative-<k>/schedule.txt, schedule.csv, schedule-nonEx.csv and heatMap.txt
 
-    Format for scedule-NonEx.csv file:
+    Format for alternatives.txt file:
     ###
-    Course,Instructor,Length,Meet-block-policy,Meet-Instructor-Preference,Days,Start,End,Notes,
-    LING 200,McGarrity,50,-,-,M W F,1430,1520,,
+    Alternative 1: objective value 18.5 (0.5 below the best schedule), 2 course(s) moved
+        450/550 	MW 10:30 -> TR 13:30
+        599A    	F 13:30 -> F 14:30
     ###
     '''
 
-    InstructorId2Name = course_instructor[3]
-    CourseInfo = course_instructor[5]
-    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
-    totalSlot = config['SlotNumPerday']
-    fields = ['Course', 'Instructor', 'Length', 'Meet-block-policy','Meet-Instructor-Preference','Days','Start','End','Notes']
-    rows = []
-    for c in NonExemptedC:
-        course_name, instructor_name, session_length, meetBP, meetIP, teaching_days, course_start, course_end = createCSVrow(CourseInfo, c, config, InstructorId2Name, totalSlot, X, start_time, BPNotMet, InsNotMet, instructor_in_insPref)
-        rows.append(['LING '+course_name, instructor_name, session_length, meetBP, meetIP, teaching_days, course_start.replace(':',''), course_end.replace(':',''), ''])
+    best = currentAssignment(X)
+    BestSchedule = extractSolution(X, course_instructor, config, IW, CW, instructor_in_insPref)[0]
+    with open(output_dir+"alternatives.txt", "w") as file:
+        if (Alternatives == []):
+            file.write("No alternative schedule was found.\n")
+        for k, (assignment, objective, status) in enumerate(Alternatives, 1):
+            setAssignment(X, assignment)
+            Schedule = extractSolution(X, course_instructor, config, IW, CW, instructor_in_insPref)[0]
+            alternative_dir = output_dir + f"alternative-{k}/"
+            os.makedirs(alternative_dir, exist_ok=True)
+            generate_output(Schedule, alternative_dir, course_instructor)
+            generateHeatMap(Schedule, alternative_dir, config, course_instructor, NonExemptedC, TotalNonExemptedHours)
+            generateNonExCSV(alternative_dir, Schedule, course_instructor, NonExemptedC)
+            generateCSV(alternative_dir, Schedule, course_instructor, NonExemptedC)
+
+            moved = movedBetween(best, assignment)
+            note = ', stopped at the time limit' if status != 'Optimal' else ''
+            file.write(f"Alternative {k}: objective value {objective:.4g} ({base - objective:.4g} below the best schedule), {len(moved)} course(s) moved{note}\n")
+            for c in moved:
+                old, new = BestSchedule[c], Schedule[c]
+                file.write("    {:<8}\t{} {} -> {} {}\n".format(old.courseName, ''.join(intlist2days(old.days)), old.courseStart,\
+                                                              ''.join(intlist2days(new.days)), new.courseStart))
+    setAssignment(X, best)
 
-    with open(output_dir+"schedule-nonEx.csv", 'w') as csvfile:  
-        # creating a csv writer object  
-        csvwriter = csv.writer(csvfile)  
-        csvwriter.writerow('') 
-        csvwriter.writerow(fields)                
-        csvwriter.writerows(rows) 
-    
     return
 
 #################################################################################
-def generateCSV(output_dir, X, course_instructor, config, NonExemptedC, InsNotMet, BPNotMet, instructor_in_insPref):
+def writeMetrics(metrics, output_dir):
     '''
-    Usage: generate schedule.csv. Include all the courses. The order is non-exempted courses, exempted courses, TA sessions.
+    Usage: generate metrics.txt, which records solution quality and build/solve time of this run.
+           bin/benchmark.py reads this file to compare runs across commits.
 
     Argument: 
+    metrics(dict): e.g., {'LP-build-seconds': 0.41, 'ILP-solve-seconds': 0.28, 'Objective value': 17.0}
     output_dir(string)
-    X(list)
-    course_instructor(list)
-    config(dict)
-    NonExemptedC(list)
-    InsNotMe(defaultdict)
-    BPNotMet(set)
-    instructor_in_insPref(list)
 
     File output:
-    schedule.csv
+    metrics.txt
 
-    Format for scedule.csv file:
+    Format for metrics.txt file:
     ###
-    Course,Instructor,Length,Meet-block-policy,Meet-Instructor-Preference,Days,Start,Exempted,Notes,
-    LING 200,McGarrity,50,-,-,M W F,1430,1520,0,
+    LP-build-seconds = 0.41
+    Objective value = 17.0
     ###
     '''
 
-    InstructorId2Name = course_instructor[3]
-    CourseInfo = course_instructor[5]
-    TotalCourseNum = course_instructor[6]
-    start_time = time_transfer(config['InstructDayStartsAt'], "config", -1)
-    totalSlot = config['SlotNumPerday']
-    fields = ['Course', 'Instructor', 'Length', 'Meet-block-policy','Meet-Instructor-Preference','Days','Start','End','Exempted','Notes','']
-    rows = []
-
-    #First NonExempted Course
-    for c in NonExemptedC:
-        if (CourseInfo[c].isTASession == 0):
-            course_name, instructor_name, session_length, meetBP, meetIP, teaching_days, course_start, course_end = createCSVrow(CourseInfo, c, config, InstructorId2Name, totalSlot, X, start_time, BPNotMet, InsNotMet, instructor_in_insPref)
-            rows.append(['LING '+course_name, instructor_name, session_length, meetBP, meetIP, teaching_days, course_start.replace(':',''), course_end.replace(':',''), '0', ''])
-    rows.append(['']*10)
-
-    # Then Exempted Course
-    for c in range(TotalCourseNum):
-        if (c not in NonExemptedC and CourseInfo[c].isTASession == 0):
-            course_name, instructor_name, session_length, meetBP, meetIP, teaching_days, course_start, course_end = createCSVrow(CourseInfo, c, config, InstructorId2Name, totalSlot, X, start_time, BPNotMet, InsNotMet, instructor_in_insPref)
-            rows.append(['LING '+course_name, instructor_name, session_length, meetBP, meetIP, teaching_days, course_start.replace(':',''), course_end.replace(':',''), '1', ''])
-    rows.append(['']*10)
-
-    # Finally TA sessions
-    for c in range(TotalCourseNum):
-        if (CourseInfo[c].isTASession == 1):
-            course_name, instructor_name, session_length, meetBP, meetIP, teaching_days, course_start, course_end = createCSVrow(CourseInfo, c, config, InstructorId2Name, totalSlot, X, start_time, BPNotMet, InsNotMet, instructor_in_insPref)
-            rows.append(['LING '+course_name, instructor_name, session_length, meetBP, meetIP, teaching_days, course_start.replace(':',''), course_end.replace(':',''), CourseInfo[c].exempted, ''])
-
-    with open(output_dir+"schedule.csv", 'w') as csvfile:  
-        # creating a csv writer object  
-        csvwriter = csv.writer(csvfile)  
-        csvwriter.writerow('') 
-        csvwriter.writerow(fields)                
-        csvwriter.writerows(rows) 
+    with open(output_dir+"metrics.txt", "w") as file:
+        for key, value in metrics.items():
+            file.write(f"{key} = {value}\n")
 
     return
 
@@ -1971,15 +5445,72 @@ def printPath(config_file, courseInstructor_file, courseInfo_file, conflict_file
 
     return
 
+#################################################################################
+def checkInputs(config_file):
+    '''
+    Usage: the --check mode. Read the config file and all the input files, check them against each other and report
+           every error found. It does not import pulp and does not write any file, so it is fast enough to run on every save.
+
+    Argument: 
+    config_file(string)
+
+    Return variable: 
+    errors(list): error messages, empty if the input files are fine
+    '''
+
+    global InputErrors
+    InputErrors = []
+    try:
+        config = read_config(config_file)
+        course_instructor = read_courseInstructor(config['CourseInstructor'], config)
+        read_courseInfo(config['CourseInfo'], course_instructor, config)
+        checkCourses(course_instructor, createCandidates(course_instructor, config))
+        placeholders = placeholderInstructors(course_instructor, config)
+        read_conflict(config['ConflictCourse'], course_instructor, placeholders)
+        read_instructorPref(config['InstructorPref'], course_instructor, config, placeholders)
+        if (config['Rooms'] != '-'):
+            read_rooms(config['Rooms'])
+        if (config['TAPool'] != '-'):
+            read_taPool(config['TAPool'], config)
+        if (config['ReferenceSchedule'] != '-'):
+            read_referenceSchedule(config['ReferenceSchedule'], course_instructor, config)
+        # The enrollment file is large, so we only check that it exists
+        if (config['Enrollment'] != '-' and not os.path.isfile(config['Enrollment'])):
+            inputError(f"Enrollment file {config['Enrollment']} does not exist.")
+    except InputError as e:
+        inputError(str(e))
+    except OSError as e:
+        inputError(f"Can not read {e.filename}: {e.strerror}.")
+
+    return InputErrors
+
 #################################################################################
 def main():
+    global pulp, Backend
+    arguments = [arg for arg in sys.argv[1:] if arg not in ['--check', '--prices', '--alternatives']]
+    config_file = arguments[0]
+
+    # --check: only check the input files, e.g., python time-schedule.py config --check
+    if ('--check' in sys.argv[1:]):
+        check_start = time.perf_counter()
+        errors = checkInputs(config_file)
+        for message in errors:
+            print(message, file=sys.stderr)
+        print(f"{len(errors)} error(s) found in {(time.perf_counter() - check_start) * 1000:.0f} ms", file=sys.stderr)
+        sys.exit(1 if errors else 0)
+
     #Step 1: read config file, print related information.
+    import pulp
     current_time = datetime.now()
+    run_start = time.perf_counter()
     print(f"Log file generate at {current_time}", file=sys.stderr)
     print(f"python version: {sys.version}",  file=sys.stderr)
     print(f"pulp version: {pulp.__version__}",  file=sys.stderr)
-    config_file = sys.argv[1]
-    config = read_config(config_file)
+    try:
+        config = read_config(config_file)
+    except InputError as e:
+        sys.exit(str(e))
+    copyfiles(config)
     courseInfo_file = config['CourseInfo']
     courseInstructor_file = config['CourseInstructor']
     conflict_file = config['ConflictCourse']
@@ -1990,25 +5521,125 @@ def main():
     #Step 2: read all the other files.
     course_instructor = read_courseInstructor(courseInstructor_file, config)
     NonExemptedC, TotalNonExemptedHours = read_courseInfo(courseInfo_file, course_instructor, config)
-    conflict_course_pairs = read_conflict(conflict_file, course_instructor)
-    print_conflictPairs(conflict_course_pairs, course_instructor)
-    IW, SameDayPairs, instructor_in_insPref = read_instructorPref(instructorPref_file, course_instructor, config)
+    Candidates = createCandidates(course_instructor, config)
+    checkCourses(course_instructor, Candidates)
+    placeholders = placeholderInstructors(course_instructor, config)
+    conflict_course_pairs = read_conflict(conflict_file, course_instructor, placeholders)
+    SoftConflictPairs = {}
+    if (config['Enrollment'] != '-'):
+        CoEnrollment, enrollmentRowNum = read_enrollment(config['Enrollment'], course_instructor)
+        SoftConflictPairs, hardPairNum = splitCoEnrollment(CoEnrollment, conflict_course_pairs, config)
+    print_conflictPairs(conflict_course_pairs, course_instructor, placeholders)
+    Preferences, SameDayPairs, instructor_in_insPref = read_instructorPref(instructorPref_file, course_instructor, config, placeholders)
+    if (config['Rooms'] != '-'):
+        Rooms = read_rooms(config['Rooms'])
+    if (config['TAPool'] != '-'):
+        Pool = read_taPool(config['TAPool'], config)
+    Reference = {}
+    if (config['ReferenceSchedule'] != '-'):
+        Reference = read_referenceSchedule(config['ReferenceSchedule'], course_instructor, config)
 
     #Step 3: set up the ILP problem and slove it.
+    metrics = {}
+    trace = []
+    metrics['Read-seconds'] = time.perf_counter() - run_start
+    if (config['Enrollment'] != '-'):
+        metrics['Enrollment-rows'] = enrollmentRowNum
+        metrics['Co-enrolled-pairs'] = len(CoEnrollment)
+        metrics['Enrollment-hard-conflict-pairs'] = hardPairNum
+        metrics['Enrollment-soft-conflict-pairs'] = len(SoftConflictPairs)
+    features = instanceFeatures(course_instructor, conflict_course_pairs, TotalNonExemptedHours, config)
+    Available = detectSolvers()
+    Backend = chooseSolver(config, Available, features, '--prices' in sys.argv[1:] or '--alternatives' in sys.argv[1:])
+    print(f"Solver: {Backend.name} ({Backend.reason})", file=sys.stderr)
+    metrics['Solver-backend'] = Backend.name
+    metrics['Solver-reason'] = Backend.reason
+    metrics['Solvers-available'] = ', '.join(Available)
+    for key, value in features.items():
+        metrics[f'Instance-{key}'] = value
+    IW, Avoid = createIW(Preferences, course_instructor, Candidates)
     CW = createCW(course_instructor, config)
-    upper_bound = LP(IW, CW, course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs)
-    X, Y, problem = ILP(IW, CW, course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs)
+    X, problem, upper_bound, relaxation = ILP(IW, CW, course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, SameDayPairs, SoftConflictPairs, Reference, Candidates, Avoid, metrics, trace)
+    # The phases below solve the problem again, so the constraints left out by 'Lazy-constraints' are added first
+    if (config['Lazy-constraints'] == 1 and (config['TAPool'] != '-' or config['Rooms'] != '-' or '--prices' in sys.argv[1:] or '--alternatives' in sys.argv[1:])):
+        addLazyC(course_instructor, config, conflict_course_pairs, NonExemptedC, TotalNonExemptedHours, X, problem, {}, True)
+    if (config['TAPool'] != '-'):
+        TAOf = taPhase(Pool, placeholders, X, problem, course_instructor, config, IW, CW, instructor_in_insPref, metrics, trace)
+    if (config['Rooms'] != '-'):
+        RoomOf = roomPhase(Rooms, X, problem, course_instructor, config, IW, CW, instructor_in_insPref, metrics, trace)
+        # Room cuts may have moved the placeholder sections, so the TAs are assigned again
+        if (config['TAPool'] != '-' and metrics['Room-cuts'] > 0 and TAOf != {}):
+            Schedule = extractSolution(X, course_instructor, config, IW, CW, instructor_in_insPref)[0]
+            TAOf = assignTAs(Schedule, list(TAOf), Pool, course_instructor[5], metrics, trace)
+            if (TAOf == {}):
+                print("Warning: fail to assign TAs to the placeholder sections after the room cuts", file=sys.stderr)
 
     #Step 4: generate outputs.
     isExist = os.path.exists(output_dir)     # Create a new directory if it does not exist
     if not isExist:
         os.makedirs(output_dir)
-    NumCNoPref, InsNotMet, BPNotMet = generate_output(X, output_dir, course_instructor, config, IW, instructor_in_insPref)
-    generateHeatMap(Y, output_dir, config, NonExemptedC, TotalNonExemptedHours)
-    IW_point, CW_point = computeCWIWPoint(course_instructor, config, X, IW, CW)
+    Schedule, NumCNoPref, InsNotMet, BPNotMet, IW_point, CW_point = extractSolution(X, course_instructor, config, IW, CW, instructor_in_insPref)
+    if (config['TAPool'] != '-'):
+        generateTAOutput(Schedule, Pool, TAOf, course_instructor, output_dir)
+        # The schedule shows the assigned TA instead of the placeholder
+        for c, i in TAOf.items():
+            Schedule[c].instructorName = Pool[i].name
+    if (config['Elastic'] == 1):
+        Violations = elasticViolations(problem, relaxation.descriptions, Schedule)
+    generate_output(Schedule, output_dir, course_instructor)
+    generateHeatMap(Schedule, output_dir, config, course_instructor, NonExemptedC, TotalNonExemptedHours)
     printStandardOutput(config, course_instructor, NonExemptedC, TotalNonExemptedHours, IW_point, CW_point, NumCNoPref, InsNotMet, BPNotMet, problem, upper_bound)
-    generateNonExCSV(output_dir, X, course_instructor, config, NonExemptedC, InsNotMet, BPNotMet, instructor_in_insPref)
-    generateCSV(output_dir, X, course_instructor, config, NonExemptedC, InsNotMet, BPNotMet, instructor_in_insPref)
+    if (config['Elastic'] == 1):
+        print(f"The number of violated constraints (Elastic = 1): {len(Violations)}", file=sys.stderr)
+        for description, amount, unit, courses in Violations:
+            print(f"{description}: violated by {amount:g} {unit}(s) ({', '.join(courses)})", file=sys.stderr)
+        print("", file=sys.stderr)
+        metrics['Elastic-violations'] = len(Violations)
+        metrics['Elastic-violation-hours'] = sum(amount for description, amount, unit, courses in Violations if unit == 'hour')
+        metrics['Elastic-violation-sessions'] = sum(amount for description, amount, unit, courses in Violations if unit == 'session')
+    generateNonExCSV(output_dir, Schedule, course_instructor, NonExemptedC)
+    generateCSV(output_dir, Schedule, course_instructor, NonExemptedC)
+    Explanations = explainPreferences(InsNotMet, X, IW, course_instructor, problem, relaxation)
+    generateExplanationOutput(Explanations, output_dir, config)
+    if (config['Rooms'] != '-'):
+        generateRoomOutput(Schedule, Rooms, RoomOf, output_dir)
+
+    #Step 5 (--prices only): find out what each instructor's preference costs, e.g., python time-schedule.py config --prices
+    if ('--prices' in sys.argv[1:]):
+        Prices = preferencePrices(problem, X, IW, CW, course_instructor, config, instructor_in_insPref, metrics)
+        generatePriceOutput(Prices, output_dir)
+
+    #Step 6 (--alternatives only): find near-optimal schedules that differ from the best one, e.g., python time-schedule.py config --alternatives
+    if ('--alternatives' in sys.argv[1:]):
+        Alternatives = solutionPool(problem, X, config, metrics)
+        generateAlternativeOutput(Alternatives, X, course_instructor, config, IW, CW, instructor_in_insPref, NonExemptedC, TotalNonExemptedHours,\
+                                  pulp.value(problem.objective), output_dir)
+
+    #Step 7: record solution quality and timing of this run.
+    metrics['Objective value'] = pulp.value(problem.objective)
+    metrics['Upper bound'] = upper_bound
+    metrics['IW points earned'] = IW_point
+    metrics['CW points earned'] = CW_point
+    metrics['Block policy violations'] = len(BPNotMet)
+    if (config['Treat-same-day-preference-as-hard-constraint'] == 2):
+        TeachingDays = defaultdict(set)
+        for c in {c for pair in SameDayPairs for c in pair}:
+            TeachingDays[course_instructor[5][c].instructorId] |= set(Schedule[c].days)
+        metrics['Same-day-teaching-days'] = sum(len(days) for days in TeachingDays.values())
+    if (config['Enrollment'] != '-'):
+        overlaps = coEnrollmentOverlaps(Schedule, course_instructor[5], SoftConflictPairs)
+        for (course1, course2, count) in overlaps:
+            print(f'{course1}, {course2} overlap and {count} students took both of them', file=sys.stderr)
+        metrics['Co-enrolled students in overlapping courses'] = sum(count for (course1, course2, count) in overlaps)
+    if (config['ReferenceSchedule'] != '-'):
+        moved = movedCourses(Schedule, Reference)
+        print(f"\nCourses moved from the reference schedule ({len(moved)} of {len(Reference)}): {', '.join(moved)}", file=sys.stderr)
+        metrics['Moved courses'] = len(moved)
+    metrics['Total-seconds'] = time.perf_counter() - run_start
+    writeMetrics(metrics, output_dir)
+    writeSolverTrace(trace, output_dir)
+    if (config['Rooms'] != '-' and metrics['Rooms-unassigned-courses'] > 0):
+        sys.exit(f"Rooms could not be assigned to {metrics['Rooms-unassigned-courses']} course(s).")
 
 #################################################################################
 if __name__ == "__main__":
@@ -5,6 +5,9 @@ if [ ! -d "$output_dir" ]; then
 fi
 source ~/.bashrc
 source activate /projects/assigned/course-scheduling/Course-Scheduling-System/env
+# To only check the input files (no solver, no output files): python3 ../bin/time-schedule.py config --check
+# To also find out what each instructor's preference costs (preference-prices.txt): python3 ../bin/time-schedule.py config --prices
+# To also write near-optimal alternative schedules (alternatives.txt, alternative-<k>/): python3 ../bin/time-schedule.py config --alternatives
 python3 ../bin/time-schedule.py config 1>output/log.stdout 2>output/log.stderr
 #/projects/assigned/course-scheduling/Course-Scheduling-System/env/bin/python3 ../bin/time-schedule.py config 1>output/log.stdout 2>output/log.stderr
 cp config output/